@@ -55,6 +55,8 @@ CURRENT_HEIGHT = screen.get_height()
 
 
 WALLPAPERS_DIR_DEFAULT = get_relative_path("../assets/wallpapers_example/")
+# Rates of one base currency; {base} is its lowercase code
+CURRENCY_RATES_URL_DEFAULT = "https://www.floatrates.com/daily/{base}.json"
 CONFIG_FILE = get_relative_path("../config/assets/config.json")
 MATUGEN_STATE_FILE = os.path.join(CONFIG_DIR, "matugen")
 
@@ -98,6 +100,9 @@ if os.path.exists(CONFIG_FILE):
     NOTIFICATION_LIMITED_APPS_HISTORY = config.get(
         "notification_limited_apps_history", ["Spotify"]
     )
+    LAUNCHER_PLUGIN_WARMUP = config.get("launcher_plugin_warmup", True)
+    CLIPBOARD_FULL_TEXT_INDEX = config.get("clipboard_full_text_index", False)
+    CURRENCY_RATES_URL = config.get("currency_rates_url", CURRENCY_RATES_URL_DEFAULT)
 
 else:
     WALLPAPERS_DIR = WALLPAPERS_DIR_DEFAULT
@@ -116,3 +121,6 @@ else:
     NOTIFICATION_TIMEOUT = parse_timeout_string(NOTIFICATION_TIMEOUT_STR)
     NOTIFICATION_IGNORED_APPS_HISTORY = ["Hyprshot"]
     NOTIFICATION_LIMITED_APPS_HISTORY = ["Spotify"]
+    LAUNCHER_PLUGIN_WARMUP = True
+    CLIPBOARD_FULL_TEXT_INDEX = False
+    CURRENCY_RATES_URL = CURRENCY_RATES_URL_DEFAULT
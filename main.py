@@ -13,6 +13,7 @@ from modules.osd import OSD
 from modules.panel.main import Panel
 from modules.switcher import ApplicationSwitcher
 from modules.widget import Deskwidgets
+from services.reminders import ReminderScheduler
 
 gi.require_version("Gtk", "3.0")
 gi.require_version("Gdk", "3.0")
@@ -60,6 +61,8 @@ if __name__ == "__main__":
     switcher = ApplicationSwitcher()
     launcher = Launcher()
     panel.launcher = launcher
+    # Fire stored reminders, including ones missed while not running
+    ReminderScheduler.get_initial().start()
     osd = OSD()
 
     widgets = Deskwidgets()
@@ -0,0 +1,306 @@
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+from gi.repository import Gio, GLib, Gtk
+
+from fabric.utils import DesktopApp
+
+# Wait for bursts of file events (package installs) to settle before applying them
+INDEX_UPDATE_DELAY_MS = 250
+
+
+@dataclass
+class DesktopEntry:
+    """
+    A desktop application with its searchable fields pre-lowercased.
+    """
+
+    app: DesktopApp
+    desktop_id: str
+    path: str
+    rank: int  # Position of the data dir in XDG precedence (lower wins)
+
+    # Pre-lowercased search fields
+    name: str = ""
+    display_name: str = ""
+    generic_name: str = ""
+    description: str = ""
+    executable: str = ""
+
+    # Serialised GIcon, so cached icons can be invalidated when it changes
+    icon_key: str = ""
+
+    @property
+    def icon_cache_key(self) -> str:
+        return f"{self.desktop_id}:{self.icon_key}"
+
+    @classmethod
+    def from_app_info(
+        cls, app_info: Gio.DesktopAppInfo, rank: int, icon_theme=None
+    ) -> "DesktopEntry":
+        app = DesktopApp(app_info, icon_theme)
+        icon = app_info.get_icon()
+        return cls(
+            app=app,
+            desktop_id=app_info.get_id() or "",
+            path=app_info.get_filename() or "",
+            rank=rank,
+            name=(app.name or "").lower(),
+            display_name=(app.display_name or "").lower(),
+            generic_name=(app.generic_name or "").lower(),
+            description=(app.description or "").lower(),
+            executable=(app.executable or "").lower(),
+            icon_key=icon.to_string() if icon else "",
+        )
+
+
+class DesktopAppIndex:
+    """
+    Long-lived index of desktop applications.
+
+    Built once from the XDG data dirs and kept up to date with a file monitor
+    on every ``applications/`` directory and its subdirectories, so queries
+    never reparse .desktop files. Readers get an immutable snapshot that is
+    swapped atomically on change, which makes it safe to read from the query
+    worker threads.
+    """
+
+    def __init__(self, include_hidden: bool = False, on_changed=None):
+        self.include_hidden = include_hidden
+        # Called on the main loop after incremental updates are published
+        self.on_changed = on_changed
+        self._icon_theme = Gtk.IconTheme.get_default()
+        self._app_dirs = self._get_application_dirs()
+        self._entries: Dict[str, DesktopEntry] = {}
+        self._snapshot: Tuple[DesktopEntry, ...] = ()
+        # {directory: monitor}
+        self._monitors: Dict[str, Gio.FileMonitor] = {}
+        self._pending_paths: Dict[str, bool] = {}  # path -> exists
+        self._update_source_id = None
+
+        self._build()
+        self._start_monitors()
+
+    def get_entries(self) -> Tuple[DesktopEntry, ...]:
+        """Get the current snapshot of indexed applications."""
+        return self._snapshot
+
+    def get_entry(self, desktop_id: str) -> Optional[DesktopEntry]:
+        """Get an indexed application by its desktop file ID."""
+        return self._entries.get(desktop_id)
+
+    def get_apps(self) -> List[DesktopApp]:
+        """Get the indexed applications as DesktopApp objects."""
+        return [entry.app for entry in self._snapshot]
+
+    def close(self):
+        """Stop monitoring and release the index."""
+        for monitor in self._monitors.values():
+            monitor.cancel()
+        self._monitors.clear()
+        if self._update_source_id:
+            GLib.source_remove(self._update_source_id)
+            self._update_source_id = None
+        self._entries.clear()
+        self._snapshot = ()
+
+    def _get_application_dirs(self) -> List[str]:
+        """Get the applications directories in XDG precedence order."""
+        data_dirs = [GLib.get_user_data_dir()] + list(GLib.get_system_data_dirs())
+        app_dirs = []
+        for data_dir in data_dirs:
+            app_dir = os.path.join(data_dir, "applications")
+            if app_dir not in app_dirs:
+                app_dirs.append(app_dir)
+        return app_dirs
+
+    def _get_rank(self, path: str) -> int:
+        """Get the precedence rank of the directory a desktop file lives in."""
+        for rank, app_dir in enumerate(self._app_dirs):
+            if path.startswith(app_dir + os.sep):
+                return rank
+        return len(self._app_dirs)
+
+    def _get_desktop_id(self, path: str) -> str:
+        """Derive the desktop file ID from its path, as per the XDG spec."""
+        for app_dir in self._app_dirs:
+            if path.startswith(app_dir + os.sep):
+                return os.path.relpath(path, app_dir).replace(os.sep, "-")
+        return os.path.basename(path)
+
+    def _should_index(self, app_info: Gio.DesktopAppInfo) -> bool:
+        return self.include_hidden or app_info.should_show()
+
+    def _build(self):
+        """Build the full index once."""
+        entries = {}
+        for app_info in Gio.DesktopAppInfo.get_all():
+            if not self._should_index(app_info):
+                continue
+            try:
+                path = app_info.get_filename() or ""
+                entry = DesktopEntry.from_app_info(
+                    app_info, self._get_rank(path), self._icon_theme
+                )
+            except Exception as e:
+                print(f"Failed to index application {app_info.get_id()}: {e}")
+                continue
+            entries[entry.desktop_id] = entry
+
+        self._entries = entries
+        self._publish()
+
+    def _publish(self):
+        """Swap in a new sorted snapshot for readers."""
+        self._snapshot = tuple(
+            sorted(self._entries.values(), key=lambda e: e.display_name or e.name)
+        )
+
+    def _start_monitors(self):
+        """Watch every applications directory and its subdirectories."""
+        for app_dir in self._app_dirs:
+            self._watch_dir(app_dir)
+            for subdir in self._walk_subdirs(app_dir):
+                self._watch_dir(subdir)
+
+    def _walk_subdirs(self, directory: str) -> List[str]:
+        return [
+            os.path.join(root, name)
+            for root, dirs, _files in os.walk(directory)
+            for name in dirs
+        ]
+
+    def _watch_dir(self, directory: str):
+        if directory in self._monitors:
+            return
+        try:
+            monitor = Gio.File.new_for_path(directory).monitor_directory(
+                Gio.FileMonitorFlags.WATCH_MOVES, None
+            )
+        except GLib.Error as e:
+            print(f"Failed to monitor {directory}: {e}")
+            return
+        monitor.connect("changed", self._on_dir_changed)
+        self._monitors[directory] = monitor
+
+    def _on_dir_changed(self, _monitor, file, other_file, event_type):
+        """Queue changed desktop files for an incremental update."""
+        event = Gio.FileMonitorEvent
+        path = file.get_path() if file else None
+        if event_type in (event.CREATED, event.CHANGES_DONE_HINT, event.MOVED_IN):
+            self._on_path_added(path)
+        elif event_type in (event.DELETED, event.MOVED_OUT):
+            self._on_path_removed(path)
+        elif event_type == event.RENAMED:
+            self._on_path_removed(path)
+            if other_file:
+                self._on_path_added(other_file.get_path())
+
+    def _on_path_added(self, path: Optional[str]):
+        if not path or not os.path.isdir(path):
+            self._queue_path(path, True)
+            return
+
+        # A new subdirectory: watch it, and index files that were already
+        # in it (e.g. moved in as a whole) before the monitor existed
+        for directory in [path] + self._walk_subdirs(path):
+            self._watch_dir(directory)
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                continue
+            for name in names:
+                self._queue_path(os.path.join(directory, name), True)
+
+    def _on_path_removed(self, path: Optional[str]):
+        if not path or path not in self._monitors or path in self._app_dirs:
+            self._queue_path(path, False)
+            return
+
+        # A removed subdirectory: stop watching it and drop its files
+        prefix = path + os.sep
+        for directory in [
+            d for d in self._monitors if d == path or d.startswith(prefix)
+        ]:
+            self._monitors.pop(directory).cancel()
+        for entry in list(self._entries.values()):
+            if entry.path.startswith(prefix):
+                self._queue_path(entry.path, False)
+
+    def _queue_path(self, path: Optional[str], exists: bool):
+        if not path or not path.endswith(".desktop"):
+            return
+
+        self._pending_paths[path] = exists
+        if not self._update_source_id:
+            self._update_source_id = GLib.timeout_add(
+                INDEX_UPDATE_DELAY_MS, self._apply_pending
+            )
+
+    def _apply_pending(self) -> bool:
+        """Apply queued add/remove deltas and publish a new snapshot."""
+        self._update_source_id = None
+        pending, self._pending_paths = self._pending_paths, {}
+
+        for path, exists in pending.items():
+            desktop_id = self._get_desktop_id(path)
+            current = self._entries.get(desktop_id)
+
+            if not exists:
+                if current and current.path == path:
+                    del self._entries[desktop_id]
+                    # A lower-precedence copy may still exist elsewhere
+                    self._load_fallback(desktop_id)
+                continue
+
+            rank = self._get_rank(path)
+            if current and current.rank < rank:
+                # Shadowed by a higher-precedence file with the same ID
+                continue
+
+            try:
+                app_info = Gio.DesktopAppInfo.new_from_filename(path)
+            except Exception:
+                app_info = None
+
+            if app_info is None or not self._should_index(app_info):
+                if current and current.path == path:
+                    del self._entries[desktop_id]
+                continue
+
+            try:
+                entry = DesktopEntry.from_app_info(app_info, rank, self._icon_theme)
+            except Exception as e:
+                # One broken file must not hold up the rest of the batch
+                print(f"Error indexing application {path}: {e}")
+                if current and current.path == path:
+                    del self._entries[desktop_id]
+                continue
+            entry.desktop_id = desktop_id
+            self._entries[desktop_id] = entry
+
+        self._publish()
+        if self.on_changed:
+            self.on_changed()
+        return False  # Don't repeat
+
+    def _load_fallback(self, desktop_id: str):
+        """Index the next desktop file in precedence order with the given ID."""
+        relative_path = desktop_id.replace("-", os.sep)
+        for rank, app_dir in enumerate(self._app_dirs):
+            for candidate in (desktop_id, relative_path):
+                path = os.path.join(app_dir, candidate)
+                if not os.path.isfile(path):
+                    continue
+                try:
+                    app_info = Gio.DesktopAppInfo.new_from_filename(path)
+                    if app_info and self._should_index(app_info):
+                        entry = DesktopEntry.from_app_info(
+                            app_info, rank, self._icon_theme
+                        )
+                        entry.desktop_id = desktop_id
+                        self._entries[desktop_id] = entry
+                except Exception as e:
+                    print(f"Error indexing application {path}: {e}")
+                return
@@ -0,0 +1,167 @@
+import heapq
+import json
+import math
+import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple
+
+from gi.repository import GLib
+
+import config.data as data
+
+FRECENCY_FILE = os.path.join(data.CACHE_DIR, "launcher_frecency.json")
+# An activation counts half as much after this long
+FRECENCY_HALF_LIFE_DAYS = 7
+# Decayed activation count at which an item gets half of the maximum boost
+FRECENCY_SATURATION = 5.0
+# Share of the relevance range frecency can add on top of the match score
+FRECENCY_WEIGHT = 0.35
+# Entries whose decayed count drops below this are dropped when saving
+FRECENCY_PRUNE_BELOW = 0.05
+FRECENCY_MAX_ENTRIES = 2000
+FRECENCY_SAVE_DELAY_MS = 2000
+
+_DECAY_RATE = math.log(2) / (FRECENCY_HALF_LIFE_DAYS * 86400)
+
+
+def _log_add(a: float, b: float) -> float:
+    """log(exp(a) + exp(b)) without overflowing."""
+    high, low = (a, b) if a > b else (b, a)
+    return high + math.log1p(math.exp(low - high))
+
+
+class FrecencyStore:
+    """
+    Persistent activation history with exponential time decay.
+
+    Every activation at time t adds exp(rate * t) to an item's score. Scores
+    are stored as logarithms, so recording is one addition and decay never
+    has to be applied to stored entries: items rank by their stored value
+    directly, and the decayed activation count at time now is just
+    exp(value - rate * now).
+
+    Keys are namespaced by the caller, e.g. "app:firefox.desktop".
+    """
+
+    def __init__(self, path: str = FRECENCY_FILE):
+        self.path = path
+        self._scores: Dict[str, float] = {}
+        self._save_source_id = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Error loading launcher frecency: {e}")
+            return
+
+        if not isinstance(stored, dict):
+            return
+        if stored.get("half_life_days") != FRECENCY_HALF_LIFE_DAYS:
+            # Stored values are only comparable under the same decay rate
+            return
+        scores = stored.get("scores")
+        if not isinstance(scores, dict):
+            return
+        self._scores = {
+            key: float(value)
+            for key, value in scores.items()
+            if isinstance(value, (int, float))
+        }
+
+    def record(self, key: str, timestamp: Optional[float] = None):
+        """Record an activation of the item with the given key."""
+        if not key:
+            return
+
+        value = _DECAY_RATE * (timestamp if timestamp is not None else time.time())
+        with self._lock:
+            current = self._scores.get(key)
+            self._scores[key] = value if current is None else _log_add(current, value)
+        self._schedule_save()
+
+    def count(self, key: str, now: Optional[float] = None) -> float:
+        """Get the decayed activation count of an item."""
+        value = self._scores.get(key)
+        if value is None:
+            return 0.0
+        now = now if now is not None else time.time()
+        return math.exp(value - _DECAY_RATE * now)
+
+    def boost(self, key: Optional[str], now: Optional[float] = None) -> float:
+        """Get the relevance boost of an item, between 0 and FRECENCY_WEIGHT."""
+        if not key:
+            return 0.0
+        count = self.count(key, now)
+        return FRECENCY_WEIGHT * count / (count + FRECENCY_SATURATION)
+
+    def top(self, prefix: str, limit: int) -> List[Tuple[str, float]]:
+        """
+        Get the most frecent keys starting with a prefix.
+
+        Only items that have been activated are visited, never a catalogue.
+
+        Returns:
+            (key without prefix, decayed count) pairs, most frecent first
+        """
+        with self._lock:
+            items = [
+                (key, value)
+                for key, value in self._scores.items()
+                if key.startswith(prefix)
+            ]
+        best = heapq.nlargest(limit, items, key=lambda item: item[1])
+        now = _DECAY_RATE * time.time()
+        return [(key[len(prefix) :], math.exp(value - now)) for key, value in best]
+
+    def _schedule_save(self):
+        if not self._save_source_id:
+            self._save_source_id = GLib.timeout_add(FRECENCY_SAVE_DELAY_MS, self._save)
+
+    def _save(self) -> bool:
+        """Prune faded entries and write the store in a background thread."""
+        self._save_source_id = None
+
+        cutoff = _DECAY_RATE * time.time() + math.log(FRECENCY_PRUNE_BELOW)
+        with self._lock:
+            kept = heapq.nlargest(
+                FRECENCY_MAX_ENTRIES,
+                (item for item in self._scores.items() if item[1] >= cutoff),
+                key=lambda item: item[1],
+            )
+            self._scores = dict(kept)
+            snapshot = dict(self._scores)
+
+        threading.Thread(target=self._write, args=(snapshot,), daemon=True).start()
+        return False  # Don't repeat
+
+    def _write(self, scores: Dict[str, float]):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(
+                    {"half_life_days": FRECENCY_HALF_LIFE_DAYS, "scores": scores},
+                    f,
+                    separators=(",", ":"),
+                )
+            os.replace(tmp_path, self.path)
+        except Exception as e:
+            print(f"Error saving launcher frecency: {e}")
+
+
+_store: Optional[FrecencyStore] = None
+
+
+def get_frecency_store() -> FrecencyStore:
+    """Get the frecency store shared by the launcher and its plugins."""
+    global _store
+    if _store is None:
+        _store = FrecencyStore()
+    return _store
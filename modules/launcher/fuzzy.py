@@ -0,0 +1,246 @@
+"""
+Shared fuzzy scoring for launcher plugins.
+
+A subsequence matcher in the style of fzf's v1 algorithm: find the first
+match window, shrink it from the end, also try a contiguous and a
+word-start alignment, then score matched characters with bonuses for word
+boundaries, camelCase humps and consecutive runs, and penalties for gaps.
+Scores are normalised to 0..1 so they can be used directly as
+``Result.relevance``.
+"""
+
+import heapq
+from typing import List, NamedTuple, Optional, Sequence, Tuple
+
+SCORE_MATCH = 16
+SCORE_GAP_START = -3
+SCORE_GAP_EXTENSION = -1
+BONUS_BOUNDARY = SCORE_MATCH // 2
+BONUS_CAMEL = BONUS_BOUNDARY + SCORE_GAP_EXTENSION
+BONUS_CONSECUTIVE = -(SCORE_GAP_START + SCORE_GAP_EXTENSION)
+BONUS_FIRST_CHAR_MULTIPLIER = 2
+
+# Share of the normalised score that rewards covering more of the text,
+# so "fire" ranks "firefox" above "firewall-config-settings"
+LENGTH_WEIGHT = 0.15
+
+# Weight of a match in long descriptive text relative to a title match, shared
+# so that plugins rank description hits consistently
+DESCRIPTION_WEIGHT = 0.6
+
+DELIMITERS = frozenset(" \t-_/.:,;|()[]")
+
+
+class FuzzyMatch(NamedTuple):
+    """A successful match: normalised score and matched character positions."""
+
+    score: float
+    positions: Tuple[int, ...]
+
+
+def _bonus_at(text: str, index: int) -> int:
+    """Bonus for matching the character at index, based on what precedes it."""
+    if index == 0:
+        return BONUS_BOUNDARY
+
+    prev = text[index - 1]
+    char = text[index]
+    if prev in DELIMITERS:
+        return BONUS_BOUNDARY
+    if prev.islower() and char.isupper():
+        return BONUS_CAMEL
+    if not prev.isalnum() and char.isalnum():
+        return BONUS_BOUNDARY
+    return 0
+
+
+def _max_score(query_len: int) -> int:
+    """The raw score of a query matching a whole word at the start of a text."""
+    return query_len * (SCORE_MATCH + BONUS_BOUNDARY) + BONUS_BOUNDARY * (
+        BONUS_FIRST_CHAR_MULTIPLIER - 1
+    )
+
+
+def _score_positions(text: str, positions: Sequence[int]) -> int:
+    """Raw score of a match at the given positions of text."""
+    score = 0
+    prev = -1
+    chunk_bonus = 0
+
+    for n, index in enumerate(positions):
+        bonus = _bonus_at(text, index)
+        if n > 0 and index == prev + 1:
+            # Consecutive matches keep the bonus of the chunk they extend
+            bonus = max(bonus, chunk_bonus, BONUS_CONSECUTIVE)
+        else:
+            chunk_bonus = bonus
+            if n > 0:
+                gap = index - prev - 1
+                score += SCORE_GAP_START + SCORE_GAP_EXTENSION * (gap - 1)
+        if n == 0:
+            bonus *= BONUS_FIRST_CHAR_MULTIPLIER
+
+        score += SCORE_MATCH + bonus
+        prev = index
+
+    return score
+
+
+def _greedy_positions(query: str, text_lower: str, start: int) -> List[int]:
+    """Leftmost match positions of query starting at start."""
+    positions = []
+    index = start - 1
+    for char in query:
+        index = text_lower.find(char, index + 1)
+        positions.append(index)
+    return positions
+
+
+def _boundary_positions(query: str, text: str, text_lower: str) -> Optional[List[int]]:
+    """
+    Match positions that prefer word starts, so "vsc" hits the initials of
+    "Visual Studio Code" rather than the first "s" and "c" in the text.
+    """
+    positions = []
+    index = -1
+    for n, char in enumerate(query):
+        candidate = text_lower.find(char, index + 1)
+        fallback = candidate
+        while candidate >= 0 and not _bonus_at(text, candidate):
+            candidate = text_lower.find(char, candidate + 1)
+        if candidate >= 0 and _subsequence_from(query, n + 1, text_lower, candidate):
+            index = candidate
+        elif fallback >= 0:
+            index = fallback
+        else:
+            return None
+        positions.append(index)
+    return positions
+
+
+def _subsequence_from(
+    query: str, query_start: int, text_lower: str, after: int
+) -> bool:
+    """Check whether query[query_start:] still fits after the given index."""
+    index = after
+    for char in query[query_start:]:
+        index = text_lower.find(char, index + 1)
+        if index < 0:
+            return False
+    return True
+
+
+def fuzzy_match(
+    query: str, text: str, text_lower: Optional[str] = None
+) -> Optional[FuzzyMatch]:
+    """
+    Match a query against a text as a case-insensitive subsequence.
+
+    Args:
+        query: The search query (lowercased by the caller or here)
+        text: The candidate text, original case is used for camelCase bonuses
+        text_lower: Pre-lowercased text, to avoid lowering it again
+
+    Returns:
+        A FuzzyMatch, or None if the query is not a subsequence of the text
+    """
+    query = query.lower()
+    if not query or not text:
+        return None
+    if text_lower is None:
+        text_lower = text.lower()
+    if len(text_lower) != len(text):
+        # Lowercasing changed the length (e.g. "İ"), so positions in
+        # text_lower don't line up with text; give up camelCase bonuses
+        text = text_lower
+
+    if query == text_lower:
+        return FuzzyMatch(1.0, tuple(range(len(text))))
+
+    # Forward pass: find the end of the first complete match
+    index = -1
+    first = -1
+    for char in query:
+        index = text_lower.find(char, index + 1)
+        if index < 0:
+            return None
+        if first < 0:
+            first = index
+    end = index
+
+    # Backward pass: shrink the window from the end
+    index = end + 1
+    for char in reversed(query):
+        index = text_lower.rfind(char, first, index)
+
+    candidates = [_greedy_positions(query, text_lower, index)]
+
+    # A contiguous occurrence or a word-start match can beat the greedy window
+    substring_start = text_lower.find(query)
+    if substring_start >= 0 and substring_start != index:
+        candidates.append(range(substring_start, substring_start + len(query)))
+    if len(query) > 1:
+        boundary = _boundary_positions(query, text, text_lower)
+        if boundary:
+            candidates.append(boundary)
+
+    score, positions = max(
+        ((_score_positions(text, c), c) for c in candidates), key=lambda m: m[0]
+    )
+
+    normalised = max(0.0, min(1.0, score / _max_score(len(query))))
+    coverage = len(query) / len(text_lower)
+    normalised *= 1.0 - LENGTH_WEIGHT + LENGTH_WEIGHT * coverage
+    return FuzzyMatch(normalised, tuple(positions))
+
+
+def fuzzy_score(query: str, text: str, text_lower: Optional[str] = None) -> float:
+    """Match a query against a text and return only the normalised score."""
+    match = fuzzy_match(query, text, text_lower)
+    return match.score if match else 0.0
+
+
+def score_batch(
+    query: str,
+    candidates: Sequence[str],
+    limit: Optional[int] = None,
+    min_score: float = 0.0,
+    originals: Optional[Sequence[str]] = None,
+) -> List[Tuple[int, FuzzyMatch]]:
+    """
+    Score a pre-normalised (lowercased) candidate array in one call.
+
+    Args:
+        query: The search query
+        candidates: Lowercased candidate strings
+        limit: Only return the best ``limit`` matches
+        min_score: Drop matches scoring below this
+        originals: The candidates in their original case, in the same order;
+            without them camelCase boundaries can't be told apart
+
+    Returns:
+        (candidate index, FuzzyMatch) pairs, best first
+    """
+    query = query.lower()
+    if not query:
+        return []
+
+    matches = []
+    first_char = query[0]
+    for index, candidate in enumerate(candidates):
+        # Cheap rejection before running the matcher
+        if first_char not in candidate:
+            continue
+        text = candidate
+        if originals is not None and len(originals[index]) == len(candidate):
+            # Lowercasing may change the length of a few characters
+            text = originals[index]
+        match = fuzzy_match(query, text, candidate)
+        if match and match.score >= min_score:
+            matches.append((index, match))
+
+    if limit is not None and len(matches) > limit:
+        return heapq.nlargest(limit, matches, key=lambda m: m[1].score)
+
+    matches.sort(key=lambda m: m[1].score, reverse=True)
+    return matches
@@ -0,0 +1,319 @@
+import json
+import os
+import struct
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Callable, Dict, List, Optional, Tuple
+
+from gi.repository import GdkPixbuf, GLib, Gtk
+
+import config.data as data
+
+ATLAS_ICON_SIZE = 48
+ATLAS_MAGIC = b"MODUSICONS1\n"
+ATLAS_FILE = os.path.join(data.CACHE_DIR, f"launcher_icons_{ATLAS_ICON_SIZE}.bin")
+# Icons rendered per idle callback while building the atlas
+ATLAS_BUILD_BATCH = 8
+DEFAULT_BYTE_BUDGET = 8 * 1024 * 1024
+
+
+def _pixbuf_bytes(pixbuf: GdkPixbuf.Pixbuf) -> int:
+    return pixbuf.get_rowstride() * pixbuf.get_height()
+
+
+class PixbufLRU:
+    """
+    Least-recently-used pixbuf cache keyed by (key, size), bounded by the
+    total number of pixel bytes it holds rather than by entry count.
+    """
+
+    def __init__(self, max_bytes: int = DEFAULT_BYTE_BUDGET):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self._items: "OrderedDict[Tuple[str, int], GdkPixbuf.Pixbuf]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str, size: int) -> Optional[GdkPixbuf.Pixbuf]:
+        with self._lock:
+            pixbuf = self._items.get((key, size))
+            if pixbuf is not None:
+                self._items.move_to_end((key, size))
+            return pixbuf
+
+    def put(self, key: str, size: int, pixbuf: GdkPixbuf.Pixbuf):
+        nbytes = _pixbuf_bytes(pixbuf)
+        if nbytes > self.max_bytes:
+            return
+
+        with self._lock:
+            old = self._items.pop((key, size), None)
+            if old is not None:
+                self.current_bytes -= _pixbuf_bytes(old)
+
+            self._items[(key, size)] = pixbuf
+            self.current_bytes += nbytes
+
+            while self.current_bytes > self.max_bytes and self._items:
+                _, evicted = self._items.popitem(last=False)
+                self.current_bytes -= _pixbuf_bytes(evicted)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.current_bytes = 0
+
+    def __len__(self):
+        return len(self._items)
+
+
+class IconAtlas:
+    """
+    Pre-rendered icons stored as raw pixel data in a single cache file.
+
+    The file is a small JSON header followed by every icon's pixels, so the
+    whole atlas loads with one read at startup and icons are materialised
+    straight from memory without touching the icon theme. Icons that failed
+    to render are kept as entries without pixels, so they aren't retried.
+    """
+
+    def __init__(self, path: str = ATLAS_FILE, size: int = ATLAS_ICON_SIZE):
+        self.path = path
+        self.size = size
+        self.theme = self._get_theme_name()
+        self._icons: Dict[str, list] = {}
+        self._blob = b""
+        self._building = False
+        self._lock = threading.Lock()
+        self.load()
+
+    def _get_theme_name(self) -> str:
+        settings = Gtk.Settings.get_default()
+        return settings.get_property("gtk-icon-theme-name") if settings else ""
+
+    def load(self):
+        """Load the atlas file, discarding it if it was built for another theme."""
+        try:
+            with open(self.path, "rb") as f:
+                blob = f.read()
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            print(f"Error loading icon atlas: {e}")
+            return
+
+        try:
+            if not blob.startswith(ATLAS_MAGIC):
+                return
+            offset = len(ATLAS_MAGIC)
+            (header_len,) = struct.unpack_from("<I", blob, offset)
+            offset += 4
+            header = json.loads(blob[offset : offset + header_len])
+            if header.get("theme") != self.theme or header.get("size") != self.size:
+                return
+
+            with self._lock:
+                self._icons = header.get("icons", {})
+                self._blob = memoryview(blob)[offset + header_len :]
+        except (struct.error, ValueError) as e:
+            print(f"Discarding corrupt icon atlas: {e}")
+
+    def has(self, key: str) -> bool:
+        return bool(self._icons.get(key))
+
+    def get(self, key: str) -> Optional[GdkPixbuf.Pixbuf]:
+        """Materialise an icon from the atlas, or None if it isn't in it."""
+        with self._lock:
+            info = self._icons.get(key)
+            blob = self._blob
+        if not info:
+            return None
+
+        start, length, width, height, rowstride, has_alpha = info
+        pixels = GLib.Bytes.new(bytes(blob[start : start + length]))
+        return GdkPixbuf.Pixbuf.new_from_bytes(
+            pixels,
+            GdkPixbuf.Colorspace.RGB,
+            has_alpha,
+            8,
+            width,
+            height,
+            rowstride,
+        )
+
+    def build(
+        self,
+        items: List[Tuple[str, Callable[[], Optional[GdkPixbuf.Pixbuf]]]],
+        on_rendered: Optional[Callable[[str, GdkPixbuf.Pixbuf], None]] = None,
+    ):
+        """
+        Render missing icons on idle and rewrite the atlas file in a thread.
+
+        Rendering goes through the GTK icon theme, which is only safe on the
+        main loop, so it is spread over idle callbacks in small batches.
+
+        Args:
+            items: (key, render) pairs; render returns a pixbuf at atlas size,
+                or None if the icon can't be rendered
+            on_rendered: Called with each freshly rendered icon
+        """
+        wanted = {key for key, _ in items}
+        missing = [(key, render) for key, render in items if key not in self._icons]
+        stale = set(self._icons) - wanted
+        if self._building or (not missing and not stale):
+            return
+
+        self._building = True
+        rendered: Dict[str, GdkPixbuf.Pixbuf] = {}
+        failed = set()
+        queue = list(missing)
+
+        def render_batch():
+            for _ in range(ATLAS_BUILD_BATCH):
+                if not queue:
+                    threading.Thread(
+                        target=self._write,
+                        args=(wanted, rendered, failed),
+                        daemon=True,
+                    ).start()
+                    return False
+                key, render = queue.pop()
+                try:
+                    pixbuf = render()
+                except Exception as e:
+                    print(f"Error rendering icon {key}: {e}")
+                    pixbuf = None
+                if pixbuf is None:
+                    failed.add(key)
+                    continue
+                rendered[key] = pixbuf
+                if on_rendered:
+                    on_rendered(key, pixbuf)
+            return True
+
+        GLib.idle_add(render_batch, priority=GLib.PRIORITY_LOW)
+
+    def _write(self, wanted: set, rendered: Dict[str, GdkPixbuf.Pixbuf], failed: set):
+        """Serialise kept, newly rendered and failed icons to the atlas file."""
+        try:
+            chunks = []
+            icons = {}
+            offset = 0
+
+            with self._lock:
+                old_icons, old_blob = self._icons, self._blob
+
+            for key, info in old_icons.items():
+                if key not in wanted or key in rendered:
+                    continue
+                if not info:
+                    icons[key] = None
+                    continue
+                start, length = info[0], info[1]
+                chunks.append(bytes(old_blob[start : start + length]))
+                icons[key] = [offset] + info[1:]
+                offset += length
+
+            for key, pixbuf in rendered.items():
+                pixels = pixbuf.read_pixel_bytes().get_data()
+                chunks.append(pixels)
+                icons[key] = [
+                    offset,
+                    len(pixels),
+                    pixbuf.get_width(),
+                    pixbuf.get_height(),
+                    pixbuf.get_rowstride(),
+                    pixbuf.get_has_alpha(),
+                ]
+                offset += len(pixels)
+
+            for key in failed:
+                # Known to have no icon
+                icons[key] = None
+
+            header = json.dumps(
+                {"theme": self.theme, "size": self.size, "icons": icons}
+            ).encode("utf-8")
+            blob = b"".join(chunks)
+
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp_path = f"{self.path}.tmp"
+            with open(tmp_path, "wb") as f:
+                f.write(ATLAS_MAGIC)
+                f.write(struct.pack("<I", len(header)))
+                f.write(header)
+                f.write(blob)
+            os.replace(tmp_path, self.path)
+
+            with self._lock:
+                self._icons = icons
+                self._blob = memoryview(blob)
+        except Exception as e:
+            print(f"Error writing icon atlas: {e}")
+        finally:
+            self._building = False
+
+
+class IconCache:
+    """
+    Decoded icons shared by launcher results: a byte-budgeted LRU in front of
+    an optional on-disk atlas, falling back to decoding through a loader.
+    """
+
+    def __init__(
+        self, atlas: Optional[IconAtlas] = None, max_bytes: int = DEFAULT_BYTE_BUDGET
+    ):
+        self.atlas = atlas
+        self.lru = PixbufLRU(max_bytes)
+
+    def get(
+        self, key: str, size: int, loader: Callable[[], Optional[GdkPixbuf.Pixbuf]]
+    ) -> Optional[GdkPixbuf.Pixbuf]:
+        pixbuf = self.lru.get(key, size)
+        if pixbuf is not None:
+            return pixbuf
+
+        if self.atlas and size == self.atlas.size:
+            pixbuf = self.atlas.get(key)
+
+        if pixbuf is None:
+            try:
+                pixbuf = loader()
+            except Exception as e:
+                print(f"Error loading icon {key}: {e}")
+                return None
+
+        if pixbuf is not None:
+            self.lru.put(key, size, pixbuf)
+        return pixbuf
+
+
+@dataclass
+class IconRef:
+    """
+    A reference to an icon that is only decoded when a result row shows it.
+    """
+
+    key: str
+    size: int
+    loader: Callable[[], Optional[GdkPixbuf.Pixbuf]]
+    cache: Optional[IconCache] = None
+    # Starts loading off the main loop and calls back on it with the pixbuf;
+    # rows show placeholder_icon_name until it arrives
+    load_async: Optional[
+        Callable[[Callable[[Optional[GdkPixbuf.Pixbuf]], None]], None]
+    ] = None
+    placeholder_icon_name: Optional[str] = None
+
+    def peek(self) -> Optional[GdkPixbuf.Pixbuf]:
+        """Get the icon if it is already decoded, without loading it."""
+        return self.cache.lru.get(self.key, self.size) if self.cache else None
+
+    def load(self) -> Optional[GdkPixbuf.Pixbuf]:
+        if self.cache:
+            return self.cache.get(self.key, self.size, self.loader)
+        try:
+            return self.loader()
+        except Exception as e:
+            print(f"Error loading icon {self.key}: {e}")
+            return None
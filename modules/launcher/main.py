@@ -1,11 +1,15 @@
-from typing import List, Optional, Tuple
+import time
+from typing import Any, Dict, List, Optional, Tuple
 
 from gi.repository import Gdk, GLib
 
 from fabric.core.service import Property
 from fabric.widgets.box import Box
 from fabric.widgets.entry import Entry
+from modules.launcher.frecency import get_frecency_store
+from modules.launcher.plugin_host import PluginHost
 from modules.launcher.plugin_manager import PluginManager
+from modules.launcher.query_engine import QueryEngine
 from modules.launcher.result import Result
 from modules.launcher.result_item import ResultItem
 from modules.launcher.trigger_config import TriggerConfig
@@ -19,6 +23,10 @@ CURSOR_POSITION_DELAY_MS = 10
 SCROLL_PADDING = 10
 DEFAULT_ITEM_HEIGHT = 68
 PAGE_NAVIGATION_STEP = 5
+# Typing this shows launcher latency statistics
+STATS_COMMAND = ":stats"
+# Rows materialised above and below the viewport of the virtualised result list
+RESULT_OVERSCAN_ROWS = 3
 LAUNCHER_WIDTH = 640
 LAUNCHER_HEIGHT = 400
 
@@ -48,8 +56,20 @@ class Launcher(Window):
         self._initializing = True
         self._auto_adding_space = False
         self._processing_backspace = False
-        self.plugin_manager = PluginManager()
+        # What plugins get to do to the launcher, see PluginHost
+        self.plugin_host = PluginHost(self)
+        self.plugin_manager = PluginManager(host=self.plugin_host)
         self.trigger_config = TriggerConfig()
+        # Plugin queries run in a worker pool; only the latest keystroke is painted
+        self.query_engine = QueryEngine()
+        # Per plugin (trigger, query, candidates) of the previous query, so a
+        # query extending it only rescores the surviving candidates
+        self._narrowing_cache: Dict[str, Tuple[str, str, Any]] = {}
+        # Activation history, blended into relevance when sorting results
+        self.frecency = get_frecency_store()
+        # Latency instrumentation, shared with the plugin manager
+        self.metrics = self.plugin_manager.metrics
+        self._keystroke_started: Optional[float] = None
 
         self.results: List[Result] = []
         self.selected_index = 0
@@ -121,9 +141,35 @@ class Launcher(Window):
             orientation="v",
             spacing=0,
         )
+
+        # Virtualised result rows: a pool of recycled ResultItems bound to the
+        # results inside the viewport, with spacers standing in for the rest
+        self.top_spacer = Box(name="launcher-results-spacer")
+        self.rows_box = Box(orientation="v", spacing=0)
+        self.bottom_spacer = Box(name="launcher-results-spacer")
+        # Results that bring their own widget are laid out without virtualisation
+        self.custom_box = Box(orientation="v", spacing=0)
+        for child in (
+            self.top_spacer,
+            self.rows_box,
+            self.bottom_spacer,
+            self.custom_box,
+        ):
+            self.results_box.add(child)
+
+        self._row_pool: List[ResultItem] = []
+        self._row_height = DEFAULT_ITEM_HEIGHT
+        self._row_height_measured = False
+        self._rendered_window: Optional[Tuple[int, int]] = None
+        self._virtualised = True
+
         self.results_scroll.add(self.results_box)
         main_box.add(self.results_scroll)
 
+        vadjustment = self.results_scroll.get_vadjustment()
+        vadjustment.connect("value-changed", self._on_results_scrolled)
+        vadjustment.connect("changed", self._on_results_scrolled)
+
         # Keep the results container visible initially
 
         self.connect("key-press-event", self._on_key_press)
@@ -187,16 +233,15 @@ class Launcher(Window):
                 self.active_trigger = detected_trigger
 
                 # Query the plugin with empty string to show default options
-                try:
-                    results = triggered_plugin.query("")
+                def show_default_options(results):
                     self.results = results
                     self.selected_index = 0
                     self._update_results_display()
-                except Exception as e:
-                    print(
-                        f"Error querying triggered plugin {triggered_plugin.name}: {e}"
-                    )
-                    self._clear_results()
+
+                self.query_engine.submit(
+                    [self._make_query_job(triggered_plugin, "")],
+                    show_default_options,
+                )
             else:
                 # Trigger not found, clear and show error or fallback
                 self.search_entry.set_text("")
@@ -271,6 +316,8 @@ class Launcher(Window):
 
     def close_launcher(self):
         """Hide the launcher and clear search."""
+        # Plugin data may change before the next session
+        self._narrowing_cache.clear()
         self.hide()
         self.search_entry.set_text("")
         self._clear_results()
@@ -278,6 +325,7 @@ class Launcher(Window):
         self.active_trigger = ""
         self.visible = False
         self.opened_with_trigger = False
+        self.plugin_host.notify_closed()
 
     def _on_search_changed(self, entry):
         """Handle search text changes."""
@@ -299,19 +347,15 @@ class Launcher(Window):
 
         query = entry.get_text().strip()
         self.query = query
+        self._keystroke_started = time.perf_counter()
 
         # If query is exactly ':', show all triggers
         if query == ":":
             self._show_available_triggers()
+        elif query == STATS_COMMAND:
+            self._show_stats()
         # If query matches a trigger exactly (with or without space), handle trigger activation
-        elif any(
-            query == trig or query == f"{trig} "
-            for trig in [
-                t.strip()
-                for p in self.plugin_manager.get_active_plugins()
-                for t in p.get_triggers()
-            ]
-        ):
+        elif self.plugin_manager.trigger_router.lookup(query)[0]:
             # Check if we need to add space immediately for exact trigger matches
             if not query.endswith(" "):
                 # This is an exact trigger match without space - add space immediately
@@ -337,6 +381,11 @@ class Launcher(Window):
         if query != self.query:
             return False
 
+        # Plugin queries to run in the worker pool
+        jobs = []
+        # Results that are cheap to build on the main loop
+        extra_results = []
+
         if not query:
             # Empty query - show popular applications
             self.triggered_plugin = None
@@ -344,33 +393,21 @@ class Launcher(Window):
 
             # Get applications plugin and show popular apps
             applications_plugin = self._get_applications_plugin()
-            if applications_plugin:
-                try:
-                    # Query with empty string to get popular/frequently used applications
-                    all_results = applications_plugin.query("")
-                    # Limit to max_results for empty query
-                    self.results = all_results[: self.max_results]
-                    self.selected_index = 0
-                    self._update_results_display()
-                except Exception as e:
-                    print(f"Error getting applications: {e}")
-                    self._clear_results()
-            else:
+            if not applications_plugin:
                 self._clear_results()
-            return False
+                return False
+
+            # Query with empty string to get popular/frequently used applications
+            jobs.append(self._make_query_job(applications_plugin, ""))
 
         # Check if we're already in trigger mode
-        if self.triggered_plugin and self.active_trigger:
+        elif self.triggered_plugin and self.active_trigger:
             # We're in trigger mode - search within the triggered plugin
-            try:
-                # Extract the search query after the trigger
-                remaining_query = self._extract_query_after_trigger(
-                    query, self.active_trigger
-                )
-                all_results = self.triggered_plugin.query(remaining_query)
-            except Exception as e:
-                print(f"Error in triggered plugin {self.triggered_plugin.name}: {e}")
-                all_results = []
+            # Extract the search query after the trigger
+            remaining_query = self._extract_query_after_trigger(
+                query, self.active_trigger
+            )
+            jobs.append(self._make_query_job(self.triggered_plugin, remaining_query))
         else:
             # Check for trigger activation
             triggered_plugin, trigger = self._detect_trigger(query)
@@ -397,33 +434,90 @@ class Launcher(Window):
 
                 # Always call the plugin's query method, even with empty remaining query
                 # This allows plugins to show default options when just the trigger is typed
-                try:
-                    all_results = triggered_plugin.query(remaining_query)
-                except Exception as e:
-                    print(f"Error in triggered plugin {triggered_plugin.name}: {e}")
-                    all_results = []
+                jobs.append(self._make_query_job(triggered_plugin, remaining_query))
             else:
                 # No trigger detected - search applications and show trigger suggestions
                 self.triggered_plugin = None
                 self.active_trigger = ""
 
-                all_results = []
-
                 # Search applications directly without trigger
                 applications_plugin = self._get_applications_plugin()
                 if applications_plugin:
-                    try:
-                        app_results = applications_plugin.query(query)
-                        all_results.extend(app_results)
-                    except Exception as e:
-                        print(f"Error searching applications: {e}")
+                    jobs.append(self._make_query_job(applications_plugin, query))
 
                 # Also show trigger suggestions if query matches trigger prefixes
-                trigger_suggestions = self._get_trigger_suggestions(query)
-                all_results.extend(trigger_suggestions)
+                extra_results = self._get_trigger_suggestions(query)
+
+        self.query_engine.submit(
+            jobs,
+            lambda results, q=query, extra=extra_results: self._show_search_results(
+                q, results + extra
+            ),
+        )
+
+        return False  # Don't repeat timeout
 
-        # Sort results by relevance score
-        all_results.sort(key=lambda r: r.relevance, reverse=True)
+    def _make_query_job(self, plugin, query: str):
+        """Wrap a plugin query so it can run in the query engine's worker pool."""
+        trigger = self.active_trigger
+
+        def job():
+            start = time.perf_counter()
+            results, error = [], None
+            try:
+                if plugin.supports_narrowing:
+                    results = self._query_with_narrowing(plugin, query, trigger)
+                else:
+                    results = plugin.query(query)
+            except Exception as e:
+                error = e
+                print(f"Error in plugin {plugin.name}: {e}")
+            for result in results or []:
+                # Lets row render time be attributed to the plugin
+                result.source_plugin = plugin.display_name
+            self.metrics.record_query(
+                plugin.display_name,
+                (time.perf_counter() - start) * 1000,
+                len(results or []),
+                error,
+            )
+            return results
+
+        # Keyed by plugin, so one plugin's queries never overlap
+        return plugin, job
+
+    def _query_with_narrowing(self, plugin, query: str, trigger: str) -> List[Result]:
+        """
+        Query a plugin, reusing the candidates of the previous query when the
+        new one extends it. Backspace or a trigger change means a full rescan.
+        """
+        query_key = query.lower().strip()
+        candidates = None
+
+        cached = self._narrowing_cache.get(plugin.name)
+        if cached:
+            cached_trigger, cached_query, cached_candidates = cached
+            if (
+                cached_candidates is not None
+                and cached_trigger == trigger
+                and cached_query
+                and query_key.startswith(cached_query)
+            ):
+                candidates = cached_candidates
+
+        results, new_candidates = plugin.query_narrowed(query, candidates)
+        self._narrowing_cache[plugin.name] = (trigger, query_key, new_candidates)
+        return results
+
+    def _show_search_results(self, query: str, all_results: List[Result]):
+        """Sort, limit and display results delivered by the query engine."""
+        # Sort results by relevance score, lifted by how often and how
+        # recently each result was activated
+        now = time.time()
+        all_results.sort(
+            key=lambda r: r.relevance + self.frecency.boost(r.frecency_key, now),
+            reverse=True,
+        )
 
         # Check if any results have bypass_max_results flag
         has_bypass = any(
@@ -431,8 +525,11 @@ class Launcher(Window):
             for r in all_results
         )
 
+        if not query:
+            # Limit to max_results for empty query
+            self.results = all_results[: self.max_results]
         # Don't limit results for triggered plugin queries, only for global searches and trigger suggestions
-        if self.triggered_plugin and self.active_trigger:
+        elif self.triggered_plugin and self.active_trigger:
             # In trigger mode - show all results from the triggered plugin
             self.results = all_results
         elif not has_bypass:
@@ -457,8 +554,6 @@ class Launcher(Window):
         # Update UI
         self._update_results_display()
 
-        return False  # Don't repeat timeout
-
     def _extract_query_after_trigger(self, query: str, trigger: str) -> str:
         """
         Extract the search query after removing the trigger.
@@ -514,13 +609,7 @@ class Launcher(Window):
         if not query.strip():
             return None, ""
 
-        # Check all plugins for triggers
-        for plugin in self.plugin_manager.get_active_plugins():
-            trigger = plugin.get_active_trigger(query)
-            if trigger:
-                return plugin, trigger
-
-        return None, ""
+        return self.plugin_manager.resolve_trigger(query)
 
     def _get_applications_plugin(self):
         """Get the applications plugin instance."""
@@ -545,34 +634,15 @@ class Launcher(Window):
         suggestions = []
         query_lower = query.lower().strip()
 
-        # Get all available triggers from plugins
-        all_triggers = {}
-        for plugin in self.plugin_manager.get_active_plugins():
-            triggers = plugin.get_triggers()
-            for trigger in triggers:
-                trigger_clean = trigger.strip()
-                if trigger_clean not in all_triggers:
-                    all_triggers[trigger_clean] = {
-                        "plugin": plugin,
-                        "trigger": trigger,
-                        "examples": [],
-                    }
-
         # Get max examples to show from configuration
         max_examples = self.trigger_config.settings.get("max_examples_shown", 2)
 
-        # Show trigger suggestions based on query
-        if query_lower:
-            # Show triggers that match the query
-            for trigger_clean, _ in all_triggers.items():
-                if trigger_clean.lower().startswith(query_lower):
-                    result = self._create_trigger_result(trigger_clean, max_examples)
-                    suggestions.append(result)
-        else:
-            # Empty query - show all available triggers
-            for trigger_clean, _ in all_triggers.items():
-                result = self._create_trigger_result(trigger_clean, max_examples)
-                suggestions.append(result)
+        # Triggers starting with the query, or all of them for an empty query
+        for trigger_clean, _, _ in self.plugin_manager.trigger_router.suggest(
+            query_lower
+        ):
+            result = self._create_trigger_result(trigger_clean, max_examples)
+            suggestions.append(result)
 
         return suggestions  # Return all trigger suggestions without limit
 
@@ -650,13 +720,9 @@ class Launcher(Window):
             query_part = parts[1] if len(parts) > 1 else ""
 
             # Find the plugin that handles this trigger
-            triggered_plugin = None
-
-            for plugin in self.plugin_manager.get_active_plugins():
-                trigger = plugin.get_active_trigger(f"{trigger_part} ")
-                if trigger:
-                    triggered_plugin = plugin
-                    break
+            triggered_plugin, _ = self.plugin_manager.resolve_trigger(
+                f"{trigger_part} "
+            )
 
             if not triggered_plugin:
                 print(f"No plugin found for trigger: {trigger_part}")
@@ -718,9 +784,99 @@ class Launcher(Window):
         # Update input field with trigger indication (Spotlight-style)
         self._update_input_action_text()
 
+        # Start new results from the top
+        self._rendered_window = None
+        self.results_scroll.get_vadjustment().set_value(0)
+
+        render_start = time.perf_counter()
+        if any(result.custom_widget for result in self.results):
+            self._virtualised = False
+            self._render_all_results()
+        else:
+            self._virtualised = True
+            for child in self.custom_box.get_children():
+                self.custom_box.remove(child)
+            self._render_visible_rows()
+        self.metrics.record_render((time.perf_counter() - render_start) * 1000)
+
+        self.results_scroll.show()
+
+        if self._keystroke_started is not None:
+            # Redraws run at a higher priority than idle callbacks, so this
+            # fires once the new results have been laid out and painted
+            GLib.idle_add(self._record_keystroke_latency, self._keystroke_started)
+            self._keystroke_started = None
+
+    def _record_keystroke_latency(self, started: float) -> bool:
+        self.metrics.record_keystroke((time.perf_counter() - started) * 1000)
+        return False  # Don't repeat
+
+    def _show_stats(self):
+        """Show per plugin query latency, slowest first."""
+        stats = self.plugin_manager.get_stats()
+        keystroke = stats["keystroke_to_paint_ms"]
+        render = stats["render_ms"]
+
+        results = [
+            Result(
+                title="Keystroke to paint",
+                subtitle=(
+                    f"p50 {keystroke['p50']:.1f}ms • p95 {keystroke['p95']:.1f}ms"
+                    f" • p99 {keystroke['p99']:.1f}ms • render p95"
+                    f" {render['p95']:.1f}ms • {keystroke['count']} samples"
+                ),
+                icon_name="speedometer",
+                action=self._dump_stats,
+                relevance=1.0,
+                data={"keep_launcher_open": True, "bypass_max_results": True},
+            )
+        ]
+
+        plugins = sorted(
+            stats["plugins"].items(),
+            key=lambda item: item[1]["duration_ms"]["p95"],
+            reverse=True,
+        )
+        for name, plugin_stats in plugins:
+            duration = plugin_stats["duration_ms"]
+            render = plugin_stats["render_ms"]
+            results.append(
+                Result(
+                    title=name,
+                    subtitle=(
+                        f"p50 {duration['p50']:.1f}ms • p95 {duration['p95']:.1f}ms"
+                        f" • p99 {duration['p99']:.1f}ms • {plugin_stats['queries']}"
+                        f" queries • ~{plugin_stats['avg_results']} results"
+                        f" • render p95 {render['p95']:.1f}ms"
+                        f" • {plugin_stats['errors']} errors"
+                    ),
+                    icon_name="utilities-system-monitor",
+                    action=self._dump_stats,
+                    relevance=0.5,
+                    data={"keep_launcher_open": True, "bypass_max_results": True},
+                )
+            )
+
+        self.results = results
+        self.selected_index = 0
+        self._update_results_display()
+
+    def _dump_stats(self):
+        """Write the latency statistics to a JSON file in the cache dir."""
+        path = self.plugin_manager.dump_stats()
+        if path:
+            print(f"Launcher stats written to {path}")
+
+    def _render_all_results(self):
+        """Lay out every result, for result sets containing custom widgets."""
+        for row in self._row_pool:
+            row.hide()
+        self.top_spacer.set_size_request(-1, 0)
+        self.bottom_spacer.set_size_request(-1, 0)
+
         # Clear existing results
-        for child in self.results_box.get_children():
-            self.results_box.remove(child)
+        for child in self.custom_box.get_children():
+            self.custom_box.remove(child)
 
         # Add new results
         for i, result in enumerate(self.results):
@@ -732,23 +888,124 @@ class Launcher(Window):
                     parent.remove(result.custom_widget)
 
                 result.custom_widget.show_all()  # Ensure widget is visible
-                self.results_box.add(result.custom_widget)
+                self.custom_box.add(result.custom_widget)
             else:
                 # Create normal result item
+                row_start = time.perf_counter()
                 result_item = ResultItem(
                     result=result, selected=(i == self.selected_index), index=i
                 )
-                result_item.clicked.connect(
-                    lambda _, idx=i: self._on_result_clicked(result_item, idx)
-                )
-                result_item.hovered.connect(
-                    lambda _, idx=i: self._on_result_hovered(idx)
-                )
-                self.results_box.add(result_item)
+                self._record_row_render(result, row_start)
+                result_item.clicked.connect(self._on_result_clicked)
+                result_item.hovered.connect(lambda _, idx: self._on_result_hovered(idx))
+                self.custom_box.add(result_item)
 
-        self.results_box.show_all()
+        self.custom_box.show_all()
 
-        self.results_scroll.show()
+    def _render_visible_rows(self):
+        """Bind pooled rows to the results inside the viewport (plus overscan)."""
+        total = len(self.results)
+        row_height = max(1, self._row_height)
+
+        vadjustment = self.results_scroll.get_vadjustment()
+        top = vadjustment.get_value()
+        page_size = vadjustment.get_page_size() or LAUNCHER_HEIGHT
+
+        first = max(0, int(top // row_height) - RESULT_OVERSCAN_ROWS)
+        last = min(
+            total, int((top + page_size) // row_height) + 1 + RESULT_OVERSCAN_ROWS
+        )
+        first = min(first, last)
+
+        if (first, last) == self._rendered_window:
+            return
+        self._rendered_window = (first, last)
+
+        count = last - first
+        while len(self._row_pool) < count:
+            self._row_pool.append(self._create_pooled_row())
+
+        for offset, row in enumerate(self._row_pool):
+            index = first + offset
+            if offset < count:
+                result = self.results[index]
+                if row.result is not result or row.index != index:
+                    row_start = time.perf_counter()
+                    row.bind(result, index, index == self.selected_index)
+                    self._record_row_render(result, row_start)
+                else:
+                    row.set_selected(index == self.selected_index)
+                row.show()
+            else:
+                row.hide()
+
+        self.top_spacer.set_size_request(-1, first * row_height)
+        self.bottom_spacer.set_size_request(-1, (total - last) * row_height)
+
+    def _record_row_render(self, result: Result, started: float):
+        """Record the time spent on one result row against its plugin."""
+        if result.source_plugin:
+            self.metrics.record_row_render(
+                result.source_plugin, (time.perf_counter() - started) * 1000
+            )
+
+    def _create_pooled_row(self) -> ResultItem:
+        """Create a reusable result row; its signals are connected only once."""
+        row = ResultItem()
+        row.clicked.connect(self._on_result_clicked)
+        row.hovered.connect(lambda _, idx: self._on_result_hovered(idx))
+        row.connect("size-allocate", self._on_row_allocated)
+        row.show_all()
+        # Pool rows are shown and hidden by the virtualiser only
+        row.set_no_show_all(True)
+        self.rows_box.add(row)
+        return row
+
+    def _on_row_allocated(self, row, allocation):
+        """Measure the real row height so spacers match the rows they replace."""
+        if not row.get_visible() or allocation.height <= 1:
+            return
+        if not self._row_height_measured or allocation.height > self._row_height:
+            changed = allocation.height != self._row_height
+            self._row_height = allocation.height
+            self._row_height_measured = True
+            if changed and self._virtualised:
+                self._rendered_window = None
+                GLib.idle_add(self._render_visible_rows)
+
+    def _on_results_scrolled(self, _adjustment):
+        """Rebind rows when the viewport moves or changes size."""
+        if self._virtualised and not getattr(self, "_initializing", True):
+            self._render_visible_rows()
+
+    def _iter_result_widgets(self):
+        """Yield (index, widget) for every result that currently has a widget."""
+        if self._virtualised:
+            for row in self._row_pool:
+                if row.get_visible() and row.result is not None:
+                    yield row.index, row
+        else:
+            yield from enumerate(self.custom_box.get_children())
+
+    def _get_result_widget(self, index: int):
+        """Get the widget showing the result at index, if it is materialised."""
+        for widget_index, widget in self._iter_result_widgets():
+            if widget_index == index:
+                return widget
+        return None
+
+    def _get_item_geometry(self, index: int) -> Optional[Tuple[float, float]]:
+        """Get the (y, height) of a result inside the results box."""
+        widget = self._get_result_widget(index)
+        if widget is not None:
+            allocation = widget.get_allocation()
+            if allocation.height > 1:
+                return allocation.y, allocation.height
+
+        if self._virtualised:
+            # Not materialised - estimate from the uniform row height
+            return index * self._row_height, self._row_height
+        return None
 
     def _update_input_action_text(self):
         """Update the input field with action text (Spotlight-style)."""
@@ -787,10 +1044,15 @@ class Launcher(Window):
 
     def _clear_results(self):
         """Clear all results."""
+        # Drop any query still running so it can't repaint over the cleared list
+        self.query_engine.cancel()
         self.results = []
         self.selected_index = 0
-        for child in self.results_box.get_children():
-            self.results_box.remove(child)
+        self._virtualised = True
+        self._rendered_window = None
+        for child in self.custom_box.get_children():
+            self.custom_box.remove(child)
+        self._render_visible_rows()
         # Keep the results scroll visible even when empty
 
     def _handle_escape_key(self) -> bool:
@@ -1135,40 +1397,21 @@ class Launcher(Window):
 
     def _update_selection(self):
         """Update the visual selection of results with scrolling (for keyboard navigation)."""
-        children = self.results_box.get_children()
-        selected_widget = None
-
-        for i, child in enumerate(children):
-            if isinstance(child, ResultItem):
-                is_selected = i == self.selected_index
-                child.set_selected(is_selected)
-                if is_selected:
-                    selected_widget = child
-            # For custom widgets, we don't need to handle selection visually
-            # since they manage their own interaction
+        self._update_selection_visual_only()
 
-        # Focus custom widgets when selected for keyboard interaction
-        if self.results and 0 <= self.selected_index < len(self.results):
-            result = self.results[self.selected_index]
-            if result.custom_widget and result.custom_widget.get_can_focus():
-                # Give focus to the custom widget for keyboard interaction
-                result.custom_widget.grab_focus()
-
-        # Scroll to make the selected item visible
-        if selected_widget and self.results_scroll.get_visible():
+        # Scroll to make the selected item visible, even if its row is not
+        # materialised yet - scrolling will bind it
+        if self.results and self.results_scroll.get_visible():
             # Use immediate scrolling for better responsiveness
-            self._scroll_to_widget(selected_widget)
+            self._scroll_to_index(self.selected_index)
             # Also schedule a more accurate scroll after layout is complete
             GLib.idle_add(self._ensure_selected_visible)
 
     def _update_selection_visual_only(self):
         """Update the visual selection of results without scrolling (for mouse hover)."""
-        children = self.results_box.get_children()
-
-        for i, child in enumerate(children):
-            if isinstance(child, ResultItem):
-                is_selected = i == self.selected_index
-                child.set_selected(is_selected)
+        for index, widget in self._iter_result_widgets():
+            if isinstance(widget, ResultItem):
+                widget.set_selected(index == self.selected_index)
             # For custom widgets, we don't need to handle selection visually
             # since they manage their own interaction
 
@@ -1179,62 +1422,41 @@ class Launcher(Window):
                 # Give focus to the custom widget for keyboard interaction
                 result.custom_widget.grab_focus()
 
-    def _scroll_to_widget(self, widget):
-        """Scroll the results container to make the widget visible."""
-        if not widget or not self.results_scroll.get_visible():
+    def _scroll_to_index(self, index: int):
+        """Scroll the results container to make the result at index visible."""
+        if not self.results_scroll.get_visible():
             return
 
-        # Debug output (can be removed in production)
-        # print(f"Scrolling to selected index: {self.selected_index}")
-
         # Get the scrolled window's vertical adjustment
         vadjustment = self.results_scroll.get_vadjustment()
-        if not vadjustment:
+        if not vadjustment or not 0 <= index < len(self.results):
             return
 
-        # Use a simpler approach: scroll to the selected item index
-        if self.results and 0 <= self.selected_index < len(self.results):
-            # Get all children to work with actual widgets
-            children = self.results_box.get_children()
-            if not children or self.selected_index >= len(children):
-                return
-
-            # Get the selected child widget
-            selected_child = children[self.selected_index]
-
-            # Try to get actual allocation, fallback to estimation
-            try:
-                allocation = selected_child.get_allocation()
-                item_height = allocation.height if allocation.height > 0 else 68
-                item_y = allocation.y
-            except:
-                # Fallback to estimation
-                item_height = DEFAULT_ITEM_HEIGHT
-                item_y = self.selected_index * item_height
-
-            # Get current scroll info
-            current_scroll = vadjustment.get_value()
-            page_size = vadjustment.get_page_size()
-            max_scroll = vadjustment.get_upper() - page_size
-
-            # Calculate visible area
-            visible_top = current_scroll
-            visible_bottom = current_scroll + page_size
-
-            # Check if selected item is visible
-            item_top = item_y
-            item_bottom = item_y + item_height
-
-            # Add some padding for better visibility
-            # Scroll if needed
-            if item_top < visible_top + SCROLL_PADDING:
-                # Item is above visible area - scroll up
-                new_scroll = max(0, item_top - SCROLL_PADDING)
-                vadjustment.set_value(new_scroll)
-            elif item_bottom > visible_bottom - SCROLL_PADDING:
-                # Item is below visible area - scroll down
-                new_scroll = min(max_scroll, item_bottom - page_size + SCROLL_PADDING)
-                vadjustment.set_value(new_scroll)
+        geometry = self._get_item_geometry(index)
+        if not geometry:
+            return
+        item_top, item_height = geometry
+        item_bottom = item_top + item_height
+
+        # Get current scroll info
+        current_scroll = vadjustment.get_value()
+        page_size = vadjustment.get_page_size()
+        max_scroll = vadjustment.get_upper() - page_size
+
+        # Calculate visible area
+        visible_top = current_scroll
+        visible_bottom = current_scroll + page_size
+
+        # Add some padding for better visibility
+        # Scroll if needed
+        if item_top < visible_top + SCROLL_PADDING:
+            # Item is above visible area - scroll up
+            new_scroll = max(0, item_top - SCROLL_PADDING)
+            vadjustment.set_value(new_scroll)
+        elif item_bottom > visible_bottom - SCROLL_PADDING:
+            # Item is below visible area - scroll down
+            new_scroll = min(max_scroll, item_bottom - page_size + SCROLL_PADDING)
+            vadjustment.set_value(new_scroll)
 
     def _ensure_selected_visible(self):
         """Alternative method to ensure selected item is visible using GTK methods."""
@@ -1245,27 +1467,21 @@ class Launcher(Window):
         ):
             return False
 
-        children = self.results_box.get_children()
-        if self.selected_index < len(children):
-            selected_child = children[self.selected_index]
-
-            # Try to use widget's allocation for more accurate scrolling
-            try:
-                allocation = selected_child.get_allocation()
-                if allocation.height > 0:
-                    vadjustment = self.results_scroll.get_vadjustment()
-                    if vadjustment:
-                        # Calculate the position to center the selected item
-                        page_size = vadjustment.get_page_size()
-                        target_pos = (
-                            allocation.y - (page_size / 2) + (allocation.height / 2)
-                        )
-                        target_pos = max(
-                            0, min(target_pos, vadjustment.get_upper() - page_size)
-                        )
-                        vadjustment.set_value(target_pos)
-            except Exception as e:
-                print(f"Error in _ensure_selected_visible: {e}")
+        # Try to use widget's allocation for more accurate scrolling
+        try:
+            geometry = self._get_item_geometry(self.selected_index)
+            vadjustment = self.results_scroll.get_vadjustment()
+            if geometry and vadjustment:
+                item_y, item_height = geometry
+                # Calculate the position to center the selected item
+                page_size = vadjustment.get_page_size()
+                target_pos = item_y - (page_size / 2) + (item_height / 2)
+                target_pos = max(
+                    0, min(target_pos, vadjustment.get_upper() - page_size)
+                )
+                vadjustment.set_value(target_pos)
+        except Exception as e:
+            print(f"Error in _ensure_selected_visible: {e}")
 
         return False  # Don't repeat the idle callback
 
@@ -1371,6 +1587,7 @@ class Launcher(Window):
 
                 # Activate the result
                 result.activate()
+                self.frecency.record(result.frecency_key)
 
                 # Only hide launcher if it's not a trigger suggestion and doesn't have keep_launcher_open flag
                 if not is_trigger_suggestion and not keep_launcher_open:
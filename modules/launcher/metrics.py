@@ -0,0 +1,137 @@
+import json
+import math
+import os
+import threading
+import time
+from collections import deque
+from typing import Deque, Dict, Iterable, Optional
+
+import config.data as data
+
+STATS_FILE = os.path.join(data.CACHE_DIR, "launcher_stats.json")
+# Samples kept per ring buffer; older ones are overwritten
+METRICS_WINDOW = 512
+
+
+def percentile(samples: Iterable[float], fraction: float) -> float:
+    """Nearest-rank percentile of some samples, 0 if there are none."""
+    ordered = sorted(samples)
+    if not ordered:
+        return 0.0
+    rank = max(0, min(len(ordered) - 1, math.ceil(fraction * len(ordered)) - 1))
+    return ordered[rank]
+
+
+def summarise(samples: Iterable[float]) -> Dict[str, float]:
+    """Count and p50/p95/p99/max of some samples."""
+    samples = list(samples)
+    return {
+        "count": len(samples),
+        "p50": round(percentile(samples, 0.50), 3),
+        "p95": round(percentile(samples, 0.95), 3),
+        "p99": round(percentile(samples, 0.99), 3),
+        "max": round(max(samples, default=0.0), 3),
+    }
+
+
+class PluginStats:
+    """Query counters and recent timings of one plugin."""
+
+    def __init__(self, window: int = METRICS_WINDOW):
+        self.queries = 0
+        self.errors = 0
+        self.last_error = ""
+        self.durations_ms: Deque[float] = deque(maxlen=window)
+        self.result_counts: Deque[int] = deque(maxlen=window)
+        self.render_ms: Deque[float] = deque(maxlen=window)
+
+    def to_dict(self) -> dict:
+        counts = list(self.result_counts)
+        return {
+            "queries": self.queries,
+            "errors": self.errors,
+            "last_error": self.last_error,
+            "duration_ms": summarise(self.durations_ms),
+            "render_ms": summarise(self.render_ms),
+            "avg_results": round(sum(counts) / len(counts), 1) if counts else 0,
+        }
+
+
+class LauncherMetrics:
+    """
+    Latency instrumentation for the launcher.
+
+    Keeps per plugin query timings, result counts, errors and the time spent
+    binding their result rows, the total render time of each result set, and
+    end-to-end keystroke-to-paint latency, each in
+    fixed-size ring buffers so memory stays bounded in long sessions.
+    Query timings are recorded from the query worker threads.
+    """
+
+    def __init__(self, window: int = METRICS_WINDOW):
+        self.window = window
+        self.plugins: Dict[str, PluginStats] = {}
+        self.render_ms: Deque[float] = deque(maxlen=window)
+        self.keystroke_ms: Deque[float] = deque(maxlen=window)
+        self.started_at = time.time()
+        self._lock = threading.Lock()
+
+    def _get_plugin(self, plugin_name: str) -> PluginStats:
+        stats = self.plugins.get(plugin_name)
+        if stats is None:
+            with self._lock:
+                stats = self.plugins.setdefault(plugin_name, PluginStats(self.window))
+        return stats
+
+    def record_query(
+        self,
+        plugin_name: str,
+        duration_ms: float,
+        result_count: int,
+        error: Optional[Exception] = None,
+    ):
+        """Record one plugin query."""
+        stats = self._get_plugin(plugin_name)
+        with self._lock:
+            stats.queries += 1
+            stats.durations_ms.append(duration_ms)
+            stats.result_counts.append(result_count)
+            if error is not None:
+                stats.errors += 1
+                stats.last_error = str(error)
+
+    def record_render(self, duration_ms: float):
+        """Record the time spent building or binding a set of result rows."""
+        self.render_ms.append(duration_ms)
+
+    def record_row_render(self, plugin_name: str, duration_ms: float):
+        """Record the time spent building or binding one row of a plugin."""
+        stats = self._get_plugin(plugin_name)
+        with self._lock:
+            stats.render_ms.append(duration_ms)
+
+    def record_keystroke(self, duration_ms: float):
+        """Record the latency from a keystroke to its results being painted."""
+        self.keystroke_ms.append(duration_ms)
+
+    def snapshot(self, load_report: Optional[dict] = None) -> dict:
+        """Get all metrics as a JSON-serialisable dict."""
+        with self._lock:
+            plugins = {name: stats.to_dict() for name, stats in self.plugins.items()}
+        return {
+            "generated_at": time.time(),
+            "uptime_s": round(time.time() - self.started_at, 1),
+            "keystroke_to_paint_ms": summarise(self.keystroke_ms),
+            "render_ms": summarise(self.render_ms),
+            "plugins": plugins,
+            "plugin_load_ms": load_report or {},
+        }
+
+    def dump(self, path: str = STATS_FILE, load_report: Optional[dict] = None) -> str:
+        """Write a snapshot to a JSON file and return its path."""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(self.snapshot(load_report), f, indent=2)
+        os.replace(tmp_path, path)
+        return path
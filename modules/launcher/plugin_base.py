@@ -1,5 +1,5 @@
 from abc import ABC, abstractmethod
-from typing import List
+from typing import Any, List, Optional, Tuple
 
 from modules.launcher.result import Result
 
@@ -10,6 +10,10 @@ class PluginBase(ABC):
     All plugins must inherit from this class.
     """
 
+    # Capability: the plugin implements query_narrowed() and can rescore just
+    # the candidates that matched a shorter query instead of rescanning
+    supports_narrowing = False
+
     def __init__(self):
         self.name = self.__class__.__name__.lower()
         self.display_name = self.__class__.__name__
@@ -17,6 +21,9 @@ class PluginBase(ABC):
         self.version = "1.0.0"
         self.enabled = True
         self._triggers = []  # List of trigger keywords
+        self._sorted_triggers = []  # (trigger, lowercased, lowercased word)
+        # PluginHost of the launcher, set by the plugin manager on activation
+        self.host = None
 
     @abstractmethod
     def initialize(self):
@@ -47,6 +54,27 @@ class PluginBase(ABC):
         """
         pass
 
+    def query_narrowed(
+        self, query_string: str, candidates: Optional[Any] = None
+    ) -> Tuple[List[Result], Optional[Any]]:
+        """
+        Process a search query, optionally restricted to a previous candidate set.
+
+        The launcher calls this instead of query() for plugins that set
+        supports_narrowing. When the new query extends the previous one
+        (e.g. "fir" -> "fire"), candidates is what the previous call returned,
+        and only those need rescoring; otherwise it is None and the plugin
+        must scan everything.
+
+        Args:
+            query_string: The search query from the user
+            candidates: Opaque candidate set returned for the previous query
+
+        Returns:
+            Tuple of (results, candidates matching this query or None)
+        """
+        return self.query(query_string), None
+
     def get_triggers(self) -> List[str]:
         """
         Get list of trigger keywords for this plugin.
@@ -65,6 +93,11 @@ class PluginBase(ABC):
             triggers: List of trigger keywords
         """
         self._triggers = triggers
+        # Longest first so more specific triggers win, lowercased once
+        self._sorted_triggers = [
+            (trigger, trigger.lower(), trigger.strip().lower())
+            for trigger in sorted(triggers, key=len, reverse=True)
+        ]
 
     def handles_query(self, query_string: str) -> bool:
         """
@@ -101,22 +134,15 @@ class PluginBase(ABC):
         if not self.enabled:
             return ""
 
-        triggers = self.get_triggers()
-        if triggers:
+        if self._sorted_triggers:
             query_lower = query_string.lower().strip()
 
-            # Sort triggers by length (longest first) to match more specific triggers first
-            sorted_triggers = sorted(triggers, key=len, reverse=True)
-
-            for trigger in sorted_triggers:
-                trigger_lower = trigger.lower()
-
+            for trigger, trigger_lower, trigger_word in self._sorted_triggers:
                 # Exact match with trigger (including space if present)
                 if query_lower.startswith(trigger_lower):
                     return trigger
 
                 # Match trigger word followed by space
-                trigger_word = trigger.strip().lower()
                 if (
                     query_lower.startswith(trigger_word + " ")
                     or query_lower == trigger_word
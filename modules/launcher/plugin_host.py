@@ -0,0 +1,111 @@
+import threading
+from typing import Callable, List
+
+from gi.repository import GLib
+
+
+class PluginHost:
+    """
+    What plugins may do to the launcher that hosts them.
+
+    Handed to every plugin by the plugin manager as ``plugin.host``, so
+    plugins don't have to go looking for the launcher themselves.
+
+    Refresh requests are coalesced: however many arrive, and from whichever
+    thread, the current query is re-run at most once per frame, on the main
+    loop, and only while the launcher is shown.
+    """
+
+    def __init__(self, launcher):
+        self._launcher = launcher
+        self._close_listeners: List[Callable[[], None]] = []
+        self._lock = threading.Lock()
+        self._refresh_pending = False
+        self._tick_id = None
+
+    def is_visible(self) -> bool:
+        return bool(self._launcher.visible)
+
+    def get_query(self) -> str:
+        """Get the text currently in the search entry."""
+        return self._launcher.search_entry.get_text()
+
+    def request_refresh(self):
+        """
+        Re-run the current query on the next frame, e.g. after a plugin's data
+        changed. Safe to call from any thread.
+        """
+        with self._lock:
+            if self._refresh_pending:
+                return
+            self._refresh_pending = True
+        GLib.idle_add(self._schedule_refresh)
+
+    def _schedule_refresh(self) -> bool:
+        if not self.is_visible():
+            # Nothing on screen to refresh; the next open queries anyway
+            self._cancel_refresh()
+        elif self._tick_id is None:
+            self._tick_id = self._launcher.add_tick_callback(self._on_frame)
+        return False
+
+    def _on_frame(self, widget, frame_clock) -> bool:
+        self._tick_id = None
+        with self._lock:
+            self._refresh_pending = False
+        launcher = self._launcher
+        if launcher.visible:
+            launcher._perform_search(launcher.query)
+        return GLib.SOURCE_REMOVE
+
+    def _cancel_refresh(self):
+        if self._tick_id is not None:
+            self._launcher.remove_tick_callback(self._tick_id)
+            self._tick_id = None
+        with self._lock:
+            self._refresh_pending = False
+
+    def set_query(self, text: str):
+        """
+        Replace the search text, e.g. to go back to a plugin's trigger, and
+        show its results. Safe to call from any thread.
+        """
+
+        def apply():
+            if not self.is_visible():
+                return False
+            search_entry = self._launcher.search_entry
+            search_entry.set_text(text)
+            search_entry.set_position(-1)
+            self.request_refresh()
+            return False
+
+        GLib.idle_add(apply)
+
+    def close(self):
+        """Hide the launcher. Safe to call from any thread."""
+
+        def apply():
+            if self.is_visible():
+                self._launcher.close_launcher()
+            return False
+
+        GLib.idle_add(apply)
+
+    def add_close_listener(self, callback: Callable[[], None]):
+        """Call back, on the main loop, whenever the launcher is closed."""
+        if callback not in self._close_listeners:
+            self._close_listeners.append(callback)
+
+    def remove_close_listener(self, callback: Callable[[], None]):
+        if callback in self._close_listeners:
+            self._close_listeners.remove(callback)
+
+    def notify_closed(self):
+        """Called by the launcher after it has been hidden."""
+        self._cancel_refresh()
+        for callback in list(self._close_listeners):
+            try:
+                callback()
+            except Exception as e:
+                print(f"Error in launcher close listener: {e}")
@@ -1,22 +1,147 @@
+import ast
 import importlib
 import importlib.util
 import os
-from typing import Dict, List, Type
+import time
+from typing import Dict, List, Optional, Set, Tuple, Type
 
+from gi.repository import GLib
+
+import config.data as data
+from modules.launcher.metrics import STATS_FILE, LauncherMetrics
 from modules.launcher.plugin_base import PluginBase
+from modules.launcher.plugin_host import PluginHost
+from modules.launcher.trigger_router import TriggerRouter
+
+# Plugins activated by default, in priority order
+DEFAULT_PLUGINS = [
+    "applications",
+    "calculator",
+    "system",
+    "clipboard",
+    "power",
+    "caffeine",
+    "screencapture",
+    "emoji",
+    "wallpaper",
+    "websearch",
+    "reminders",
+    "otp",
+    "password",
+    "bookmarks",
+    "bash_scripts",
+    "tmux",
+]
+
+# Delay before deferred plugins are warmed up, so startup itself stays quick
+WARMUP_DELAY_MS = 3000
+
+
+class PluginSpec:
+    """
+    Metadata of a plugin that is registered but not imported yet.
+
+    Stands in for the plugin in the trigger router until the first time one
+    of its triggers is used.
+    """
+
+    def __init__(self, name: str, path: str, triggers: List[str]):
+        self.name = name
+        self.path = path
+        self.triggers = triggers
+        self.enabled = True
+
+    def get_triggers(self) -> List[str]:
+        return self.triggers
+
+
+def read_plugin_triggers(path: str) -> Optional[List[str]]:
+    """
+    Read a plugin's triggers from its source without importing it.
+
+    Looks for ``set_triggers()`` called with a literal list, or with a name
+    bound to one.
+
+    Returns:
+        The triggers, or None if they cannot be determined statically
+    """
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            tree = ast.parse(f.read(), filename=path)
+    except (OSError, SyntaxError) as e:
+        print(f"Failed to read plugin metadata from {path}: {e}")
+        return None
+
+    literals = {}
+    calls = []
+    for node in ast.walk(tree):
+        if (
+            isinstance(node, ast.Assign)
+            and len(node.targets) == 1
+            and isinstance(node.targets[0], ast.Name)
+        ):
+            try:
+                literals[node.targets[0].id] = ast.literal_eval(node.value)
+            except (ValueError, TypeError, SyntaxError):
+                pass
+        elif (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr == "set_triggers"
+            and node.args
+        ):
+            calls.append(node.args[0])
+
+    triggers = []
+    for arg in calls:
+        if isinstance(arg, ast.Name):
+            value = literals.get(arg.id)
+        else:
+            try:
+                value = ast.literal_eval(arg)
+            except (ValueError, TypeError, SyntaxError):
+                value = None
+        if not isinstance(value, (list, tuple)) or not all(
+            isinstance(trigger, str) for trigger in value
+        ):
+            return None
+        triggers.extend(t for t in value if t not in triggers)
+
+    return triggers
 
 
 class PluginManager:
     """
     Manages launcher plugins.
+
+    Plugins whose triggers can be read from their source are only registered
+    at startup; they are imported and initialised the first time one of their
+    triggers is used, or when idle after startup. Plugins without static
+    triggers (e.g. applications, which serves the global search) load eagerly.
     """
 
-    def __init__(self):
+    def __init__(self, host: Optional[PluginHost] = None):
+        # Handed to every plugin before it is initialised
+        self.host = host
         self.plugins: Dict[str, PluginBase] = {}
         self.plugin_classes: Dict[str, Type[PluginBase]] = {}
+        self.plugin_specs: Dict[str, PluginSpec] = {}
         self.active_plugins: List[str] = []
-
-        # Load built-in plugins
+        # Registered but not yet activated default plugins
+        self.deferred_plugins: List[str] = []
+        # Plugins whose initialize() raised, no longer routed to
+        self.failed_plugins: Set[str] = set()
+        # Per plugin import/initialize cost in milliseconds
+        self.load_report: Dict[str, Dict[str, float]] = {}
+        # Per plugin query latency, filled in by the launcher
+        self.metrics = LauncherMetrics()
+        # Triggers of the active plugins, rebuilt when they change
+        self.trigger_router = TriggerRouter()
+        self._warmup_source_id = None
+
+        startup_start = time.perf_counter()
+
+        # Register built-in plugins
         self._load_builtin_plugins()
 
         # Load external plugins
@@ -25,9 +150,19 @@ class PluginManager:
         # Activate default plugins
         self._activate_default_plugins()
 
+        self._print_startup_report((time.perf_counter() - startup_start) * 1000)
+
+        if data.LAUNCHER_PLUGIN_WARMUP and self.deferred_plugins:
+            self._warmup_source_id = GLib.timeout_add(
+                WARMUP_DELAY_MS, self._start_warmup
+            )
+
+    def _get_plugins_dir(self) -> str:
+        return os.path.join(os.path.dirname(__file__), "plugins")
+
     def _load_builtin_plugins(self):
-        """Load built-in plugins from the plugins directory."""
-        plugins_dir = os.path.join(os.path.dirname(__file__), "plugins")
+        """Register built-in plugins from the plugins directory by metadata."""
+        plugins_dir = self._get_plugins_dir()
 
         if not os.path.exists(plugins_dir):
             return
@@ -35,7 +170,15 @@ class PluginManager:
         for filename in os.listdir(plugins_dir):
             if filename.endswith(".py") and not filename.startswith("_"):
                 plugin_name = filename[:-3]  # Remove .py extension
-                self._load_plugin_from_file(plugins_dir, plugin_name)
+                path = os.path.join(plugins_dir, filename)
+                triggers = read_plugin_triggers(path)
+                if triggers:
+                    self.plugin_specs[plugin_name] = PluginSpec(
+                        plugin_name, path, triggers
+                    )
+                else:
+                    # No static triggers to route by, so it has to be loaded now
+                    self._load_plugin_from_file(plugins_dir, plugin_name)
 
     def _load_external_plugins(self):
         """Load external plugins from user directory."""
@@ -44,6 +187,7 @@ class PluginManager:
 
     def _load_plugin_from_file(self, plugins_dir: str, plugin_name: str):
         """Load a plugin from a Python file."""
+        start = time.perf_counter()
         try:
             plugin_path = os.path.join(plugins_dir, f"{plugin_name}.py")
             spec = importlib.util.spec_from_file_location(
@@ -73,30 +217,22 @@ class PluginManager:
 
         except Exception as e:
             print(f"Failed to load plugin {plugin_name}: {e}")
+        finally:
+            self._record_cost(plugin_name, "import_ms", start)
+
+    def _record_cost(self, plugin_name: str, phase: str, start: float):
+        elapsed = (time.perf_counter() - start) * 1000
+        self.load_report.setdefault(plugin_name, {})[phase] = round(elapsed, 2)
 
     def _activate_default_plugins(self):
-        """Activate default plugins."""
-        default_plugins = [
-            "applications",
-            "calculator",
-            "system",
-            "clipboard",
-            "power",
-            "caffeine",
-            "screencapture",
-            "emoji",
-            "wallpaper",
-            "websearch",
-            "reminders",
-            "otp",
-            "password",
-            "bookmarks",
-            "bash_scripts",
-            "tmux",
-        ]
+        """Activate default plugins, deferring those that can be loaded later."""
+        for plugin_name in DEFAULT_PLUGINS:
+            if plugin_name in self.plugin_specs:
+                self.deferred_plugins.append(plugin_name)
+            else:
+                self.activate_plugin(plugin_name)
 
-        for plugin_name in default_plugins:
-            self.activate_plugin(plugin_name)
+        self._rebuild_trigger_router()
 
     def activate_plugin(self, plugin_name: str) -> bool:
         """Activate a plugin by name."""
@@ -105,28 +241,55 @@ class PluginManager:
             return True
 
         if plugin_name not in self.plugin_classes:
-            return False
+            spec = self.plugin_specs.get(plugin_name)
+            if spec:
+                self._load_plugin_from_file(os.path.dirname(spec.path), plugin_name)
+            if plugin_name not in self.plugin_classes:
+                return False
 
+        if plugin_name in self.deferred_plugins:
+            self.deferred_plugins.remove(plugin_name)
+
+        start = time.perf_counter()
+        plugin_instance = None
         try:
             # Instantiate plugin
             plugin_class = self.plugin_classes[plugin_name]
             plugin_instance = plugin_class()
+            plugin_instance.host = self.host
 
             # Initialize plugin
             plugin_instance.initialize()
+            self._record_cost(plugin_name, "init_ms", start)
 
             # Store plugin
             self.plugins[plugin_name] = plugin_instance
             self.active_plugins.append(plugin_name)
+            self.failed_plugins.discard(plugin_name)
+            self._rebuild_trigger_router()
 
             return True
 
         except Exception as e:
             print(f"Failed to activate plugin {plugin_name}: {e}")
+            if plugin_instance is not None:
+                # Stop monitors or threads started before the failure
+                try:
+                    plugin_instance.cleanup()
+                except Exception as cleanup_error:
+                    print(f"Failed to clean up plugin {plugin_name}: {cleanup_error}")
+            self.failed_plugins.add(plugin_name)
+            self._rebuild_trigger_router()
             return False
 
     def deactivate_plugin(self, plugin_name: str) -> bool:
         """Deactivate a plugin by name."""
+        if plugin_name in self.deferred_plugins:
+            # Never loaded, just stop routing to it
+            self.deferred_plugins.remove(plugin_name)
+            self._rebuild_trigger_router()
+            return True
+
         if plugin_name not in self.plugins:
             return False
 
@@ -139,6 +302,7 @@ class PluginManager:
             del self.plugins[plugin_name]
             if plugin_name in self.active_plugins:
                 self.active_plugins.remove(plugin_name)
+            self._rebuild_trigger_router()
 
             return True
 
@@ -146,6 +310,79 @@ class PluginManager:
             print(f"Failed to deactivate plugin {plugin_name}: {e}")
             return False
 
+    def _rebuild_trigger_router(self):
+        """Recompile the trigger trie from active and deferred plugins."""
+        owners = self.get_active_plugins() + [
+            self.plugin_specs[name]
+            for name in self.deferred_plugins
+            if name not in self.failed_plugins
+        ]
+        self.trigger_router.build(owners)
+
+    def _ensure_active(self, owner) -> Optional[PluginBase]:
+        """Activate the plugin behind a router owner if it is still deferred."""
+        if isinstance(owner, PluginSpec):
+            if not self.activate_plugin(owner.name):
+                # Don't route to it again
+                if owner.name in self.deferred_plugins:
+                    self.deferred_plugins.remove(owner.name)
+                    self._rebuild_trigger_router()
+                return None
+            return self.plugins.get(owner.name)
+        return owner
+
+    def resolve_trigger(self, query: str) -> Tuple[Optional[PluginBase], str]:
+        """
+        Find the plugin owning the longest trigger the query starts with,
+        activating it first if it was deferred.
+        """
+        owner, trigger = self.trigger_router.resolve(query)
+        if owner is None:
+            return None, ""
+        plugin = self._ensure_active(owner)
+        return (plugin, trigger) if plugin else (None, "")
+
+    def _start_warmup(self) -> bool:
+        """Activate deferred plugins one per idle callback."""
+
+        def warm_next():
+            if not self.deferred_plugins:
+                self._warmup_source_id = None
+                return False
+            plugin_name = self.deferred_plugins.pop(0)
+            if not self.activate_plugin(plugin_name):
+                # Stop routing to a plugin that can't be loaded
+                self._rebuild_trigger_router()
+            return True
+
+        self._warmup_source_id = GLib.idle_add(warm_next, priority=GLib.PRIORITY_LOW)
+        return False  # Don't repeat
+
+    def _print_startup_report(self, total_ms: float):
+        """Print how long startup took and which plugins were deferred."""
+        costs = sorted(
+            ((sum(report.values()), name) for name, report in self.load_report.items()),
+            reverse=True,
+        )
+        details = ", ".join(f"{name} {cost:.1f}ms" for cost, name in costs)
+        print(
+            f"Launcher plugins ready in {total_ms:.1f}ms"
+            f" ({len(self.active_plugins)} loaded: {details or 'none'};"
+            f" {len(self.deferred_plugins)} deferred)"
+        )
+
+    def get_stats(self) -> dict:
+        """Get query latency metrics together with plugin load costs."""
+        return self.metrics.snapshot(self.load_report)
+
+    def dump_stats(self, path: str = STATS_FILE) -> Optional[str]:
+        """Write the metrics to a JSON file, returning its path on success."""
+        try:
+            return self.metrics.dump(path, self.load_report)
+        except Exception as e:
+            print(f"Failed to write launcher stats: {e}")
+            return None
+
     def get_active_plugins(self) -> List[PluginBase]:
         """Get list of active plugin instances."""
         return [
@@ -154,7 +391,7 @@ class PluginManager:
 
     def get_plugin_names(self) -> List[str]:
         """Get list of available plugin names."""
-        return list(self.plugin_classes.keys())
+        return list(dict.fromkeys([*self.plugin_classes, *self.plugin_specs]))
 
     def get_active_plugin_names(self) -> List[str]:
         """Get list of active plugin names."""
@@ -173,7 +410,7 @@ class PluginManager:
             del self.plugin_classes[plugin_name]
 
         # Reload from file
-        plugins_dir = os.path.join(os.path.dirname(__file__), "plugins")
+        plugins_dir = self._get_plugins_dir()
         self._load_plugin_from_file(plugins_dir, plugin_name)
 
         # Reactivate if it was active
@@ -1,26 +1,91 @@
 import json
 import re
-from typing import List
+from typing import Dict, List, Optional, Tuple
 import subprocess
 
 from fabric.utils import DesktopApp
-from fabric.utils.helpers import get_desktop_applications, get_relative_path
+from fabric.utils.helpers import get_relative_path
+from modules.launcher.desktop_index import DesktopAppIndex
+from modules.launcher.frecency import get_frecency_store
+from modules.launcher.fuzzy import DESCRIPTION_WEIGHT, fuzzy_score, score_batch
+from modules.launcher.icon_cache import (
+    ATLAS_ICON_SIZE,
+    IconAtlas,
+    IconCache,
+    IconRef,
+)
 from modules.launcher.plugin_base import PluginBase
 from modules.launcher.result import Result
 from utils.roam import modus_service
 
+# Applications listed for an empty query
+EMPTY_QUERY_RESULTS = 20
+FRECENCY_PREFIX = "app:"
+
+# Down-weighted fields scored besides the displayed title
+SECONDARY_FIELDS = (("name", 1.0), ("generic_name", 0.8), ("executable", 0.5))
+
 
 class ApplicationsPlugin(PluginBase):
+    supports_narrowing = True
+
     def __init__(self):
         super().__init__()
         self.display_name = "Applications"
         self.description = "Search and launch desktop applications"
+        self.app_index = None
+        self.icon_cache = None
 
     def initialize(self):
-        pass
+        # Decoded icons are cached by size; pre-rendered ones load from disk
+        self.icon_cache = IconCache(IconAtlas())
+        # Parse desktop files once; the index keeps itself up to date
+        self.app_index = DesktopAppIndex(
+            include_hidden=False, on_changed=self._build_icon_atlas
+        )
+        self._build_icon_atlas()
 
     def cleanup(self):
-        pass
+        if self.app_index:
+            self.app_index.close()
+            self.app_index = None
+        if self.icon_cache:
+            self.icon_cache.lru.clear()
+            self.icon_cache = None
+
+    def _build_icon_atlas(self):
+        """Pre-render icons missing from the on-disk atlas in the background."""
+        if not self.icon_cache or not self.icon_cache.atlas:
+            return
+
+        items = [
+            (
+                entry.icon_cache_key,
+                lambda a=entry.app: a.get_icon_pixbuf(size=ATLAS_ICON_SIZE),
+            )
+            for entry in self._get_entries()
+        ]
+        self.icon_cache.atlas.build(
+            items,
+            on_rendered=lambda key, pixbuf: self.icon_cache.lru.put(
+                key, ATLAS_ICON_SIZE, pixbuf
+            ),
+        )
+
+    def _get_icon_ref(self, entry) -> IconRef:
+        """Reference an application icon without decoding it."""
+        return IconRef(
+            key=entry.icon_cache_key,
+            size=ATLAS_ICON_SIZE,
+            loader=lambda a=entry.app: a.get_icon_pixbuf(size=ATLAS_ICON_SIZE),
+            cache=self.icon_cache,
+        )
+
+    def _get_entries(self):
+        """Get the indexed desktop entries."""
+        if not self.app_index:
+            return ()
+        return self.app_index.get_entries()
 
     def _pin_application(self, app):
         """Pin an application to the dock."""
@@ -54,92 +119,77 @@ class ApplicationsPlugin(PluginBase):
 
     def query(self, query_string: str) -> List[Result]:
         """Search applications based on query."""
-        if not query_string.strip():
-            return self._get_all_applications()
+        return self.query_narrowed(query_string)[0]
 
-        try:
-            applications = get_desktop_applications(include_hidden=False)
-        except Exception as e:
-            print(f"Failed to load applications: {e}")
-            applications = []
+    def query_narrowed(
+        self, query_string: str, candidates: Optional[tuple] = None
+    ) -> Tuple[List[Result], Optional[tuple]]:
+        """
+        Search applications, rescoring only the previous matches if given.
+
+        Candidates are (index snapshot, matched entries); they are ignored once
+        the desktop index has published a newer snapshot.
+        """
+        if not query_string.strip():
+            return self._get_all_applications(), None
 
         query = query_string.lower().strip()
+        snapshot = self._get_entries()
+        if candidates and candidates[0] is snapshot:
+            entries = candidates[1]
+        else:
+            entries = snapshot
         results = []
+        matched = []
 
-        for app in applications:
-            relevance = self._calculate_relevance(app, query)
-            if relevance > 0:
-                description = app.description or app.generic_name or ""
-                if len(description) > 80:
-                    description = description[:70] + "..."
-
-                result = Result(
-                    title=app.display_name or app.name,
-                    subtitle=description,
-                    icon=app.get_icon_pixbuf(size=48),
-                    action=lambda a=app: self._launch_application(a),
-                    relevance=relevance,
-                    plugin_name=self.display_name,
-                    data={
-                        "app": app,
-                        "pin_action": lambda a=app: self._pin_application(a),
-                    },
-                )
-                results.append(result)
+        for index, (relevance, positions) in self._score_entries(
+            entries, query
+        ).items():
+            entry = entries[index]
+            matched.append(entry)
+            results.append(self._create_result(entry, relevance, positions))
 
-        return results
+        return results, (snapshot, tuple(matched))
 
-    def _calculate_relevance(self, app, query: str) -> float:
-        """Calculate relevance score for an application."""
-        if not query:
-            return 0.0
-
-        # Get searchable text
-        name = (app.name or "").lower()
-        display_name = (app.display_name or "").lower()
-        description = (app.description or "").lower()
-        generic_name = (app.generic_name or "").lower()
-        executable = (app.executable or "").lower()
-
-        # Exact matches get highest score
-        if query == name or query == display_name:
-            return 1.0
-
-        # Starts with matches get high score
-        if (
-            name.startswith(query)
-            or display_name.startswith(query)
-            or generic_name.startswith(query)
-        ):
-            return 0.9
-
-        # Contains matches get medium score
-        if (
-            query in name
-            or query in display_name
-            or query in description
-            or query in generic_name
-        ):
-            return 0.7
-
-        # Fuzzy matching for partial matches
-        if self._fuzzy_match(query, name) or self._fuzzy_match(query, display_name):
-            return 0.5
-
-        # Executable name matching
-        if executable and query in executable:
-            return 0.4
+    def _score_entries(self, entries, query: str) -> Dict[int, Tuple[float, tuple]]:
+        """
+        Score applications against the query with the shared fuzzy scorer.
 
-        return 0.0
+        The displayed title is matched first so its positions can be
+        highlighted; other fields only contribute a down-weighted score.
 
-    def _fuzzy_match(self, query: str, text: str) -> bool:
-        """Simple fuzzy matching algorithm."""
-        if not query or not text:
-            return False
+        Returns:
+            Mapping of entry index to (relevance, title match positions)
+        """
+        if not query:
+            return {}
+
+        scores = {}
+        titles = [entry.display_name or entry.name for entry in entries]
+        originals = [
+            (entry.app.display_name if entry.display_name else entry.app.name) or ""
+            for entry in entries
+        ]
+        for index, match in score_batch(query, titles, originals=originals):
+            scores[index] = (match.score, match.positions)
+
+        for field, weight in SECONDARY_FIELDS:
+            column = [getattr(entry, field) for entry in entries]
+            for index, match in score_batch(query, column):
+                relevance = match.score * weight
+                if relevance > scores.get(index, (0.0, ()))[0]:
+                    scores[index] = (relevance, ())
+
+        # Descriptions are long prose, so only contiguous matches count
+        for index, entry in enumerate(entries):
+            if query in entry.description:
+                relevance = DESCRIPTION_WEIGHT * fuzzy_score(
+                    query, entry.description, entry.description
+                )
+                if relevance > scores.get(index, (0.0, ()))[0]:
+                    scores[index] = (relevance, ())
 
-        # Create regex pattern for fuzzy matching
-        pattern = ".*".join(re.escape(char) for char in query)
-        return bool(re.search(pattern, text, re.IGNORECASE))
+        return scores
 
     def _launch_application(self, app: DesktopApp):
 
@@ -153,33 +203,50 @@ class ApplicationsPlugin(PluginBase):
         # app.launch()
 
     def _get_all_applications(self) -> List[Result]:
-        """Get a list of all available applications."""
-        try:
-            applications = get_desktop_applications(include_hidden=False)
-        except Exception as e:
-            print(f"Failed to load applications: {e}")
-            return []
-
+        """
+        Get applications to show for an empty query: the most frecent ones
+        first, topped up with others in alphabetical order.
+        """
         results = []
+        shown = set()
 
-        for app in applications:
-            # Truncate description
-            description = app.description or app.generic_name or ""
-            if len(description) > 80:
-                description = description[:70] + "..."
-
-            result = Result(
-                title=app.display_name or app.name,
-                subtitle=description,
-                icon=app.get_icon_pixbuf(size=48),
-                action=lambda a=app: self._launch_application(a),
-                relevance=0.5,  # Default relevance for all apps
-                plugin_name=self.display_name,
-                data={
-                    "app": app,
-                    "pin_action": lambda a=app: self._pin_application(a),
-                },
-            )
-            results.append(result)
+        for desktop_id, _ in get_frecency_store().top(
+            FRECENCY_PREFIX, EMPTY_QUERY_RESULTS
+        ):
+            entry = self.app_index.get_entry(desktop_id) if self.app_index else None
+            if entry:
+                results.append(self._create_result(entry, 0.5))
+                shown.add(desktop_id)
+
+        for entry in self._get_entries():
+            if len(results) >= EMPTY_QUERY_RESULTS:
+                break
+            if entry.desktop_id not in shown:
+                results.append(self._create_result(entry, 0.5))
 
         return results
+
+    def _create_result(
+        self, entry, relevance: float, match_positions: Optional[tuple] = None
+    ) -> Result:
+        """Create a Result object for an application."""
+        app = entry.app
+        # Truncate description
+        description = app.description or app.generic_name or ""
+        if len(description) > 80:
+            description = description[:70] + "..."
+
+        return Result(
+            title=app.display_name or app.name,
+            subtitle=description,
+            icon_ref=self._get_icon_ref(entry),
+            match_positions=match_positions,
+            action=lambda a=app: self._launch_application(a),
+            relevance=relevance,
+            plugin_name=self.display_name,
+            data={
+                "app": app,
+                "pin_action": lambda a=app: self._pin_application(a),
+            },
+            frecency_key=f"{FRECENCY_PREFIX}{entry.desktop_id}",
+        )
@@ -1,14 +1,23 @@
 import json
 import os
 import threading
-import time
 from typing import Dict, List
 
+from gi.repository import Gio, GLib
+
 import config.data as data
 from fabric.utils import exec_shell_command_async
+from modules.launcher.fuzzy import DESCRIPTION_WEIGHT, fuzzy_score, score_batch
 from modules.launcher.plugin_base import PluginBase
 from modules.launcher.result import Result
 
+SCRIPTS_CACHE_VERSION = 2
+# Bytes read from the top of a script for its shebang and description
+SCRIPT_HEADER_BYTES = 4096
+SCRIPT_HEADER_LINES = 10
+# Wait for bursts of file events (e.g. an editor saving) before rescanning
+SCRIPTS_RESCAN_DELAY_MS = 250
+
 
 class BashScriptsPlugin(PluginBase):
     """
@@ -31,27 +40,35 @@ class BashScriptsPlugin(PluginBase):
             "screen-capture.sh"  # Exclude screen-capture.sh as it's handled by screencapture plugin
         }
 
-        # In-memory cache
+        # Scanned files by path, each with the (mtime, size, inode) signature
+        # it was read at; files that aren't scripts only have the signature
+        self._files: Dict[str, Dict] = {}
+        # Scripts by name, derived from _files
         self._scripts_cache: Dict[str, Dict] = {}
-        self._last_cache_update = 0
-        self._cache_update_interval = 300  # 5 minutes
 
-        # Background cache building
+        # Background rescans, driven by a directory watcher
         self._cache_building = False
-        self._cache_thread = None
+        self._rescan_again = False
+        self._rescan_source_id = None
+        self._monitor = None
 
     def initialize(self):
         """Initialize the bash scripts plugin."""
         self.set_triggers(["sh"])
         self._load_scripts_cache()
+        self._start_monitor()
         self._start_background_cache_update()
 
     def cleanup(self):
         """Cleanup the bash scripts plugin."""
-        self._scripts_cache.clear()
-        if self._cache_thread and self._cache_thread.is_alive():
-            # Note: We don't join the thread to avoid blocking cleanup
-            pass
+        if self._monitor:
+            self._monitor.cancel()
+            self._monitor = None
+        if self._rescan_source_id:
+            GLib.source_remove(self._rescan_source_id)
+            self._rescan_source_id = None
+        self._files = {}
+        self._scripts_cache = {}
 
     def _load_scripts_cache(self):
         """Load scripts cache from JSON file."""
@@ -59,159 +76,187 @@ class BashScriptsPlugin(PluginBase):
             if os.path.exists(self.scripts_cache_file):
                 with open(self.scripts_cache_file, "r", encoding="utf-8") as f:
                     cache_data = json.load(f)
-                    self._scripts_cache = cache_data.get("scripts", {})
-                    self._last_cache_update = cache_data.get("last_update", 0)
+                if cache_data.get("version") == SCRIPTS_CACHE_VERSION:
+                    self._set_files(cache_data.get("files", {}))
             else:
                 print(
                     "BashScriptsPlugin: No cache file found, will build cache in background"
                 )
         except Exception as e:
             print(f"BashScriptsPlugin: Error loading scripts cache: {e}")
-            self._scripts_cache = {}
-            self._last_cache_update = 0
+            self._set_files({})
+
+    def _set_files(self, files: Dict[str, Dict]):
+        """Replace the scanned files and the scripts derived from them."""
+        self._files = files
+        self._scripts_cache = {
+            info["name"]: info for info in files.values() if "name" in info
+        }
 
     def _save_scripts_cache(self):
         """Save scripts cache to JSON file."""
         try:
             os.makedirs(data.CACHE_DIR, exist_ok=True)
-            cache_data = {
-                "scripts": self._scripts_cache,
-                "last_update": self._last_cache_update,
-            }
-            with open(self.scripts_cache_file, "w", encoding="utf-8") as f:
+            cache_data = {"version": SCRIPTS_CACHE_VERSION, "files": self._files}
+            tmp_path = f"{self.scripts_cache_file}.tmp"
+            with open(tmp_path, "w", encoding="utf-8") as f:
                 json.dump(cache_data, f, indent=2)
+            os.replace(tmp_path, self.scripts_cache_file)
         except Exception as e:
             print(f"BashScriptsPlugin: Error saving scripts cache: {e}")
 
+    def _start_monitor(self):
+        """Watch the scripts directory so changes trigger a rescan."""
+        try:
+            self._monitor = Gio.File.new_for_path(
+                self.modus_scripts_dir
+            ).monitor_directory(Gio.FileMonitorFlags.WATCH_MOVES, None)
+        except GLib.Error as e:
+            print(f"BashScriptsPlugin: Failed to monitor scripts directory: {e}")
+            return
+        self._monitor.connect("changed", self._on_dir_changed)
+
+    def _on_dir_changed(self, *_args):
+        if not self._rescan_source_id:
+            self._rescan_source_id = GLib.timeout_add(
+                SCRIPTS_RESCAN_DELAY_MS, self._on_rescan_timeout
+            )
+
+    def _on_rescan_timeout(self) -> bool:
+        self._rescan_source_id = None
+        self._start_background_cache_update()
+        return False  # Don't repeat
+
     def _start_background_cache_update(self):
         """Start background thread to update scripts cache."""
-        current_time = time.time()
-
-        # Check if cache needs updating
-        if (
-            current_time - self._last_cache_update > self._cache_update_interval
-            or not self._scripts_cache
-        ):
-            if not self._cache_building:
-                self._cache_building = True
-                self._cache_thread = threading.Thread(
-                    target=self._build_scripts_cache_background, daemon=True
-                )
-                self._cache_thread.start()
+        if self._cache_building:
+            # Pick up changes made while the current scan is running
+            self._rescan_again = True
+            return
+
+        self._cache_building = True
+        threading.Thread(
+            target=self._build_scripts_cache_background, daemon=True
+        ).start()
 
     def _build_scripts_cache_background(self):
-        """Build scripts cache in background thread."""
+        """Rescan the scripts directory, re-reading only changed files."""
         try:
-            new_cache = {}
+            files = {}
 
             # Scan Modus scripts directory for discovered scripts
-            if os.path.exists(self.modus_scripts_dir) and os.path.isdir(
-                self.modus_scripts_dir
-            ):
-                try:
-                    self._scan_directory_for_scripts(self.modus_scripts_dir, new_cache)
-                except (PermissionError, FileNotFoundError, OSError) as e:
-                    print(
-                        f"BashScriptsPlugin: Error scanning Modus scripts directory: {
-                            e
-                        }"
-                    )
-
-            # Update cache atomically
-            self._scripts_cache = new_cache
-            self._last_cache_update = time.time()
-
-            # Save to disk
-            self._save_scripts_cache()
+            if os.path.isdir(self.modus_scripts_dir):
+                self._scan_directory_for_scripts(self.modus_scripts_dir, files)
+
+            if files != self._files:
+                # Update cache atomically
+                self._set_files(files)
+                self._save_scripts_cache()
 
         except Exception as e:
             print(f"BashScriptsPlugin: Error building scripts cache: {e}")
         finally:
-            self._cache_building = False
+            GLib.idle_add(self._finish_rescan)
 
-    def _scan_directory_for_scripts(self, directory: str, cache: Dict):
-        """Scan a directory for bash scripts and add them to cache."""
+    def _finish_rescan(self) -> bool:
+        self._cache_building = False
+        if self._rescan_again:
+            self._rescan_again = False
+            self._start_background_cache_update()
+        return False  # Don't repeat
+
+    def _scan_directory_for_scripts(self, directory: str, files: Dict):
+        """Scan a directory for bash scripts, reusing unchanged cached ones."""
         try:
             with os.scandir(directory) as entries:
                 for entry in entries:
-                    if entry.is_file(follow_symlinks=False):
-                        script_path = entry.path
-                        script_name = entry.name
-
-                        # Skip excluded scripts
-                        if script_name in self.excluded_scripts:
-                            continue
-
-                        # Check if it's a script file
-                        if self._is_script_file(script_path):
-                            cache[script_name] = {
-                                "path": script_path,
-                                "name": script_name,
-                                "description": self._get_script_description(
-                                    script_path
-                                ),
-                                "type": "discovered",
-                                "executable": os.access(script_path, os.X_OK),
-                                "args": [],
-                                "category": os.path.basename(directory),
-                            }
+                    if not entry.is_file(follow_symlinks=False):
+                        continue
+
+                    script_path = entry.path
+                    script_name = entry.name
+
+                    # Skip excluded scripts
+                    if script_name in self.excluded_scripts:
+                        continue
+
+                    stat = entry.stat(follow_symlinks=False)
+                    signature = [stat.st_mtime_ns, stat.st_size, stat.st_ino]
+                    cached = self._files.get(script_path)
+                    if cached is None or cached.get("signature") != signature:
+                        files[script_path] = self._read_script_info(
+                            script_path, directory, signature
+                        )
+                    elif "name" in cached:
+                        # chmod doesn't change the mtime, so check it every scan
+                        files[script_path] = dict(
+                            cached, executable=os.access(script_path, os.X_OK)
+                        )
+                    else:
+                        files[script_path] = cached
 
         except (PermissionError, FileNotFoundError, OSError) as e:
             print(f"BashScriptsPlugin: Error scanning directory {directory}: {e}")
         except Exception as e:
             print(f"BashScriptsPlugin: Unexpected error scanning {directory}: {e}")
 
-    def _is_script_file(self, file_path: str) -> bool:
-        """Check if a file is a bash script."""
+    def _read_script_info(
+        self, script_path: str, directory: str, signature: List[int]
+    ) -> Dict:
+        """Read a file's header and describe it if it is a script."""
+        header = self._read_header(script_path)
+        if not self._is_script_file(script_path, header):
+            return {"signature": signature}
+
+        return {
+            "path": script_path,
+            "name": os.path.basename(script_path),
+            "description": self._get_script_description(script_path, header),
+            "type": "discovered",
+            "executable": os.access(script_path, os.X_OK),
+            "args": [],
+            "category": os.path.basename(directory),
+            "signature": signature,
+        }
+
+    def _read_header(self, file_path: str) -> List[str]:
+        """Read the first lines of a file without reading all of it."""
         try:
-            # Check file extension first (most common case)
-            if file_path.endswith((".sh", ".bash")):
-                return True
-
-            # For files without extension, check shebang
-            try:
-                with open(file_path, "rb") as f:
-                    first_line = f.readline(100).decode("utf-8", errors="ignore")
-                    if first_line.startswith("#!") and (
-                        "bash" in first_line or "sh" in first_line
-                    ):
-                        return True
-            except (PermissionError, FileNotFoundError, UnicodeDecodeError):
-                pass
-
-            return False
-        except Exception:
-            return False
-
-    def _get_script_description(self, script_path: str) -> str:
+            with open(file_path, "rb") as f:
+                head = f.read(SCRIPT_HEADER_BYTES)
+        except OSError:
+            return []
+        return head.decode("utf-8", errors="ignore").splitlines()[:SCRIPT_HEADER_LINES]
+
+    def _is_script_file(self, file_path: str, header: List[str]) -> bool:
+        """Check if a file is a bash script."""
+        # Check file extension first (most common case)
+        if file_path.endswith((".sh", ".bash")):
+            return True
+
+        # For files without extension, check shebang
+        first_line = header[0][:100] if header else ""
+        return first_line.startswith("#!") and (
+            "bash" in first_line or "sh" in first_line
+        )
+
+    def _get_script_description(self, script_path: str, header: List[str]) -> str:
         """Extract description from script comments."""
-        try:
-            with open(script_path, "r", encoding="utf-8", errors="ignore") as f:
-                lines = f.readlines()
-
-                # Look for description in first few comment lines
-                for line in lines[:10]:
-                    line = line.strip()
-                    if line.startswith("#") and not line.startswith("#!"):
-                        # Remove leading # and whitespace
-                        desc = line[1:].strip()
-                        if desc and len(desc) > 5:  # Meaningful description
-                            return desc
-
-                return f"Script: {os.path.basename(script_path)}"
-        except (PermissionError, FileNotFoundError, UnicodeDecodeError):
-            return f"Script: {os.path.basename(script_path)}"
+        # Look for description in first few comment lines
+        for line in header:
+            line = line.strip()
+            if line.startswith("#") and not line.startswith("#!"):
+                # Remove leading # and whitespace
+                desc = line[1:].strip()
+                if desc and len(desc) > 5:  # Meaningful description
+                    return desc
+
+        return f"Script: {os.path.basename(script_path)}"
 
     def query(self, query_string: str) -> List[Result]:
         """Search for bash scripts matching the query."""
         query = query_string.strip()
 
-        # Start background update if needed (non-blocking)
-        if not self._scripts_cache or (
-            time.time() - self._last_cache_update > self._cache_update_interval
-        ):
-            self._start_background_cache_update()
-
         results = []
 
         # Handle special commands
@@ -255,44 +300,41 @@ class BashScriptsPlugin(PluginBase):
         query_lower = query.lower()
         max_results = 15
 
-        # Categorize matches for better sorting
-        exact_matches = []
-        prefix_matches = []
-        partial_matches = []
-        description_matches = []
+        # Score script names with the shared fuzzy scorer
+        scripts = list(self._scripts_cache.items())
+        scores = {}
+        originals = [script_name for script_name, _ in scripts]
+        names = [script_name.lower() for script_name in originals]
+        for index, match in score_batch(query_lower, names, originals=originals):
+            scores[index] = (match.score, match.positions)
 
-        for script_name, script_info in self._scripts_cache.items():
-            script_name_lower = script_name.lower()
+        # Descriptions are prose, so only contiguous matches count
+        for index, (_, script_info) in enumerate(scripts):
             description_lower = script_info.get("description", "").lower()
-
-            # Skip if no match at all
-            if (
-                query_lower not in script_name_lower
-                and query_lower not in description_lower
-            ):
-                continue
-
-            # Categorize matches
-            if script_name_lower == query_lower:
-                exact_matches.append((script_name, script_info, 1.0))
-            elif script_name_lower.startswith(query_lower):
-                prefix_matches.append((script_name, script_info, 0.9))
-            elif query_lower in script_name_lower:
-                partial_matches.append((script_name, script_info, 0.7))
-            elif query_lower in description_lower:
-                description_matches.append((script_name, script_info, 0.5))
-
-        # Combine results in priority order
-        all_matches = (
-            exact_matches + prefix_matches + partial_matches + description_matches
+            if query_lower in description_lower:
+                relevance = DESCRIPTION_WEIGHT * fuzzy_score(
+                    query_lower, description_lower, description_lower
+                )
+                if relevance > scores.get(index, (0.0, ()))[0]:
+                    scores[index] = (relevance, ())
+
+        # Best matches first
+        all_matches = sorted(
+            (
+                (scripts[index][0], scripts[index][1], relevance, positions)
+                for index, (relevance, positions) in scores.items()
+            ),
+            key=lambda m: m[2],
+            reverse=True,
         )
 
         # Convert to Result objects
-        for script_name, script_info, relevance in all_matches:
+        for script_name, script_info, relevance, positions in all_matches:
             script_results = self._create_script_results_with_args(
                 script_name, script_info, relevance
             )
             for script_result in script_results:
+                script_result.match_positions = positions
                 if len(results) < max_results:
                     results.append(script_result)
                 else:
@@ -345,6 +387,7 @@ class BashScriptsPlugin(PluginBase):
                 "script_path": script_path,
                 "type": script_type,
             },
+            frecency_key=f"script:{script_path or script_name}",
         )
 
     def _create_script_results_with_args(
@@ -379,6 +422,9 @@ class BashScriptsPlugin(PluginBase):
                         "type": script_info.get("type", "discovered"),
                         "args": [arg],
                     },
+                    frecency_key=(
+                        f"script:{script_info.get('path') or script_name} {arg}"
+                    ),
                 )
                 results.append(variant_result)
         else:
@@ -3,15 +3,18 @@ import subprocess
 import threading
 import time
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Tuple
 from urllib.parse import urlparse
 
-from thefuzz import fuzz
 
 from fabric.utils.helpers import get_relative_path
+from modules.launcher.fuzzy import DESCRIPTION_WEIGHT, fuzzy_match, fuzzy_score
 from modules.launcher.plugin_base import PluginBase
 from modules.launcher.result import Result
 
+# Weight of a URL match relative to a title match
+URL_WEIGHT = 0.7
+
 
 class BookmarkManager:
     """Manages user's custom bookmarks."""
@@ -202,20 +205,14 @@ class BookmarksPlugin(PluginBase):
         self._cache_timestamps = {}
         self._cache_ttl = 30  # 30 seconds
 
-        # Launcher instance for refreshing
-        self._launcher_instance = None
-        self._original_close_launcher = None
-
     def initialize(self):
         """Initialize the bookmarks plugin."""
         self.set_triggers(["bm"])
-        self._setup_launcher_hooks()
 
     def cleanup(self):
         """Cleanup the bookmarks plugin."""
         self._results_cache.clear()
         self._cache_timestamps.clear()
-        self._cleanup_launcher_hooks()
 
     def query(self, query_string: str) -> List[Result]:
         """Process bookmark queries with caching."""
@@ -278,10 +275,11 @@ class BookmarksPlugin(PluginBase):
         # Search bookmarks
         results = []
         for bookmark in bookmarks:
-            relevance = self._calculate_relevance(bookmark, query)
+            relevance, positions = self._calculate_relevance(bookmark, query)
             if relevance > 0.3:  # Only show relevant results
                 result = self._create_bookmark_result(bookmark, relevance)
                 if result:
+                    result.match_positions = positions
                     results.append(result)
 
         # Sort by relevance and limit results
@@ -584,41 +582,31 @@ class BookmarksPlugin(PluginBase):
         else:
             print(f"✗ Failed to remove bookmark '{identifier}' - not found")
 
-    def _calculate_relevance(self, bookmark: Dict, query: str) -> float:
-        """Calculate relevance score for a bookmark."""
-        title = bookmark.get("title", "").lower()
+    def _calculate_relevance(
+        self, bookmark: Dict, query: str
+    ) -> Tuple[float, Tuple[int, ...]]:
+        """Calculate relevance score and title match positions for a bookmark."""
+        title = bookmark.get("title", "")
         url = bookmark.get("url", "").lower()
         description = bookmark.get("description", "").lower()
 
-        # Exact title match
-        if query == title:
-            return 1.0
-
-        # Title starts with query
-        if title.startswith(query):
-            return 0.95
+        relevance, positions = 0.0, ()
 
-        # Query in title
-        if query in title:
-            position = title.index(query)
-            position_score = 1.0 - (position / len(title))
-            return 0.8 + (position_score * 0.1)
+        # Fuzzy match on the title
+        match = fuzzy_match(query, title)
+        if match:
+            relevance, positions = match.score, match.positions
 
-        # Query in URL
+        # URLs and descriptions only count contiguous matches
         if query in url:
-            return 0.7
-
-        # Query in description
+            relevance = max(relevance, URL_WEIGHT * fuzzy_score(query, url, url))
         if query in description:
-            return 0.6
-
-        # Fuzzy matching for title
-        if len(query) >= 3:
-            fuzzy_score = fuzz.partial_ratio(query, title) / 100.0
-            if fuzzy_score >= 0.7:
-                return fuzzy_score * 0.6
+            relevance = max(
+                relevance,
+                DESCRIPTION_WEIGHT * fuzzy_score(query, description, description),
+            )
 
-        return 0.0
+        return relevance, positions
 
     def _create_bookmark_result(
         self, bookmark: Dict, relevance: float
@@ -669,6 +657,7 @@ class BookmarksPlugin(PluginBase):
                     "keep_launcher_open": False,
                     "alt_action": lambda t=title: self._remove_bookmark_with_reset(t),
                 },
+                frecency_key=f"bookmark:{url}",
             )
         except Exception as e:
             print(f"Error creating bookmark result: {e}")
@@ -699,88 +688,12 @@ class BookmarksPlugin(PluginBase):
         except Exception as e:
             print(f"Failed to open bookmark: {e}")
 
-    def _setup_launcher_hooks(self):
-        """Setup hooks to monitor launcher state."""
-        try:
-            # Try to find the launcher instance
-            import gc
-
-            for obj in gc.get_objects():
-                if (
-                    hasattr(obj, "__class__")
-                    and obj.__class__.__name__ == "Launcher"
-                    and hasattr(obj, "close_launcher")
-                ):
-                    self._launcher_instance = obj
-                    break
-        except Exception as e:
-            print(f"Warning: Could not setup launcher hooks: {e}")
-
-    def _cleanup_launcher_hooks(self):
-        """Cleanup launcher hooks."""
-        try:
-            self._launcher_instance = None
-        except Exception as e:
-            print(f"Warning: Could not cleanup launcher hooks: {e}")
-
     def _reset_to_trigger(self):
         """Reset launcher to trigger word and refresh."""
-        try:
-            if self._launcher_instance and hasattr(
-                self._launcher_instance, "search_entry"
-            ):
-                # Get the current trigger (bookmark or bm)
-                current_text = self._launcher_instance.search_entry.get_text()
-                trigger = "bookmark "
-
-                # Determine which trigger was used
-                if current_text.lower().startswith("bm "):
-                    trigger = "bm "
-
-                # Reset to trigger word with space
-                try:
-                    from gi.repository import GLib
-
-                    def reset_and_refresh():
-                        # Set text to trigger word
-                        self._launcher_instance.search_entry.set_text(trigger)
-                        # Position cursor at end
-                        self._launcher_instance.search_entry.set_position(-1)
-                        # Trigger search to show default bookmarks
-                        self._launcher_instance._perform_search(trigger)
-                        return False
-
-                    GLib.timeout_add(50, reset_and_refresh)
-                except ImportError:
-                    # Fallback: direct call if GLib not available
-                    self._launcher_instance.search_entry.set_text(trigger)
-                    self._launcher_instance.search_entry.set_position(-1)
-                    self._launcher_instance._perform_search(trigger)
-        except Exception as e:
-            print(f"Could not reset to trigger: {e}")
-
-    def _force_launcher_refresh(self):
-        """Force the launcher to refresh and show updated results."""
-        try:
-            if self._launcher_instance and hasattr(
-                self._launcher_instance, "_perform_search"
-            ):
-                # Get current search text
-                current_text = ""
-                if hasattr(self._launcher_instance, "search_entry"):
-                    current_text = self._launcher_instance.search_entry.get_text()
-
-                # Trigger a search to refresh results
-                try:
-                    from gi.repository import GLib
-
-                    def refresh():
-                        self._launcher_instance._perform_search(current_text)
-                        return False
-
-                    GLib.timeout_add(50, refresh)
-                except ImportError:
-                    # Fallback: direct call if GLib not available
-                    self._launcher_instance._perform_search(current_text)
-        except Exception as e:
-            print(f"Could not force launcher refresh: {e}")
+        if not self.host:
+            return
+        # Keep whichever trigger (bookmark or bm) was used
+        trigger = "bookmark "
+        if self.host.get_query().lower().startswith("bm "):
+            trigger = "bm "
+        self.host.set_query(trigger)
@@ -1,4 +1,3 @@
-import math
 import re
 import subprocess
 import time
@@ -6,7 +5,21 @@ from typing import List
 
 from modules.launcher.plugin_base import PluginBase
 from modules.launcher.result import Result
-from utils.conversion import Conversion
+from utils.calculator import (
+    MODE_DECIMAL,
+    MODE_INT,
+    Calculator,
+    EvaluationTimeout,
+    ExpressionTooLarge,
+    format_number,
+    split_mode,
+)
+from utils.conversion import Conversion, CurrencyRatesPending
+
+# Leading keywords switching the calculator to exact modes, e.g. "= int 2^100"
+MODE_PREFIXES = {"int": MODE_INT, "dec": MODE_DECIMAL}
+# Target unit converting to every unit of the same kind, e.g. "10 km to all"
+ALL_UNITS_KEYWORD = "all"
 
 
 class CalculatorPlugin(PluginBase):
@@ -19,27 +32,8 @@ class CalculatorPlugin(PluginBase):
         self.display_name = "Calculator"
         self.description = "Evaluate mathematical expressions and convert units"
 
-        # Safe functions for evaluation
-        self.safe_functions = {
-            "abs": abs,
-            "round": round,
-            "min": min,
-            "max": max,
-            "sum": sum,
-            "pow": pow,
-            "sqrt": math.sqrt,
-            "sin": math.sin,
-            "cos": math.cos,
-            "tan": math.tan,
-            "asin": math.asin,
-            "acos": math.acos,
-            "atan": math.atan,
-            "log": math.log,
-            "log10": math.log10,
-            "exp": math.exp,
-            "pi": math.pi,
-            "e": math.e,
-        }
+        # Sandboxed expression evaluator with size limits and a time budget
+        self.calculator = Calculator()
 
         # Initialize conversion utility
         self.converter = Conversion()
@@ -48,7 +42,7 @@ class CalculatorPlugin(PluginBase):
         self.expression_pattern = re.compile(r"[\d+\-*/^()=]")
         self.number_pattern = re.compile(r"\d")
         self.conversion_pattern = re.compile(
-            r"(\d+(?:\.\d+)?)\s*([a-zA-Z]+)\s*(?:to|in|=)\s*([a-zA-Z]+)"
+            r"(\d+(?:\.\d+)?)\s*([^\W\d_]+)\s*(?:to|in|=)\s*([^\W\d_]+)"
         )
 
         # Cache for conversion results
@@ -59,6 +53,15 @@ class CalculatorPlugin(PluginBase):
     def initialize(self):
         """Initialize the files plugin."""
         self.set_triggers(["="])
+        # Drop conversions made with old rates once new ones arrive
+        self.converter.currency_cache.add_listener(self._on_rates_updated)
+
+    def _on_rates_updated(self, base_currency: str):
+        """Called from a worker thread after exchange rates were refreshed."""
+        self._conversion_cache.clear()
+        # Replace a "Fetching exchange rates" row with the conversion
+        if self.host:
+            self.host.request_refresh()
 
     def _cleanup_cache(self):
         """Clean up old cache entries."""
@@ -82,17 +85,28 @@ class CalculatorPlugin(PluginBase):
                 value, from_unit, to_unit = conversion_match.groups()
                 value = float(value)
 
+                if to_unit.lower() == ALL_UNITS_KEYWORD:
+                    return self._convert_to_all(value, from_unit)
+
                 # Check cache first
                 cache_key = f"{value}_{from_unit}_{to_unit}"
                 if cache_key in self._conversion_cache:
                     result = self._conversion_cache[cache_key]
-                    subtitle = f"{value} {from_unit} = {result:.6g} {to_unit}"
                 else:
                     # Use the conversion utility
                     result = self.converter.convert(value, from_unit, to_unit)
                     # Cache the result
                     self._conversion_cache[cache_key] = result
-                    subtitle = f"{value} {from_unit} = {result:.6g} {to_unit}"
+                subtitle = f"{value} {from_unit} = {result:.6g} {to_unit}"
+
+                # Rates are served while stale, so tell how old they are
+                if self.converter.is_currency_pair(from_unit, to_unit):
+                    cache_info = self.converter.get_currency_cache_info(
+                        from_unit, to_unit
+                    )
+                    if cache_info is not None and not cache_info[0]:
+                        age = self._format_cache_age(cache_info[1])
+                        subtitle = f"{subtitle} (rates from {age})"
 
                 return [
                     Result(
@@ -105,6 +119,16 @@ class CalculatorPlugin(PluginBase):
                         data={"from": (value, from_unit), "to": (result, to_unit)},
                     )
                 ]
+            except CurrencyRatesPending as e:
+                return [
+                    Result(
+                        title="Fetching exchange rates…",
+                        subtitle=str(e),
+                        icon_name="calculator-symbolic",
+                        relevance=0.0,
+                        plugin_name=self.display_name,
+                    )
+                ]
             except ValueError as e:
                 return [
                     Result(
@@ -118,25 +142,57 @@ class CalculatorPlugin(PluginBase):
 
         # Check if it's a math expression
         if self.expression_pattern.search(query):
+            mode, expression = split_mode(query, MODE_PREFIXES)
             try:
                 # Evaluate the expression
-                result = eval(query, {"__builtins__": {}}, self.safe_functions)
-                if isinstance(result, (int, float)):
-                    return [
-                        Result(
-                            title=f"{result:.6g}",
-                            subtitle=f"{query} = {result:.6g}",
-                            icon_name="calculator-symbolic",
-                            action=lambda r=f"{result:.6g}": self._copy_to_clipboard(r),
-                            relevance=1.0,
-                            plugin_name=self.display_name,
-                        )
-                    ]
+                value = self.calculator.evaluate(expression, mode)
+                result = format_number(value, mode)
+            except (ExpressionTooLarge, EvaluationTimeout, OverflowError) as e:
+                # Tell why a valid looking expression has no result
+                return [
+                    Result(
+                        title="Can't calculate",
+                        subtitle=str(e),
+                        icon_name="calculator-symbolic",
+                        relevance=0.0,
+                        plugin_name=self.display_name,
+                    )
+                ]
             except Exception:
-                pass
+                return []
+
+            return [
+                Result(
+                    title=result,
+                    subtitle=f"{expression} = {result}",
+                    icon_name="calculator-symbolic",
+                    action=lambda r=result: self._copy_to_clipboard(r),
+                    relevance=1.0,
+                    plugin_name=self.display_name,
+                )
+            ]
 
         return []
 
+    def _convert_to_all(self, value: float, from_unit: str) -> List[Result]:
+        """Convert a value to every other unit of its kind."""
+        results = []
+        conversions = self.converter.convert_all(value, from_unit)
+        for position, (unit, result) in enumerate(conversions):
+            results.append(
+                Result(
+                    title=f"{result:.6g} {unit}",
+                    subtitle=f"{value:g} {from_unit} = {result:.6g} {unit}",
+                    icon_name="calculator-symbolic",
+                    action=lambda r=f"{result:.6g}": self._copy_to_clipboard(r),
+                    # Keep the chart order
+                    relevance=1.0 - position * 0.001,
+                    plugin_name=self.display_name,
+                    data={"from": (value, from_unit), "to": (result, unit)},
+                )
+            )
+        return results
+
     def _format_cache_age(self, age_seconds: float) -> str:
         """Format cache age for display."""
         if age_seconds < 60:
@@ -160,4 +216,6 @@ class CalculatorPlugin(PluginBase):
     def cleanup(self):
         """Clean up resources."""
         self._conversion_cache.clear()
+        self.converter.currency_cache.remove_listener(self._on_rates_updated)
         self.converter.cleanup()
+        self.calculator.cleanup()
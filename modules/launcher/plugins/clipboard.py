@@ -1,16 +1,194 @@
+import hashlib
+import heapq
 import os
+import shutil
 import subprocess
 import sys
 import tempfile
 import threading
-import time
-from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, List, Optional
+from concurrent.futures import Executor, ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional
 
 from gi.repository import GdkPixbuf, GLib
 
+import config.data as data
+from modules.launcher.icon_cache import IconCache, IconRef
 from modules.launcher.plugin_base import PluginBase
 from modules.launcher.result import Result
+from services.clipboard import (
+    ClipboardEntry,
+    ClipboardHistory,
+    ClipboardTextIndex,
+    remove_text_index,
+)
+
+# Longest side of image previews, in pixels
+CLIPBOARD_PREVIEW_SIZE = 100
+# Decoded previews kept in memory, in pixel bytes
+CLIPBOARD_PREVIEW_BUDGET = 16 * 1024 * 1024
+CLIPBOARD_THUMBNAIL_DIR = os.path.join(data.CACHE_DIR, "clipboard_thumbnails")
+# Characters of a long text entry shown as its title
+TEXT_PREVIEW_LENGTH = 37
+
+
+def decode_thumbnail(image_data: bytes, max_size: int) -> Optional[GdkPixbuf.Pixbuf]:
+    """
+    Decode image bytes straight to thumbnail size.
+
+    The target size is set from the loader's size-prepared signal, so
+    decoders that support it (e.g. JPEG) never materialise the full image.
+    Images already smaller than max_size are kept as they are.
+    """
+
+    def on_size_prepared(loader, width, height):
+        scale = max_size / max(width, height, 1)
+        if scale < 1.0:
+            loader.set_size(max(1, int(width * scale)), max(1, int(height * scale)))
+
+    loader = GdkPixbuf.PixbufLoader()
+    loader.connect("size-prepared", on_size_prepared)
+    try:
+        loader.write(image_data)
+        loader.close()
+    except GLib.Error as e:
+        print(f"Error decoding clipboard image: {e}", file=sys.stderr)
+        return None
+    return loader.get_pixbuf()
+
+
+class ClipboardThumbnailer:
+    """
+    Preview thumbnails of image entries in the clipboard history.
+
+    Thumbnails are decoded at preview size from ``cliphist decode`` output,
+    kept in a byte-budgeted LRU and written to a disk cache keyed by entry,
+    so each image is decoded at most once across sessions. Loading runs on
+    the given executor and callers get the thumbnail back on the main loop.
+    """
+
+    def __init__(
+        self,
+        executor: Executor,
+        size: int = CLIPBOARD_PREVIEW_SIZE,
+        max_bytes: int = CLIPBOARD_PREVIEW_BUDGET,
+        cache_dir: str = CLIPBOARD_THUMBNAIL_DIR,
+    ):
+        self.executor = executor
+        self.size = size
+        self.cache_dir = cache_dir
+        self.cache = IconCache(max_bytes=max_bytes)
+        # Callbacks waiting for a thumbnail that is being loaded, by key
+        self._pending: Dict[str, List[Callable]] = {}
+        self._lock = threading.Lock()
+
+    def get_key(self, entry: ClipboardEntry) -> str:
+        """
+        Cache key of an entry's thumbnail.
+
+        cliphist ids restart after a wipe, so the listed preview (which
+        carries the image's size and format) is hashed in as well.
+        """
+        digest = hashlib.sha1(entry.content.encode("utf-8")).hexdigest()[:12]
+        return f"{entry.id}-{digest}"
+
+    def get_icon_ref(self, entry: ClipboardEntry) -> IconRef:
+        """Get a reference to an entry's thumbnail, loaded when its row shows."""
+        key = self.get_key(entry)
+        return IconRef(
+            key=key,
+            size=self.size,
+            loader=lambda: self._load(key, entry.id),
+            cache=self.cache,
+            load_async=lambda callback: self.request(key, entry.id, callback),
+            placeholder_icon_name="image-x-generic",
+        )
+
+    def request(
+        self,
+        key: str,
+        entry_id: str,
+        callback: Callable[[Optional[GdkPixbuf.Pixbuf]], None],
+    ):
+        """Load a thumbnail in the background and pass it to callback."""
+        with self._lock:
+            callbacks = self._pending.get(key)
+            if callbacks is not None:
+                # Already loading, e.g. for a row that was recycled
+                callbacks.append(callback)
+                return
+            self._pending[key] = [callback]
+
+        try:
+            self.executor.submit(self._load_worker, key, entry_id)
+        except RuntimeError:
+            # Executor shut down with the plugin
+            with self._lock:
+                self._pending.pop(key, None)
+
+    def prune(self, entries: Iterable[ClipboardEntry]):
+        """Delete cached thumbnails of entries no longer in the history."""
+        wanted = {f"{self.get_key(entry)}_{self.size}.png" for entry in entries}
+        try:
+            names = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name not in wanted:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def clear(self):
+        self.cache.lru.clear()
+
+    def _load_worker(self, key: str, entry_id: str):
+        pixbuf = self.cache.get(key, self.size, lambda: self._load(key, entry_id))
+        GLib.idle_add(self._deliver, key, pixbuf)
+
+    def _deliver(self, key: str, pixbuf: Optional[GdkPixbuf.Pixbuf]) -> bool:
+        with self._lock:
+            callbacks = self._pending.pop(key, [])
+        for callback in callbacks:
+            callback(pixbuf)
+        return False  # Don't repeat
+
+    def _get_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, f"{key}_{self.size}.png")
+
+    def _load(self, key: str, entry_id: str) -> Optional[GdkPixbuf.Pixbuf]:
+        """Load a thumbnail from the disk cache, decoding it on a miss."""
+        path = self._get_path(key)
+        if os.path.exists(path):
+            try:
+                return GdkPixbuf.Pixbuf.new_from_file(path)
+            except GLib.Error as e:
+                print(f"Discarding corrupt clipboard thumbnail: {e}", file=sys.stderr)
+
+        try:
+            result = subprocess.run(
+                ["cliphist", "decode", entry_id],
+                capture_output=True,
+                check=True,
+                timeout=3,
+            )
+        except (subprocess.SubprocessError, OSError) as e:
+            print(f"Error loading image preview: {e}", file=sys.stderr)
+            return None
+
+        pixbuf = decode_thumbnail(result.stdout, self.size)
+        if pixbuf is not None:
+            self._save(pixbuf, path)
+        return pixbuf
+
+    def _save(self, pixbuf: GdkPixbuf.Pixbuf, path: str):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp_path = f"{path}.tmp"
+            pixbuf.savev(tmp_path, "png", [], [])
+            os.replace(tmp_path, path)
+        except (GLib.Error, OSError) as e:
+            print(f"Error saving clipboard thumbnail: {e}", file=sys.stderr)
 
 
 class ClipboardPlugin(PluginBase):
@@ -22,38 +200,45 @@ class ClipboardPlugin(PluginBase):
 
         # Performance settings - show more history like example_cliphist.py
         self.max_results = 50
-        # Cache clipboard items for 5 seconds (more responsive)
-        self.cache_ttl = 5
+        # In-memory history, kept current by watching cliphist's database
+        self.history = ClipboardHistory.get_initial()
+        # Optional full-text index over the decoded text of recent entries
+        self.text_index = (
+            ClipboardTextIndex(self.history) if data.CLIPBOARD_FULL_TEXT_INDEX else None
+        )
+        if not self.text_index:
+            # Texts cached while the index was enabled
+            remove_text_index()
 
-        # Initialize cache and temp directory
+        # Initialize temp directory
         self.tmp_dir = tempfile.mkdtemp(prefix="cliphist-")
-        # Cache images forever like example_cliphist.py
-        self.image_cache: Dict[str, GdkPixbuf.Pixbuf] = {}
-        self.clipboard_items_cache: List[str] = []
-        self.cache_timestamp = 0
+
+        self._history_handler = None
+        self._thumbnails_pruned = False
 
         # Threading
         self.executor = ThreadPoolExecutor(
             max_workers=2, thread_name_prefix="clipboard"
         )
-        self.cache_lock = threading.Lock()
-
-        # State tracking
-        self._loading = False
-        self._pending_updates = False
+        # Image previews, decoded on the executor
+        self.thumbnailer = ClipboardThumbnailer(self.executor)
 
     def initialize(self):
         """Initialize the plugin."""
         self.set_triggers(["clip"])
-        try:
-            subprocess.run(
-                ["cliphist", "list"], capture_output=True, check=True, timeout=5
-            )
-        except (subprocess.SubprocessError, FileNotFoundError):
+        if not shutil.which("cliphist"):
             raise RuntimeError("cliphist is not installed or not working properly")
 
-        # Pre-warm cache in background
-        self.executor.submit(self._load_clipboard_items_cached)
+        # Seed the history in the background; later changes arrive from the
+        # database watch
+        self._history_handler = self.history.connect(
+            "changed", self._on_history_changed
+        )
+        self.history.start()
+        if self.text_index:
+            self.text_index.start()
+        if self.history.is_loaded():
+            self._prune_thumbnails()
 
     def cleanup(self):
         """Cleanup the plugin."""
@@ -62,153 +247,43 @@ class ClipboardPlugin(PluginBase):
             if hasattr(self, "executor"):
                 self.executor.shutdown(wait=False)
 
+            if self.text_index:
+                self.text_index.stop()
+            if self._history_handler is not None:
+                self.history.disconnect(self._history_handler)
+                self._history_handler = None
+            self.history.stop()
+
             # Clean up temp files
             if os.path.exists(self.tmp_dir):
-                import shutil
-
                 shutil.rmtree(self.tmp_dir)
 
             # Clear caches
-            with self.cache_lock:
-                self.image_cache.clear()
-                self.clipboard_items_cache.clear()
+            self.thumbnailer.clear()
         except Exception as e:
             print(f"Error cleaning up temporary files: {e}", file=sys.stderr)
 
     def invalidate_cache(self):
-        """Force invalidation of the clipboard cache."""
-        with self.cache_lock:
-            self.clipboard_items_cache.clear()
-            self.cache_timestamp = 0
-            # Keep image cache forever like example_cliphist.py
-
-    def _force_launcher_refresh(self):
-        """Force the launcher to refresh its results."""
-        try:
-            from gi.repository import GLib
-
-            def trigger_refresh():
-                try:
-                    # Try to access the launcher through the fabric Application
-                    from fabric import Application
-
-                    app = Application.get_default()
-
-                    if app and hasattr(app, "launcher"):
-                        launcher = app.launcher
-                        if (
-                            launcher
-                            and hasattr(launcher, "search_entry")
-                            and hasattr(launcher, "_perform_search")
-                        ):
-                            # Get current search text to preserve the query
-                            current_text = launcher.search_entry.get_text()
-                            # Trigger the search to refresh results
-                            launcher._perform_search(current_text)
-                            return False
-
-                    # Fallback: try to find launcher instance through other means
-                    import gc
-
-                    for obj in gc.get_objects():
-                        if (
-                            hasattr(obj, "__class__")
-                            and obj.__class__.__name__ == "Launcher"
-                        ):
-                            if hasattr(obj, "search_entry") and hasattr(
-                                obj, "_perform_search"
-                            ):
-                                current_text = obj.search_entry.get_text()
-                                obj._perform_search(current_text)
-                                return False
-
-                except Exception as e:
-                    print(f"Error forcing launcher refresh: {e}")
-
-                return False  # Don't repeat
-
-            # Use immediate refresh
-            GLib.timeout_add(10, trigger_refresh)
-
-        except Exception as e:
-            print(f"Could not trigger refresh: {e}")
-
-    def _load_clipboard_items_cached(self) -> List[str]:
-        """Load clipboard items from cliphist with caching and change detection."""
-        current_time = time.time()
-
-        # Always load fresh data to check for changes
-        try:
-            result = subprocess.run(
-                ["cliphist", "list"], capture_output=True, check=True, timeout=5
-            )
-            stdout_str = result.stdout.decode("utf-8", errors="replace")
-            if stdout_str.strip():
-                lines = stdout_str.strip().split("\n")
-                items = [
-                    line for line in lines if line and "<meta http-equiv" not in line
-                ]
-            else:
-                items = []
-
-            # Check if data has changed
-            with self.cache_lock:
-                data_changed = (
-                    not self.clipboard_items_cache
-                    or len(items) != len(self.clipboard_items_cache)
-                    or items != self.clipboard_items_cache
-                )
-
-                # If cache is still valid and data hasn't changed, return cached data
-                if (
-                    not data_changed
-                    and self.clipboard_items_cache
-                    and current_time - self.cache_timestamp < self.cache_ttl
-                ):
-                    return self.clipboard_items_cache.copy()
-
-                # Update cache with fresh data
-                self.clipboard_items_cache = items
-                self.cache_timestamp = current_time
-
-                # Keep image cache forever like example_cliphist.py - don't clear on data changes
-
-            return items
-        except subprocess.CalledProcessError as e:
-            print(f"Error loading clipboard history: {e}", file=sys.stderr)
-            return []
-        except Exception as e:
-            print(f"Unexpected error: {e}", file=sys.stderr)
-            return []
-
-    def _load_clipboard_items(self) -> List[str]:
-        """Load clipboard items (legacy method for compatibility)."""
-        return self._load_clipboard_items_cached()
-
-    def _create_pixbuf_from_bytes(
-        self, image_data: bytes, max_size: int = 100
-    ) -> GdkPixbuf.Pixbuf:
-        """Create a GdkPixbuf from image bytes with size limit."""
-        try:
-            loader = GdkPixbuf.PixbufLoader()
-            loader.write(image_data)
-            loader.close()
-            pixbuf = loader.get_pixbuf()
-
-            # Scale image if needed
-            width, height = pixbuf.get_width(), pixbuf.get_height()
-            if width > height:
-                new_width = max_size
-                new_height = int(height * (max_size / width))
-            else:
-                new_height = max_size
-                new_width = int(width * (max_size / height))
-
-            return pixbuf.scale_simple(
-                new_width, new_height, GdkPixbuf.InterpType.BILINEAR
+        """Force the clipboard history to be re-read."""
+        # Thumbnails are keyed by entry, so they stay valid
+        self.history.refresh()
+
+    def _on_history_changed(self, *_args):
+        """Show new or deleted entries if the launcher is open."""
+        if not self._thumbnails_pruned:
+            self._prune_thumbnails()
+        if self.host and self.host.is_visible():
+            self.host.request_refresh()
+
+    def _prune_thumbnails(self):
+        """Drop thumbnails of entries that were deleted meanwhile, once."""
+        self._thumbnails_pruned = True
+        entries = self.history.get_entries()
+        if entries:
+            self.executor.submit(
+                self.thumbnailer.prune,
+                [entry for entry in entries if self._is_image_data(entry.content)],
             )
-        except GLib.Error:
-            return None
 
     def _is_image_data(self, content: str) -> bool:
         """Determine if clipboard content is likely an image (like example_cliphist.py)."""
@@ -226,37 +301,9 @@ class ClipboardPlugin(PluginBase):
     def _get_text_preview(self, content: str) -> str:
         """Get a text preview of the content."""
         if len(content) > 50:
-            return content[:37] + "..."
+            return content[:TEXT_PREVIEW_LENGTH] + "..."
         return content
 
-    def _load_image_preview_cached(self, item_id: str) -> Optional[GdkPixbuf.Pixbuf]:
-        """Load image preview with forever caching (like example_cliphist.py)."""
-        # Check cache first - cache forever like example_cliphist.py
-        with self.cache_lock:
-            if item_id in self.image_cache:
-                return self.image_cache[item_id]
-
-        try:
-            result = subprocess.run(
-                ["cliphist", "decode", item_id],
-                capture_output=True,
-                check=True,
-                timeout=3,
-            )
-            pixbuf = self._create_pixbuf_from_bytes(result.stdout)
-            if pixbuf:
-                with self.cache_lock:
-                    self.image_cache[item_id] = pixbuf
-
-            return pixbuf
-        except Exception as e:
-            print(f"Error loading image preview: {e}", file=sys.stderr)
-            return None
-
-    def _load_image_preview_async(self, item_id: str) -> Optional[GdkPixbuf.Pixbuf]:
-        """Load image preview (legacy method for compatibility)."""
-        return self._load_image_preview_cached(item_id)
-
     def query(self, query_string: str) -> List[Result]:
         """Search clipboard history using cliphist with optimized performance."""
         results = []
@@ -266,123 +313,64 @@ class ClipboardPlugin(PluginBase):
             query_string = ""  # Show all items
 
         try:
-            # Load clipboard items from cache
-            clipboard_items = self._load_clipboard_items_cached()
+            # In-memory history snapshot, newest first
+            entries = self.history.get_entries()
 
             # Early exit if no items
-            if not clipboard_items:
+            if not entries:
                 return results
 
-            # Filter items based on query - search through ALL items first
-            filtered_items = []
             query_lower = query_string.lower() if query_string else ""
-
-            for item in clipboard_items:
-                parts = item.split("\t", 1)
-                content = parts[1] if len(parts) > 1 else item
-                content_lower = content.lower()
-
-                # Fast filtering - search through all items, don't limit here
-                if not query_lower or query_lower in content_lower:
-                    # Calculate relevance score for better sorting
-                    relevance = 1.0
-                    if query_lower:
-                        if content_lower.startswith(query_lower):
-                            relevance = 1.0  # Exact start match
-                        elif query_lower in content_lower:
-                            # Position-based scoring: earlier matches get higher scores
-                            position = content_lower.find(query_lower)
-                            relevance = max(
-                                0.5, 1.0 - (position / len(content_lower)) * 0.4
-                            )
-
-                    filtered_items.append((item, relevance))
-
-            # Sort by relevance (highest first) and then limit results
-            filtered_items.sort(key=lambda x: x[1], reverse=True)
-            filtered_items = filtered_items[: self.max_results]
+            if query_lower:
+                # Full-text matches of indexed entries, by entry id
+                indexed = {}
+                if self.text_index:
+                    indexed = {
+                        entry_id: (score, position)
+                        for entry_id, score, position in self.text_index.search(
+                            query_lower, self.max_results
+                        )
+                    }
+                # Filter the whole history, keeping the best matches
+                filtered_items = heapq.nlargest(
+                    self.max_results,
+                    self._filter_entries(entries, query_lower, indexed),
+                    key=lambda x: x[1],
+                )
+            else:
+                filtered_items = [
+                    (entry, 1.0, None) for entry in entries[: self.max_results]
+                ]
 
             # Process items with lazy image loading
-            for i, (item, relevance) in enumerate(filtered_items):
-                parts = item.split("\t", 1)
-                item_id = parts[0] if len(parts) > 1 else str(i)
-                content = parts[1] if len(parts) > 1 else item
+            for entry, relevance, snippet in filtered_items:
+                item_id = entry.id
+                content = entry.content
 
-                # Handle image content like example_cliphist.py
+                # Handle image content, the preview is decoded once its row shows
                 if self._is_image_data(content):
-                    # Check if image is already cached (forever cache like example_cliphist.py)
-                    cached_pixbuf = None
-                    with self.cache_lock:
-                        cached_pixbuf = self.image_cache.get(item_id)
-
-                    if cached_pixbuf:
-                        # Use cached image immediately
-                        result = Result(
+                    results.append(
+                        Result(
                             title="Image from clipboard",
                             subtitle="Click to copy image to clipboard",
                             description="Image content",
-                            icon=cached_pixbuf,
+                            icon_ref=self.thumbnailer.get_icon_ref(entry),
                             relevance=relevance,
                             plugin_name=self.name,
                             action=lambda id=item_id: self._copy_to_clipboard(id),
                             data={"bypass_max_results": True},
                         )
-                    else:
-                        # Try to load image immediately like example_cliphist.py
-                        try:
-                            immediate_pixbuf = self._load_image_preview_cached(item_id)
-                            if immediate_pixbuf:
-                                # Successfully loaded immediately
-                                result = Result(
-                                    title="Image from clipboard",
-                                    subtitle="Click to copy image to clipboard",
-                                    description="Image content",
-                                    icon=immediate_pixbuf,
-                                    relevance=relevance,
-                                    plugin_name=self.name,
-                                    action=lambda id=item_id: self._copy_to_clipboard(
-                                        id
-                                    ),
-                                    data={"bypass_max_results": True},
-                                )
-                            else:
-                                # Show placeholder if loading failed
-                                result = Result(
-                                    title="Image from clipboard",
-                                    subtitle="Click to copy image to clipboard",
-                                    description="Image content",
-                                    icon_name="image-x-generic",
-                                    relevance=relevance,
-                                    plugin_name=self.name,
-                                    action=lambda id=item_id: self._copy_to_clipboard(
-                                        id
-                                    ),
-                                    data={"bypass_max_results": True},
-                                )
-                        except Exception:
-                            # Fallback to placeholder
-                            result = Result(
-                                title="Image from clipboard",
-                                subtitle="Click to copy image to clipboard",
-                                description="Image content",
-                                icon_name="image-x-generic",
-                                relevance=relevance,
-                                plugin_name=self.name,
-                                action=lambda id=item_id: self._copy_to_clipboard(id),
-                                data={"bypass_max_results": True},
-                            )
-
-                    results.append(result)
+                    )
                     continue
 
-                # Handle text content
+                # Handle text content; a match outside the title is shown
+                # in the subtitle, with the text around it
                 display_text = self._get_text_preview(content)
                 result = Result(
                     title=display_text,
-                    subtitle="Text from clipboard",
-                    description=(
-                        content if len(content) <= 100 else content[:97] + "..."
-                    ),
+                    subtitle=snippet or "Text from clipboard",
+                    description=snippet
+                    or (content if len(content) <= 100 else content[:97] + "..."),
                     icon_name="edit-paste",
                     relevance=relevance,
                     plugin_name=self.name,
@@ -406,6 +394,47 @@ class ClipboardPlugin(PluginBase):
 
         return results
 
+    def _filter_entries(self, entries, query_lower: str, indexed: Dict[str, tuple]):
+        """
+        Yield (entry, relevance, snippet) for entries containing the query.
+
+        Entries found by the full-text index use its score and show the text
+        around the match; the rest are matched against their list preview,
+        and show the text around the match if the title doesn't include it.
+        """
+        for entry in entries:
+            match = indexed.get(entry.id)
+            if match is not None:
+                score, position = match
+                text = self.text_index.get_text(entry.id) or entry.content
+                yield entry, score, self._get_match_snippet(text, position)
+                continue
+
+            position = entry.content_lower.find(query_lower)
+            if position < 0:
+                continue
+            if position == 0:
+                relevance = 1.0  # Exact start match
+            else:
+                # Position-based scoring: earlier matches get higher scores
+                relevance = max(0.5, 1.0 - (position / len(entry.content_lower)) * 0.4)
+            snippet = None
+            if self._get_text_preview(entry.content) != entry.content and (
+                position + len(query_lower) > TEXT_PREVIEW_LENGTH
+            ):
+                snippet = self._get_match_snippet(entry.content, position)
+            yield entry, relevance, snippet
+
+    def _get_match_snippet(self, text: str, position: int, width: int = 100) -> str:
+        """Get the text around a match, on one line."""
+        start = max(0, position - width // 3)
+        snippet = " ".join(text[start : start + width].split())
+        if start > 0:
+            snippet = "..." + snippet
+        if start + width < len(text):
+            snippet += "..."
+        return snippet
+
     def _copy_to_clipboard(self, entry_id: str):
         """Copy entry to clipboard using cliphist with timeout."""
         try:
@@ -426,11 +455,7 @@ class ClipboardPlugin(PluginBase):
                     timeout=3,
                 )
 
-            # Don't invalidate image cache - keep images cached forever like example_cliphist.py
-            # Only invalidate clipboard items cache
-            with self.cache_lock:
-                self.clipboard_items_cache.clear()
-                self.cache_timestamp = 0
+            # The history itself updates from the cliphist database watch
 
         except subprocess.SubprocessError as e:
             print(f"Error copying to clipboard: {e}", file=sys.stderr)
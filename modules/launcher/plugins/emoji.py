@@ -1,28 +1,199 @@
+import heapq
 import json
+import marshal
 import os
+import re
 import subprocess
 import time
+from array import array
+from bisect import bisect_left
 from collections import OrderedDict
-from typing import Dict, List
+from typing import Dict, List, Optional, Set, Tuple
 
 import config.data as data
 from fabric.utils import get_relative_path
+from modules.launcher.fuzzy import score_batch
 from modules.launcher.plugin_base import PluginBase
 from modules.launcher.result import Result
 
+# Searchable fields and their weight in the relevance score. Keywords are the
+# name and group together, so queries mixing words from both still match.
+SEARCH_FIELDS = (("name", 1.0), ("slug", 0.9), ("group", 0.7), ("keywords", 0.6))
+
+EMOJI_INDEX_FILE = os.path.join(data.CACHE_DIR, "emoji_index.bin")
+EMOJI_INDEX_VERSION = 1
+MAX_RESULTS = 20
+
+_TOKEN_SPLIT = re.compile(r"[\W_]+")
+
+
+def _tokenize(text: str) -> List[str]:
+    return [token for token in _TOKEN_SPLIT.split(text.lower()) if token]
+
+
+class EmojiIndex:
+    """
+    Emoji metadata with a token inverted index, cached in a binary file.
+
+    Every word of the name, slug and group maps to a posting list of emoji
+    positions. Tokens are kept sorted so a query word is looked up as a
+    prefix with bisect. The cache is rebuilt from the JSON source only when
+    its mtime or size changes, so a normal startup never parses JSON.
+    """
+
+    def __init__(self, source_path: str, cache_path: str = EMOJI_INDEX_FILE):
+        self.source_path = source_path
+        self.cache_path = cache_path
+        self.emojis: List[str] = []
+        self.names: List[str] = []
+        self.slugs: List[str] = []
+        self.groups: List[str] = []
+        self.tokens: List[str] = []
+        self.postings: List[array] = []
+        self.positions: Dict[str, int] = {}
+        # Pre-lowercased search columns, aligned with emojis
+        self.columns: Dict[str, List[str]] = {}
+
+    def load(self):
+        """Load the index from the cache, rebuilding it if it's stale."""
+        try:
+            stat = os.stat(self.source_path)
+        except OSError:
+            print(f"Emoji file not found: {self.source_path}")
+            return
+        signature = (EMOJI_INDEX_VERSION, stat.st_mtime_ns, stat.st_size)
+
+        if not self._load_cache(signature):
+            self._build()
+            self._write_cache(signature)
+        self._prepare()
+
+    def _load_cache(self, signature: tuple) -> bool:
+        try:
+            with open(self.cache_path, "rb") as f:
+                cached = marshal.load(f)
+        except FileNotFoundError:
+            return False
+        except (OSError, EOFError, ValueError, TypeError) as e:
+            print(f"Discarding emoji index cache: {e}")
+            return False
+
+        if not isinstance(cached, tuple) or cached[0] != signature:
+            return False
+
+        _, self.emojis, self.names, self.slugs, self.groups, self.tokens, postings = (
+            cached
+        )
+        self.postings = []
+        for raw in postings:
+            posting = array("H")
+            posting.frombytes(raw)
+            self.postings.append(posting)
+        return True
+
+    def _build(self):
+        """Build the index from the JSON source."""
+        try:
+            with open(self.source_path, "r", encoding="utf-8") as f:
+                emoji_data = json.load(f)
+        except Exception as e:
+            print(f"Error loading emoji data: {e}")
+            return
+
+        self.emojis = list(emoji_data.keys())
+        self.names = [emoji_data[e].get("name", "") for e in self.emojis]
+        self.slugs = [emoji_data[e].get("slug", "") for e in self.emojis]
+        self.groups = [emoji_data[e].get("group", "") for e in self.emojis]
+
+        index: Dict[str, Set[int]] = {}
+        for position, fields in enumerate(zip(self.names, self.slugs, self.groups)):
+            for field in fields:
+                for token in _tokenize(field):
+                    index.setdefault(token, set()).add(position)
+
+        self.tokens = sorted(index)
+        self.postings = [array("H", sorted(index[token])) for token in self.tokens]
+
+    def _write_cache(self, signature: tuple):
+        if not self.emojis:
+            return
+        try:
+            os.makedirs(os.path.dirname(self.cache_path), exist_ok=True)
+            tmp_path = f"{self.cache_path}.tmp"
+            with open(tmp_path, "wb") as f:
+                marshal.dump(
+                    (
+                        signature,
+                        self.emojis,
+                        self.names,
+                        self.slugs,
+                        self.groups,
+                        self.tokens,
+                        [posting.tobytes() for posting in self.postings],
+                    ),
+                    f,
+                )
+            os.replace(tmp_path, self.cache_path)
+        except Exception as e:
+            print(f"Error writing emoji index cache: {e}")
+
+    def _prepare(self):
+        """Derive lookup tables that are cheaper to compute than to store."""
+        self.positions = {emoji: i for i, emoji in enumerate(self.emojis)}
+        names = [name.lower() for name in self.names]
+        groups = [group.lower() for group in self.groups]
+        self.columns = {
+            "name": names,
+            "slug": [slug.lower() for slug in self.slugs],
+            "group": groups,
+            "keywords": [f"{n} {g}" for n, g in zip(names, groups)],
+        }
+
+    def lookup(self, query: str) -> Optional[Set[int]]:
+        """
+        Find emojis with a token starting with every word of the query.
+
+        Returns:
+            Matching positions, or None if the query has no indexable words
+        """
+        words = _tokenize(query)
+        if not words:
+            return None
+
+        matches: Optional[Set[int]] = None
+        # Most selective (longest) words first, to keep intersections small
+        for word in sorted(words, key=len, reverse=True):
+            found: Set[int] = set()
+            i = bisect_left(self.tokens, word)
+            while i < len(self.tokens) and self.tokens[i].startswith(word):
+                found.update(self.postings[i])
+                i += 1
+            matches = found if matches is None else matches & found
+            if not matches:
+                break
+        return matches
+
+    def get_info(self, position: int) -> Dict[str, str]:
+        return {"name": self.names[position], "group": self.groups[position]}
+
+    def __len__(self):
+        return len(self.emojis)
+
 
 class EmojiPlugin(PluginBase):
     """
     Plugin for searching and copying emojis.
     """
 
+    supports_narrowing = True
+
     def __init__(self):
         super().__init__()
         self.name = "emoji"
         self.display_name = "Emoji"
         self.description = "Search and copy emojis"
-        self.emoji_data = {}
         self.emoji_path = get_relative_path("../../../config/assets/emoji.json")
+        self.index = EmojiIndex(self.emoji_path)
 
         # Use cache directory for recent emojis (save directly in cache dir)
         self.recent_emoji_path = os.path.join(data.CACHE_DIR, "recent_emoji.json")
@@ -32,24 +203,13 @@ class EmojiPlugin(PluginBase):
     def initialize(self):
         """Initialize the emoji plugin."""
         self.set_triggers(["em"])
-        self._load_emoji_data()
+        self.index.load()
         self._load_recent_emojis()
 
     def cleanup(self):
         """Cleanup the emoji plugin."""
         pass
 
-    def _load_emoji_data(self):
-        """Load emoji data from JSON file."""
-        try:
-            if os.path.exists(self.emoji_path):
-                with open(self.emoji_path, "r", encoding="utf-8") as f:
-                    self.emoji_data = json.load(f)
-            else:
-                print(f"Emoji file not found: {self.emoji_path}")
-        except Exception as e:
-            print(f"Error loading emoji data: {e}")
-
     def _load_recent_emojis(self):
         """Load recently used emojis from JSON file."""
         try:
@@ -116,56 +276,80 @@ class EmojiPlugin(PluginBase):
 
     def query(self, query_string: str) -> List[Result]:
         """Search emojis based on query."""
+        return self.query_narrowed(query_string)[0]
+
+    def query_narrowed(
+        self, query_string: str, candidates: Optional[List[int]] = None
+    ) -> Tuple[List[Result], Optional[List[int]]]:
+        """
+        Search emojis, rescoring only the positions that matched the previous
+        query if given.
+
+        Candidates come from the inverted index; only if no token matches is
+        every emoji scored, so fuzzy queries like "thmbs" still work. Only the
+        matches of such a full scan are returned for narrowing, so narrowed
+        results are always those of a fresh query.
+        """
         results = []
         query = query_string.lower().strip()
+        index = self.index
 
         # If no query, show recently used emojis
         if not query:
             if self.recent_emojis:
                 # Show recent emojis in reverse order (most recent first)
-                for emoji in reversed(list(self.recent_emojis.keys())):
-                    if emoji in self.emoji_data:
-                        emoji_info = self.emoji_data[emoji]
-                        results.append(
-                            self._create_emoji_result(emoji, emoji_info, 1.0)
-                        )
+                emojis = reversed(list(self.recent_emojis.keys()))
             else:
                 # If no recent emojis, show some popular ones as fallback
-                popular_emojis = ["😀", "👍", "❤️", "🎉", "🔥", "✨", "🚀", "🌈"]
-                for emoji in popular_emojis:
-                    if emoji in self.emoji_data:
-                        emoji_info = self.emoji_data[emoji]
-                        results.append(
-                            self._create_emoji_result(emoji, emoji_info, 1.0)
-                        )
-            return results
-
-        # Search by name, group, or the emoji itself
-        for emoji, info in self.emoji_data.items():
-            relevance = 0
-            name = info.get("name", "").lower()
-            group = info.get("group", "").lower()
-            slug = info.get("slug", "").lower()
-
-            # Exact match with emoji
-            if query == emoji:
-                relevance = 1.0
-            # Name contains query
-            elif query in name:
-                relevance = 0.9
-            # Slug contains query
-            elif query in slug:
-                relevance = 0.8
-            # Group contains query
-            elif query in group:
-                relevance = 0.7
-
-            if relevance > 0:
-                results.append(self._create_emoji_result(emoji, info, relevance))
-
-        # Sort by relevance
-        results.sort(key=lambda x: x.relevance, reverse=True)
-        return results[:20]  # Limit to 20 results
+                emojis = ["😀", "👍", "❤️", "🎉", "🔥", "✨", "🚀", "🌈"]
+            for emoji in emojis:
+                position = index.positions.get(emoji)
+                if position is not None:
+                    results.append(
+                        self._create_emoji_result(emoji, index.get_info(position), 1.0)
+                    )
+            return results, None
+
+        # Exact match with the emoji itself
+        scores = {}
+        if query in index.positions:
+            scores[index.positions[query]] = (1.0, ())
+
+        found = index.lookup(query)
+        # Only a full scan's matches are a superset of a longer query's full
+        # scan matches; token lookups are cheap and redone every time
+        full_scan = not found
+        if found:
+            positions = sorted(found)
+        elif candidates is not None:
+            positions = candidates
+        else:
+            positions = range(len(index))
+        matched = set()
+
+        # Fuzzy score the candidates by name, slug, group and keywords
+        for field, weight in SEARCH_FIELDS:
+            full_column = index.columns.get(field, [])
+            column = [full_column[i] for i in positions]
+            for offset, match in score_batch(query, column):
+                position = positions[offset]
+                matched.add(position)
+                relevance = match.score * weight
+                if relevance > scores.get(position, (0.0, ()))[0]:
+                    # Only the name is shown as the title, so only it is highlighted
+                    highlight = match.positions if field == "name" else ()
+                    scores[position] = (relevance, highlight)
+
+        best = heapq.nlargest(MAX_RESULTS, scores.items(), key=lambda item: item[1][0])
+        for position, (relevance, highlight) in best:
+            result = self._create_emoji_result(
+                index.emojis[position], index.get_info(position), relevance
+            )
+            result.match_positions = highlight
+            results.append(result)
+
+        # Limited to MAX_RESULTS, best first
+        return results, sorted(matched) if full_scan else None
 
     def _create_emoji_result(self, emoji: str, info: Dict, relevance: float) -> Result:
         """Create a Result object for an emoji."""
@@ -184,4 +368,5 @@ class EmojiPlugin(PluginBase):
             relevance=relevance,
             plugin_name=self.display_name,
             data={"emoji": emoji, "name": name, "group": group, "recent": is_recent},
+            frecency_key=f"emoji:{emoji}",
         )
@@ -1,11 +1,12 @@
 import json
 import subprocess
-import threading
 import time
+import weakref
 from pathlib import Path
 from typing import Dict, List, Optional
 
 from fabric.utils import get_relative_path
+from gi.repository import GLib
 from modules.launcher.plugin_base import PluginBase
 from modules.launcher.result import Result
 from services.auth import (
@@ -16,6 +17,9 @@ from services.auth import (
     validate_base32_secret,
 )
 
+# Delay after a second boundary before updating, so the countdown has changed
+OTP_TICK_SLACK_MS = 5
+
 
 class OTPPlugin(PluginBase):
     """Plugin for managing TOTP (Time-based One-Time Password) codes."""
@@ -29,24 +33,25 @@ class OTPPlugin(PluginBase):
             get_relative_path("../../../config/assets/accounts.json")
         )
         self.secrets: Dict[str, Dict] = {}
-        self.last_update = 0
 
-        # Threading for auto-refresh
-        self.refresh_thread = None
-        self.stop_refresh = threading.Event()
+        # Rows showing codes, updated in place while they are on screen
+        self._live_rows = weakref.WeakSet()
+        self._tick_source = None
+        # {account: (time step, code)} of the codes last shown
+        self._codes: Dict[str, tuple] = {}
 
     def initialize(self):
         """Initialize the OTP plugin."""
         self.set_triggers(["otp"])
         self._load_secrets()
         self._ensure_config_file()
-        self._start_refresh_thread()
 
     def cleanup(self):
         """Cleanup the OTP plugin."""
-        if self.refresh_thread and self.refresh_thread.is_alive():
-            self.stop_refresh.set()
-            self.refresh_thread.join(timeout=1)
+        if self._tick_source:
+            GLib.source_remove(self._tick_source)
+            self._tick_source = None
+        self._live_rows = weakref.WeakSet()
 
     def _load_secrets(self):
         """Load secrets from JSON file."""
@@ -62,6 +67,7 @@ class OTPPlugin(PluginBase):
 
     def _save_secrets(self):
         """Save secrets to JSON file."""
+        self._codes.clear()
         try:
             self.secrets_file.parent.mkdir(parents=True, exist_ok=True)
             with open(self.secrets_file, "w", encoding="utf-8") as f:
@@ -76,142 +82,87 @@ class OTPPlugin(PluginBase):
             with open(self.secrets_file, "w", encoding="utf-8") as f:
                 json.dump({}, f, indent=2)
 
-    def _start_refresh_thread(self):
-        """Start background thread for auto-refreshing tokens."""
-
-        def refresh_loop():
-            while not self.stop_refresh.wait(5):
-                current_time = time.time()
-                if current_time - self.last_update >= 5:
-                    self.last_update = current_time
-                    # Only refresh if we have secrets and launcher is likely active
-                    if self.secrets:
-                        try:
-                            self._selective_force_refresh()
-                        except Exception:
-                            pass
-
-        self.refresh_thread = threading.Thread(target=refresh_loop, daemon=True)
-        self.refresh_thread.start()
-
-    def _selective_force_refresh(self):
-        """Update time display in existing OTP result items."""
-        try:
-            import gc
-
-            from gi.repository import GLib
-
-            def do_update():
-                try:
-                    for obj in gc.get_objects():
-                        if (
-                            hasattr(obj, "__class__")
-                            and obj.__class__.__name__ == "Launcher"
-                            and hasattr(obj, "results_box")
-                            and hasattr(obj, "visible")
-                            and obj.visible
-                            and hasattr(obj, "results")
-                            and obj.results
-                        ):
-                            has_otp_results = any(
-                                result.data and result.data.get("type") == "totp"
-                                for result in obj.results
-                                if hasattr(result, "data") and result.data
-                            )
-
-                            if has_otp_results:
-                                self._update_existing_result_labels(obj.results_box)
-                                return False
-                except Exception:
-                    pass
-                return False
-
-            GLib.idle_add(do_update)
-        except Exception:
-            pass
-
-    def _update_existing_result_labels(self, results_box):
-        """Update subtitle labels in existing ResultItem widgets."""
-        try:
-            time_display = self._get_time_remaining_with_blink()
-            for child in results_box.get_children():
-                if (
-                    hasattr(child, "__class__")
-                    and child.__class__.__name__ == "ResultItem"
-                    and hasattr(child, "result")
-                    and hasattr(child.result, "data")
-                    and child.result.data
-                    and child.result.data.get("type") == "totp"
-                ):
-                    self._update_result_item_content(child, time_display)
-        except Exception as e:
-            print(f"Error updating result labels: {e}")
-
-    def _update_result_item_content(self, result_item, time_display):
-        """Update both the title (OTP code) and subtitle (time display) of a specific ResultItem."""
-        try:
-            account_name = result_item.result.data.get("account", "")
-            if not account_name or account_name not in self.secrets:
-                return
-
-            account_data = self.secrets[account_name]
-            secret = account_data.get("secret", "")
-            issuer = account_data.get("issuer", "")
-            display_name = f"{issuer} - {account_name}" if issuer else account_name
-
-            current_totp_code = self._generate_totp(secret)
-            if not current_totp_code:
-                return
-
-            old_code = result_item.result.data.get("code", "")
-            if current_totp_code != old_code:
-                result_item.result.data["code"] = current_totp_code
-                self._find_and_update_title_label(result_item, current_totp_code)
-                result_item.result.action = (
-                    lambda code=current_totp_code: self._copy_to_clipboard(code)
-                )
+    def _on_row_bound(self, row):
+        """Track a row showing a code and keep it ticking."""
+        self._live_rows.add(row)
+        if self._tick_source is None:
+            self._schedule_tick()
+
+    def _schedule_tick(self):
+        """Wake up right after the next whole second, where countdowns change."""
+        delay_ms = 1000 - int((time.time() % 1) * 1000) + OTP_TICK_SLACK_MS
+        self._tick_source = GLib.timeout_add(delay_ms, self._on_tick)
+
+    def _on_tick(self):
+        """Update the countdown of visible codes, and the codes at period ends."""
+        self._tick_source = None
+        rows = [
+            row
+            for row in self._live_rows
+            if row.result is not None
+            and row.result.on_bind == self._on_row_bound
+            and row.get_mapped()
+        ]
+        if not rows:
+            # Launcher closed or showing other results; binding rows rearms
+            self._live_rows = weakref.WeakSet()
+            return False
+
+        now = time.time()
+        codes = self._get_codes({row.result.data["account"] for row in rows}, now)
+        for row in rows:
+            account_name = row.result.data["account"]
+            code = codes.get(account_name)
+            if code is None:
+                continue
+            self._update_totp_result(row.result, code, now)
+            row.refresh_text()
+
+        self._schedule_tick()
+        return False
+
+    def _get_codes(self, account_names, now: float) -> Dict[str, str]:
+        """
+        Get the codes of some accounts at a time, in one batch.
+
+        Codes are only generated again once an account's period has rolled
+        over since they were last shown.
+        """
+        codes = {}
+        for account_name in account_names:
+            account_data = self.secrets.get(account_name)
+            if not account_data:
+                continue
+            step = int(now) // self._get_period(account_data)
+            cached = self._codes.get(account_name)
+            if cached and cached[0] == step:
+                codes[account_name] = cached[1]
+                continue
+            code = self._generate_totp(account_data, now)
+            if code:
+                self._codes[account_name] = (step, code)
+                codes[account_name] = code
+        return codes
+
+    def _update_totp_result(self, result: Result, code: str, now: float):
+        """Show a new code and countdown in a code result."""
+        account_name = result.data["account"]
+        account_data = self.secrets.get(account_name, {})
+        if code != result.data.get("code"):
+            result.title = code
+            result.data["code"] = code
+            result.action = lambda code=code: self._copy_to_clipboard(code)
+        result.subtitle_markup = self._get_totp_subtitle(
+            account_name, account_data, now
+        )
 
-            new_subtitle_markup = f"{display_name} • {time_display} remaining"
-            self._find_and_update_subtitle_label(result_item, new_subtitle_markup)
-        except Exception as e:
-            print(f"Error updating result item: {e}")
-
-    def _find_and_update_title_label(self, result_item, new_title):
-        """Find the title label widget and update its text."""
-
-        def find_title_label(widget):
-            if hasattr(widget, "get_name") and widget.get_name() == "result-item-title":
-                return widget
-            if hasattr(widget, "get_children"):
-                for child in widget.get_children():
-                    found = find_title_label(child)
-                    if found:
-                        return found
-            return None
-
-        title_label = find_title_label(result_item)
-        if title_label and hasattr(title_label, "set_label"):
-            title_label.set_label(new_title)
-
-    def _find_and_update_subtitle_label(self, result_item, new_markup):
-        """Find the subtitle label widget and update its markup."""
-
-        def find_subtitle_label(widget):
-            if (
-                hasattr(widget, "get_name")
-                and widget.get_name() == "result-item-subtitle"
-            ):
-                return widget
-            if hasattr(widget, "get_children"):
-                for child in widget.get_children():
-                    found = find_subtitle_label(child)
-                    if found:
-                        return found
-            return None
-
-        subtitle_label = find_subtitle_label(result_item)
-        if subtitle_label and hasattr(subtitle_label, "set_markup"):
-            subtitle_label.set_markup(new_markup)
+    def _get_totp_subtitle(
+        self, account_name: str, account_data: Dict, now: Optional[float] = None
+    ) -> str:
+        issuer = account_data.get("issuer", "")
+        display_name = f"{issuer} - {account_name}" if issuer else account_name
+        time_display = self._get_time_remaining_with_blink(account_data, now)
+        return f"{display_name} • {time_display} remaining • Shift+Enter: remove"
 
     def _copy_to_clipboard(self, text: str):
         """Copy text to clipboard."""
@@ -229,55 +180,8 @@ class OTPPlugin(PluginBase):
 
     def _trigger_refresh(self):
         """Trigger launcher refresh to return to default OTP view."""
-        try:
-            from gi.repository import GLib
-
-            # Use a small delay to ensure the action completes first
-            def trigger_refresh():
-                try:
-                    # Try to access the launcher through the fabric Application
-                    from fabric import Application
-
-                    app = Application.get_default()
-
-                    if app and hasattr(app, "launcher"):
-                        launcher = app.launcher
-                        if launcher and hasattr(launcher, "search_entry"):
-                            # Clear the search entry and set it to just "otp "
-                            launcher.search_entry.set_text("otp ")
-                            # Position cursor at the end
-                            launcher.search_entry.set_position(-1)
-                            # Trigger the search to show default OTP view
-                            if hasattr(launcher, "_perform_search"):
-                                launcher._perform_search("otp ")
-                            return False
-
-                    # Fallback: try to find launcher instance through other means
-                    import gc
-
-                    for obj in gc.get_objects():
-                        if (
-                            hasattr(obj, "__class__")
-                            and obj.__class__.__name__ == "Launcher"
-                        ):
-                            if hasattr(obj, "search_entry") and hasattr(
-                                obj, "_perform_search"
-                            ):
-                                obj.search_entry.set_text("otp ")
-                                obj.search_entry.set_position(-1)
-                                obj._perform_search("otp ")
-                                return False
-
-                except Exception as e:
-                    print(f"Error forcing launcher refresh: {e}")
-
-                return False  # Don't repeat
-
-            # Use a small delay to ensure the action completes first
-            GLib.timeout_add(50, trigger_refresh)
-
-        except Exception as e:
-            print(f"Could not trigger refresh: {e}")
+        if self.host:
+            self.host.set_query("otp ")
 
     def _remove_account_and_refresh(self, account_name: str):
         """Remove an account and trigger refresh to return to default OTP view."""
@@ -292,13 +196,27 @@ class OTPPlugin(PluginBase):
         except Exception as e:
             print(f"Error removing account {account_name}: {e}")
 
-    def _generate_totp(self, secret: str) -> Optional[str]:
-        """Generate TOTP code from secret."""
-        return generate_totp(secret)
+    def _get_period(self, account_data: Dict) -> int:
+        """Get an account's period, falling back to 30s for invalid ones."""
+        period = account_data.get("period", 30)
+        return period if isinstance(period, int) and period > 0 else 30
+
+    def _generate_totp(
+        self, account_data: Dict, for_time: Optional[float] = None
+    ) -> Optional[str]:
+        """Generate the TOTP code of an account."""
+        return generate_totp(
+            account_data.get("secret", ""),
+            digits=account_data.get("digits", 6),
+            period=self._get_period(account_data),
+            for_time=for_time,
+        )
 
-    def _get_time_remaining_with_blink(self) -> str:
-        """Get time remaining with blinking effect."""
-        return get_time_remaining_with_blink()
+    def _get_time_remaining_with_blink(
+        self, account_data: Dict, now: Optional[float] = None
+    ) -> str:
+        """Get time remaining of an account's code with blinking effect."""
+        return get_time_remaining_with_blink(self._get_period(account_data), now)
 
     def query(self, query_string: str) -> List[Result]:
         """Process OTP queries."""
@@ -408,25 +326,24 @@ class OTPPlugin(PluginBase):
             )
             return results
 
-        time_display = self._get_time_remaining_with_blink()
+        now = time.time()
+        codes = self._get_codes(self.secrets, now)
 
         for account_name, account_data in self.secrets.items():
-            secret = account_data.get("secret", "")
-            issuer = account_data.get("issuer", "")
-            totp_code = self._generate_totp(secret)
+            totp_code = codes.get(account_name)
 
             if totp_code:
-                display_name = f"{issuer} - {account_name}" if issuer else account_name
                 results.append(
                     Result(
                         title=f"{totp_code}",
-                        subtitle_markup=f"{display_name} • {
-                            time_display
-                        } remaining • Shift+Enter: remove",
+                        subtitle_markup=self._get_totp_subtitle(
+                            account_name, account_data, now
+                        ),
                         icon_name="gtk-authentication-symbolic",
                         action=lambda code=totp_code: self._copy_to_clipboard(code),
                         relevance=1.0,
                         plugin_name=self.display_name,
+                        on_bind=self._on_row_bound,
                         data={
                             "type": "totp",
                             "account": account_name,
@@ -466,27 +383,21 @@ class OTPPlugin(PluginBase):
             account_lower = account_name.lower()
 
             if query_lower in account_lower or query_lower in issuer:
-                secret = account_data.get("secret", "")
-                totp_code = self._generate_totp(secret)
+                now = time.time()
+                totp_code = self._get_codes([account_name], now).get(account_name)
 
                 if totp_code:
-                    display_name = (
-                        f"{account_data.get('issuer', '')} - {account_name}"
-                        if account_data.get("issuer")
-                        else account_name
-                    )
-                    time_display = self._get_time_remaining_with_blink()
-
                     results.append(
                         Result(
                             title=f"{totp_code}",
-                            subtitle_markup=f"{display_name} • {
-                                time_display
-                            } remaining • Shift+Enter: remove",
+                            subtitle_markup=self._get_totp_subtitle(
+                                account_name, account_data, now
+                            ),
                             icon_name="gtk-authentication-symbolic",
                             action=lambda code=totp_code: self._copy_to_clipboard(code),
                             relevance=1.0,
                             plugin_name=self.display_name,
+                            on_bind=self._on_row_bound,
                             data={
                                 "type": "totp",
                                 "account": account_name,
@@ -676,17 +587,16 @@ class OTPPlugin(PluginBase):
                     )
                 )
 
-                # Get time display for consistency with main OTP view
-                time_display = self._get_time_remaining_with_blink()
+                now = time.time()
+                codes = self._get_codes(self.secrets, now)
 
                 # Show all accounts with their current OTP codes and remove actions
                 for acc_name, account_data in self.secrets.items():
-                    secret = account_data.get("secret", "")
-                    issuer = account_data.get("issuer", "")
-                    display_name = f"{issuer} - {acc_name}" if issuer else acc_name
-
-                    # Generate current TOTP code
-                    totp_code = self._generate_totp(secret)
+                    # Get time display for consistency with main OTP view
+                    time_display = self._get_time_remaining_with_blink(
+                        account_data, now
+                    )
+                    totp_code = codes.get(acc_name)
 
                     if totp_code:
                         results.append(
@@ -177,20 +177,20 @@ class PasswordPlugin(PluginBase):
         self._cache_timestamps: Dict[str, float] = {}
         self._cache_ttl = 5  # Cache results for 5 seconds
 
-        # Track launcher state for auto-hiding passwords
-        self._launcher_instance = None
-
     def initialize(self):
         """Initialize the password plugin."""
         self.set_triggers(["pass"])
-        self._setup_launcher_hooks()
+        # Never leave passwords revealed for the next session
+        if self.host:
+            self.host.add_close_listener(self._hide_all_passwords)
 
     def cleanup(self):
         """Cleanup the password plugin."""
         self.revealed_passwords.clear()
         self._results_cache.clear()
         self._cache_timestamps.clear()
-        self._cleanup_launcher_hooks()
+        if self.host:
+            self.host.remove_close_listener(self._hide_all_passwords)
 
     def query(self, query_string: str) -> List[Result]:
         """Process password manager queries with caching."""
@@ -601,45 +601,6 @@ class PasswordPlugin(PluginBase):
             # Clear cache to force refresh with hidden passwords
             self._results_cache.clear()
 
-    def _setup_launcher_hooks(self):
-        """Setup hooks to monitor launcher state."""
-        try:
-            # Try to find the launcher instance
-            import gc
-
-            for obj in gc.get_objects():
-                if (
-                    hasattr(obj, "__class__")
-                    and obj.__class__.__name__ == "Launcher"
-                    and hasattr(obj, "close_launcher")
-                ):
-                    self._launcher_instance = obj
-                    # Store original close_launcher method
-                    self._original_close_launcher = obj.close_launcher
-                    # Replace with our wrapper
-                    obj.close_launcher = self._wrapped_close_launcher
-                    break
-        except Exception as e:
-            print(f"Warning: Could not setup launcher hooks: {e}")
-
-    def _cleanup_launcher_hooks(self):
-        """Cleanup launcher hooks."""
-        try:
-            if self._launcher_instance and hasattr(self, "_original_close_launcher"):
-                # Restore original close_launcher method
-                self._launcher_instance.close_launcher = self._original_close_launcher
-                self._launcher_instance = None
-        except Exception as e:
-            print(f"Warning: Could not cleanup launcher hooks: {e}")
-
-    def _wrapped_close_launcher(self):
-        """Wrapper for launcher close that hides passwords."""
-        # Hide all passwords when launcher closes
-        self._hide_all_passwords()
-        # Call original close_launcher method
-        if hasattr(self, "_original_close_launcher"):
-            self._original_close_launcher()
-
     def _toggle_password_visibility(self, name: str):
         """Toggle password visibility when Shift+Enter is pressed."""
         if name in self.revealed_passwords:
@@ -665,26 +626,5 @@ class PasswordPlugin(PluginBase):
 
     def _force_launcher_refresh(self):
         """Force the launcher to refresh and show updated results."""
-        try:
-            if self._launcher_instance and hasattr(
-                self._launcher_instance, "_perform_search"
-            ):
-                # Get current search text
-                current_text = ""
-                if hasattr(self._launcher_instance, "search_entry"):
-                    current_text = self._launcher_instance.search_entry.get_text()
-
-                # Trigger a search to refresh results
-                try:
-                    from gi.repository import GLib
-
-                    def refresh():
-                        self._launcher_instance._perform_search(current_text)
-                        return False
-
-                    GLib.timeout_add(50, refresh)
-                except ImportError:
-                    # Fallback: direct call if GLib not available
-                    self._launcher_instance._perform_search(current_text)
-        except Exception as e:
-            print(f"Could not force launcher refresh: {e}")
+        if self.host:
+            self.host.request_refresh()
@@ -1,59 +1,10 @@
 import re
-import subprocess
-import threading
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional
+from typing import List, Optional
 
 from modules.launcher.plugin_base import PluginBase
 from modules.launcher.result import Result
-
-
-class Reminder:
-    """
-    Represents a single reminder with its timer and metadata.
-    """
-
-    def __init__(
-        self,
-        reminder_id: int,
-        message: str,
-        target_time: datetime,
-        timer: threading.Timer,
-    ):
-        self.id = reminder_id
-        self.message = message
-        self.target_time = target_time
-        self.timer = timer
-        self.created_time = datetime.now()
-
-    def cancel(self):
-        """Cancel this reminder."""
-        if self.timer:
-            self.timer.cancel()
-
-    def get_time_remaining(self) -> str:
-        """Get formatted time remaining until reminder."""
-        now = datetime.now()
-        if self.target_time <= now:
-            return "Overdue"
-
-        delta = self.target_time - now
-        total_seconds = int(delta.total_seconds())
-
-        if total_seconds < 60:
-            return f"{total_seconds}s"
-        elif total_seconds < 3600:
-            minutes = total_seconds // 60
-            seconds = total_seconds % 60
-            return f"{minutes}m {seconds}s" if seconds > 0 else f"{minutes}m"
-        else:
-            hours = total_seconds // 3600
-            minutes = (total_seconds % 3600) // 60
-            return f"{hours}h {minutes}m" if minutes > 0 else f"{hours}h"
-
-    def get_target_time_str(self) -> str:
-        """Get formatted target time."""
-        return self.target_time.strftime("%H:%M")
+from services.reminders import Reminder, ReminderScheduler, send_notification
 
 
 class RemindersPlugin(PluginBase):
@@ -65,8 +16,10 @@ class RemindersPlugin(PluginBase):
         super().__init__()
         self.display_name = "Reminders"
         self.description = "Set time-based reminders with notifications"
-        self.reminders: Dict[int, Reminder] = {}
-        self.next_id = 1
+        # Persisted reminders, started with the shell so they fire even
+        # before this plugin is loaded
+        self.scheduler = ReminderScheduler.get_initial()
+        self._scheduler_handler = None
 
         # Regex patterns for time parsing
         self.time_patterns = {
@@ -81,23 +34,22 @@ class RemindersPlugin(PluginBase):
     def initialize(self):
         """Initialize the reminders plugin."""
         self.set_triggers(["remind"])
+        self.scheduler.start()
+        self._scheduler_handler = self.scheduler.connect(
+            "changed", self._on_reminders_fired
+        )
 
     def cleanup(self):
         """Cleanup the reminders plugin."""
-        # Cancel all active reminders
-        for reminder in self.reminders.values():
-            reminder.cancel()
-        self.reminders.clear()
-
-    def _send_notification(self, title: str, message: str):
-        """Send a desktop notification using notify-send."""
-        try:
-            subprocess.run(
-                ["notify-send", "-a", "Reminders", "-i", "alarm-clock", title, message],
-                check=False,
-            )
-        except Exception as e:
-            print(f"Failed to send notification: {e}")
+        # Pending reminders are kept, the scheduler outlives the plugin
+        if self._scheduler_handler is not None:
+            self.scheduler.disconnect(self._scheduler_handler)
+            self._scheduler_handler = None
+
+    def _on_reminders_fired(self, *_args):
+        """Drop fired reminders from a shown list."""
+        if self.host and self.host.is_visible():
+            self.host.request_refresh()
 
     def _parse_time_input(self, time_str: str) -> Optional[datetime]:
         """
@@ -170,50 +122,14 @@ class RemindersPlugin(PluginBase):
         if not target_time:
             return None
 
-        # Calculate delay in seconds
-        delay = (target_time - datetime.now()).total_seconds()
-        if delay <= 0:
+        if target_time <= datetime.now():
             return None
 
-        # Create timer that will trigger the notification
-        timer = threading.Timer(delay, self._trigger_reminder, [self.next_id, message])
-
-        # Create reminder object
-        reminder = Reminder(self.next_id, message, target_time, timer)
-
-        # Store reminder and start timer
-        self.reminders[self.next_id] = reminder
-        timer.start()
-
-        # Increment ID for next reminder
-        self.next_id += 1
-
-        return reminder
-
-    def _trigger_reminder(self, reminder_id: int, message: str):
-        """Trigger a reminder notification and remove it from active reminders."""
-        # Send notification
-        self._send_notification("⏰ Reminder", message)
-
-        # Remove from active reminders
-        if reminder_id in self.reminders:
-            del self.reminders[reminder_id]
+        return self.scheduler.add(message, target_time)
 
     def _cancel_reminder(self, reminder_id: Optional[int] = None) -> int:
         """Cancel a specific reminder or all reminders. Returns number of cancelled reminders."""
-        if reminder_id is not None:
-            if reminder_id in self.reminders:
-                self.reminders[reminder_id].cancel()
-                del self.reminders[reminder_id]
-                return 1
-            return 0
-        else:
-            # Cancel all reminders
-            count = len(self.reminders)
-            for reminder in self.reminders.values():
-                reminder.cancel()
-            self.reminders.clear()
-            return count
+        return self.scheduler.cancel(reminder_id)
 
     def _format_time_remaining(self, total_seconds: float) -> str:
         """Format time remaining in a human-readable way."""
@@ -235,11 +151,11 @@ class RemindersPlugin(PluginBase):
         reminder = self._create_reminder(time_str, message)
         if reminder:
             time_remaining = reminder.get_time_remaining()
-            self._send_notification(
+            send_notification(
                 "✅ Reminder Created", f"Reminder set for {time_remaining}: {message}"
             )
         else:
-            self._send_notification(
+            send_notification(
                 "❌ Failed to Create Reminder", "The specified time may be in the past"
             )
 
@@ -250,7 +166,7 @@ class RemindersPlugin(PluginBase):
 
         if not query:
             # Show help and active reminders count
-            active_count = len(self.reminders)
+            active_count = len(self.scheduler)
             results.append(
                 Result(
                     title="Reminders Help",
@@ -290,7 +206,8 @@ class RemindersPlugin(PluginBase):
 
         # Handle list command
         if query.lower() in ["list", "ls", "show"]:
-            if not self.reminders:
+            reminders = self.scheduler.get_reminders()
+            if not reminders:
                 results.append(
                     Result(
                         title="No Active Reminders",
@@ -303,9 +220,7 @@ class RemindersPlugin(PluginBase):
                     )
                 )
             else:
-                for reminder in sorted(
-                    self.reminders.values(), key=lambda r: r.target_time
-                ):
+                for reminder in reminders:
                     time_remaining = reminder.get_time_remaining()
                     target_time = reminder.get_target_time_str()
 
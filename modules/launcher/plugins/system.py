@@ -1,224 +1,412 @@
-import json
+import marshal
 import os
 import shlex
+import stat
+import tempfile
 import threading
-import time
-from typing import List, Set, Union
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Set, Tuple, Union
+
+from gi.repository import Gio, GLib
 
 import config.data as data
 from fabric.utils import exec_shell_command_async
+from modules.launcher.fuzzy import score_batch
 from modules.launcher.plugin_base import PluginBase
 from modules.launcher.result import Result
 
+BIN_CACHE_FILE = os.path.join(data.CACHE_DIR, "system_binaries.bin")
+BIN_CACHE_VERSION = 1
+# JSON cache of earlier versions, replaced by BIN_CACHE_FILE
+LEGACY_BIN_CACHE_FILE = os.path.join(data.CACHE_DIR, "system_binaries.json")
+# Wait for bursts of file events (package installs) to settle before applying them
+BIN_UPDATE_DELAY_MS = 250
+MAX_RESULTS = 20
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+def _is_binary(path: str) -> bool:
+    """Whether a path is an executable regular file (symlinks are skipped)."""
+    try:
+        return stat.S_ISREG(os.lstat(path).st_mode) and os.access(path, os.X_OK)
+    except OSError:
+        return False
+
+
+def _scan_dir(path: str) -> Optional[Set[str]]:
+    """Names of the binaries in a directory, or None if it can't be read."""
+    binaries = set()
+    try:
+        # Use os.scandir for better performance than os.listdir
+        with os.scandir(path) as entries:
+            for entry in entries:
+                if entry.is_file(follow_symlinks=False) and os.access(
+                    entry.path, os.X_OK
+                ):
+                    binaries.add(entry.name)
+    except OSError:
+        return None
+    return binaries
+
+
+class BinaryIndex:
+    """
+    Immutable search structures over a set of binary names.
+
+    Names are sorted by their lowercase form, so a prefix is a bisect range,
+    and every trigram of a name maps to the (ascending) positions of the
+    names containing it, so substring candidates are a posting intersection.
+    Updates build a new index and swap it in, readers never see a partial one.
+    """
+
+    def __init__(self, names: Iterable[str] = ()):
+        pairs = sorted((name.lower(), name) for name in names)
+        self.names_lower = [lower for lower, _ in pairs]
+        self.names = [name for _, name in pairs]
+        self.trigrams: Dict[str, List[int]] = {}
+        for position, lower in enumerate(self.names_lower):
+            for gram in _trigrams(lower):
+                self.trigrams.setdefault(gram, []).append(position)
+
+    def __len__(self):
+        return len(self.names)
+
+    def prefix_range(self, prefix: str) -> range:
+        """Positions of the names starting with a (lowercase) prefix."""
+        start = bisect_left(self.names_lower, prefix)
+        end = bisect_left(self.names_lower, prefix + "\U0010ffff", start)
+        return range(start, end)
+
+    def substring(self, needle: str) -> List[int]:
+        """Positions of the names containing a (lowercase) string."""
+        if len(needle) < 3:
+            return [
+                position
+                for position, lower in enumerate(self.names_lower)
+                if needle in lower
+            ]
+
+        postings = sorted(
+            (self.trigrams.get(gram, ()) for gram in _trigrams(needle)), key=len
+        )
+        if not postings[0]:
+            return []
+        candidates = set(postings[0]).intersection(*postings[1:])
+        return sorted(
+            position for position in candidates if needle in self.names_lower[position]
+        )
+
 
 class SystemPlugin(PluginBase):
     """
     Plugin for system commands and actions.
     """
 
+    supports_narrowing = True
+
     def __init__(self):
         super().__init__()
         self.display_name = "System"
         self.description = "System commands and actions"
 
-        # JSON cache file for system binaries
-        self.bin_cache_file = os.path.join(data.CACHE_DIR, "system_binaries.json")
+        # Binary cache file: per directory mtime and binary names
+        self.bin_cache_file = BIN_CACHE_FILE
 
-        # In-memory cache for system binaries
-        self._bin_cache: Set[str] = set()
-        self._last_bin_update = 0
-        self._bin_update_interval = 300  # 5 minutes
+        # Binaries of every $PATH directory, kept current by directory watchers
+        self._path_dirs: List[str] = []
+        self._dir_bins: Dict[str, Set[str]] = {}
+        self._dir_mtimes: Dict[str, int] = {}
+        self._index = BinaryIndex()
+        self._index_generation = 0
 
-        # Background cache building
-        self._cache_building = False
-        self._cache_thread = None
+        self._monitors: List[Gio.FileMonitor] = []
+        self._pending_names: Dict[str, Set[str]] = {}
+        self._update_source_id = None
+        self._scan_thread = None
 
     def initialize(self):
         """Initialize the system plugin."""
         self.set_triggers(["bin"])
+        self._path_dirs = self._get_path_dirs()
         self._load_bin_cache()
-        self._start_background_cache_update()
+        self._publish(save=False)
+        self._start_monitors()
+
+        # Rescan only directories that changed since the cache was written
+        self._scan_thread = threading.Thread(target=self._scan_stale_dirs, daemon=True)
+        self._scan_thread.start()
 
     def cleanup(self):
         """Cleanup the system plugin."""
-        self._bin_cache.clear()
-        if self._cache_thread and self._cache_thread.is_alive():
-            # Note: We don't join the thread to avoid blocking cleanup
-            pass
+        for monitor in self._monitors:
+            monitor.cancel()
+        self._monitors.clear()
+        if self._update_source_id:
+            GLib.source_remove(self._update_source_id)
+            self._update_source_id = None
+        self._pending_names.clear()
+        self._dir_bins.clear()
+        self._index_generation += 1
+        self._index = BinaryIndex()
+
+    def _get_path_dirs(self) -> List[str]:
+        """Unique $PATH directories, in order."""
+        dirs = []
+        for path in os.environ.get("PATH", "").split(":"):
+            # Skip empty paths and duplicates
+            if path and path not in dirs:
+                dirs.append(path)
+        return dirs
 
     def _load_bin_cache(self):
-        """Load binary cache from JSON file."""
+        """Load the binary cache with a single read."""
         try:
-            if os.path.exists(self.bin_cache_file):
-                with open(self.bin_cache_file, "r", encoding="utf-8") as f:
-                    cache_data = json.load(f)
-                    self._bin_cache = set(cache_data.get("binaries", []))
-                    self._last_bin_update = cache_data.get("last_update", 0)
-            else:
-                print(
-                    "SystemPlugin: No cache file found, will build cache in background"
-                )
-        except Exception as e:
+            os.remove(LEGACY_BIN_CACHE_FILE)
+        except OSError:
+            pass
+        try:
+            with open(self.bin_cache_file, "rb") as f:
+                cached = marshal.load(f)
+        except FileNotFoundError:
+            print("SystemPlugin: No cache file found, will build cache in background")
+            return
+        except (OSError, EOFError, ValueError, TypeError) as e:
             print(f"SystemPlugin: Error loading binary cache: {e}")
-            self._bin_cache = set()
-            self._last_bin_update = 0
+            return
 
-    def _save_bin_cache(self):
-        """Save binary cache to JSON file."""
+        if not isinstance(cached, dict) or cached.get("version") != BIN_CACHE_VERSION:
+            return
+        for path, (mtime_ns, names) in cached.get("dirs", {}).items():
+            if path in self._path_dirs:
+                self._dir_bins[path] = set(names)
+                self._dir_mtimes[path] = mtime_ns
+
+    def _save_bin_cache(self, dirs: Dict[str, Tuple[int, List[str]]]):
+        """Save binary cache to disk."""
         try:
             # Ensure the cache directory exists
             os.makedirs(data.CACHE_DIR, exist_ok=True)
-
-            cache_data = {
-                "binaries": sorted(list(self._bin_cache)),
-                "last_update": self._last_bin_update,
-                "cache_version": "1.0",
-            }
-
-            with open(self.bin_cache_file, "w", encoding="utf-8") as f:
-                json.dump(cache_data, f, indent=2)
+            # A temp file of its own, as rescans may save concurrently
+            fd, tmp_path = tempfile.mkstemp(
+                dir=os.path.dirname(self.bin_cache_file),
+                prefix="system_binaries.",
+                suffix=".tmp",
+            )
         except Exception as e:
             print(f"SystemPlugin: Error saving binary cache: {e}")
-
-    def _start_background_cache_update(self):
-        """Start background thread to update binary cache."""
-        current_time = time.time()
-
-        # Check if cache needs updating
-        if (
-            current_time - self._last_bin_update > self._bin_update_interval
-            or not self._bin_cache
-        ):
-            if not self._cache_building:
-                self._cache_building = True
-                self._cache_thread = threading.Thread(
-                    target=self._build_bin_cache_background, daemon=True
+            return
+        try:
+            with os.fdopen(fd, "wb") as f:
+                marshal.dump({"version": BIN_CACHE_VERSION, "dirs": dirs}, f)
+            os.replace(tmp_path, self.bin_cache_file)
+        except Exception as e:
+            print(f"SystemPlugin: Error saving binary cache: {e}")
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def _scan_stale_dirs(self):
+        """Rescan $PATH directories whose mtime differs from the cached one."""
+        rescanned = {}
+        for path in self._path_dirs:
+            try:
+                mtime_ns = os.stat(path).st_mtime_ns
+            except OSError:
+                rescanned[path] = (0, None)
+                continue
+            if self._dir_mtimes.get(path) == mtime_ns and path in self._dir_bins:
+                continue
+            rescanned[path] = (mtime_ns, _scan_dir(path))
+
+        if rescanned:
+            GLib.idle_add(self._apply_rescanned, rescanned)
+
+    def _apply_rescanned(
+        self, rescanned: Dict[str, Tuple[int, Optional[Set[str]]]]
+    ) -> bool:
+        for path, (mtime_ns, names) in rescanned.items():
+            if names is None:
+                self._dir_bins.pop(path, None)
+                self._dir_mtimes.pop(path, None)
+            else:
+                self._dir_bins[path] = names
+                self._dir_mtimes[path] = mtime_ns
+        self._publish()
+        return False  # Don't repeat
+
+    def _start_monitors(self):
+        """Watch every $PATH directory for added and removed binaries."""
+        for path in self._path_dirs:
+            if not os.path.isdir(path):
+                continue
+            try:
+                monitor = Gio.File.new_for_path(path).monitor_directory(
+                    Gio.FileMonitorFlags.WATCH_MOVES, None
                 )
-                self._cache_thread.start()
+            except GLib.Error as e:
+                print(f"SystemPlugin: Failed to monitor {path}: {e}")
+                continue
+            monitor.connect("changed", self._on_dir_changed, path)
+            self._monitors.append(monitor)
+
+    def _on_dir_changed(self, _monitor, file, other_file, _event_type, path: str):
+        """Queue changed names; whether they are binaries is checked when applied."""
+        for changed in (file, other_file):
+            name = changed.get_basename() if changed else None
+            if name:
+                self._pending_names.setdefault(path, set()).add(name)
+
+        if self._pending_names and not self._update_source_id:
+            self._update_source_id = GLib.timeout_add(
+                BIN_UPDATE_DELAY_MS, self._apply_pending
+            )
 
-    def _build_bin_cache_background(self):
-        """Build binary cache in background thread."""
-        try:
-            new_cache = set()
-            processed_paths = set()  # Avoid duplicate paths
-
-            for path in os.environ["PATH"].split(":"):
-                # Skip empty paths and duplicates
-                if not path or path in processed_paths:
-                    continue
-                processed_paths.add(path)
-
-                if os.path.exists(path) and os.path.isdir(path):
-                    try:
-                        # Use os.scandir for better performance than os.listdir
-                        with os.scandir(path) as entries:
-                            for entry in entries:
-                                if entry.is_file(follow_symlinks=False) and os.access(
-                                    entry.path, os.X_OK
-                                ):
-                                    new_cache.add(entry.name)
-                    except (PermissionError, FileNotFoundError, OSError):
-                        continue
-
-            # Update cache atomically
-            self._bin_cache = new_cache
-            self._last_bin_update = time.time()
-
-            # Save to disk
-            self._save_bin_cache()
+    def _apply_pending(self) -> bool:
+        """Apply queued add/remove deltas and publish a new index."""
+        self._update_source_id = None
+        pending, self._pending_names = self._pending_names, {}
+
+        for path, names in pending.items():
+            binaries = self._dir_bins.setdefault(path, set())
+            for name in names:
+                if _is_binary(os.path.join(path, name)):
+                    binaries.add(name)
+                else:
+                    binaries.discard(name)
+            try:
+                self._dir_mtimes[path] = os.stat(path).st_mtime_ns
+            except OSError:
+                self._dir_mtimes.pop(path, None)
+
+        self._publish()
+        return False  # Don't repeat
+
+    def _publish(self, save: bool = True):
+        """Build a new index from the current directories off the main loop."""
+        self._index_generation += 1
+        generation = self._index_generation
+        names = set().union(*self._dir_bins.values())
+        dirs = (
+            {
+                path: (self._dir_mtimes.get(path, 0), sorted(binaries))
+                for path, binaries in self._dir_bins.items()
+            }
+            if save
+            else None
+        )
 
-        except Exception as e:
-            print(f"SystemPlugin: Error building binary cache: {e}")
-        finally:
-            self._cache_building = False
+        def build():
+            index = BinaryIndex(names)
+            # A newer update may have been published meanwhile
+            if generation == self._index_generation:
+                self._index = index
+            if dirs is not None:
+                self._save_bin_cache(dirs)
+
+        threading.Thread(target=build, daemon=True).start()
 
     def query(self, query_string: str) -> List[Result]:
         """Search for system commands matching the query."""
+        return self.query_narrowed(query_string)[0]
+
+    def query_narrowed(
+        self, query_string: str, candidates: Optional[tuple] = None
+    ) -> Tuple[List[Result], Optional[tuple]]:
+        """
+        Search for system commands.
+
+        Names are looked up by prefix (short queries) or substring through
+        the index, falling back to fuzzy subsequence matching over every
+        binary only when nothing contains the query.
+
+        Candidates are (index, match kind, positions) from the previous
+        query; they are ignored once the index has been replaced.
+        """
         query = query_string.strip()
 
         if not query:
-            return []
+            return [], None
 
         results = []
 
         # Parse the query to extract binary name and arguments
         query_parts = query.split()
         if not query_parts:
-            return []
+            return [], None
 
         binary_query = query_parts[0].lower()
         full_command = query  # Keep the original case and spacing
 
-        # Check system binaries
-        # Start background update if needed (non-blocking) - but only if cache is empty or very old
-        if not self._bin_cache or (
-            time.time() - self._last_bin_update > self._bin_update_interval
-        ):
-            self._start_background_cache_update()
-
-        # Optimize search with early termination and result limiting
-        exact_matches = []
-        prefix_matches = []
-        partial_matches = []
-        max_results = 20  # Limit total results for performance
-
-        for binary in self._bin_cache:
-            # Pre-compute lowercase once
-            binary_lower = binary.lower()
-
-            # Skip if no match at all
-            if binary_query not in binary_lower:
-                continue
-
-            # Categorize matches for better sorting
-            if binary_lower == binary_query:
-                # Exact match - highest priority
+        index = self._index
+        positions, kind = self._find_candidates(index, binary_query, candidates)
+
+        # Score only the candidates; every match narrows the next keystroke,
+        # but only the best are shown
+        matches = score_batch(
+            binary_query,
+            [index.names_lower[position] for position in positions],
+            originals=[index.names[position] for position in positions],
+        )
+        # In index order, so narrowed queries break score ties like fresh ones
+        matched = (index, kind, sorted(positions[offset] for offset, _ in matches))
+
+        for offset, match in matches[:MAX_RESULTS]:
+            binary = index.names[positions[offset]]
+            if match.score >= 1.0:
+                # Exact match - keep the arguments the user typed
                 display_command = full_command
-                command_to_execute = full_command
-                relevance = 1.0
-                exact_matches.append(
-                    (binary, display_command, command_to_execute, relevance)
-                )
-            elif binary_lower.startswith(binary_query):
-                # Prefix match - high priority
-                display_command = binary
-                command_to_execute = binary
-                relevance = 0.9
-                prefix_matches.append(
-                    (binary, display_command, command_to_execute, relevance)
-                )
             else:
-                # Partial match - lower priority
                 display_command = binary
-                command_to_execute = binary
-                relevance = 0.7
-                partial_matches.append(
-                    (binary, display_command, command_to_execute, relevance)
-                )
-
-            # Early termination if we have enough good matches
-            if len(exact_matches) + len(prefix_matches) >= max_results:
-                break
-
-        # Combine results in priority order
-        all_matches = exact_matches + prefix_matches + partial_matches
+            command_to_execute = display_command
 
-        # Convert to Result objects (limit to max_results)
-        for binary, display_command, command_to_execute, relevance in all_matches[
-            :max_results
-        ]:
             result = Result(
                 title=display_command,
                 subtitle=f"Execute: {display_command}",
                 icon_name="terminal",
+                match_positions=match.positions,
                 action=self._create_action(command_to_execute),
-                relevance=relevance,
+                relevance=match.score,
                 plugin_name=self.display_name,
                 data={"command": command_to_execute, "id": binary},
             )
             results.append(result)
 
-        return results  # Already sorted by priority
+        return results, matched  # Already sorted by score
+
+    def _find_candidates(
+        self, index: BinaryIndex, binary_query: str, candidates: Optional[tuple]
+    ) -> Tuple[List[int], str]:
+        """
+        Get the positions of the names worth scoring and how they matched.
+
+        Substring and fuzzy matches of a longer query are subsets of those of
+        its prefix, so they narrow; prefix ranges are a bisect anyway. Fuzzy
+        candidates are only reused while the fresh lookup still finds
+        nothing, so the results never depend on how the query was typed.
+        """
+        same_index = bool(candidates) and candidates[0] is index
+        if same_index and candidates[1] == "substring":
+            narrowed = [
+                position
+                for position in candidates[2]
+                if binary_query in index.names_lower[position]
+            ]
+            if narrowed:
+                return narrowed, "substring"
+
+        if len(binary_query) < 3:
+            positions, kind = list(index.prefix_range(binary_query)), "prefix"
+        else:
+            positions, kind = index.substring(binary_query), "substring"
+        if positions:
+            return positions, kind
+        if same_index and candidates[1] == "fuzzy":
+            return candidates[2], "fuzzy"
+        return list(range(len(index))), "fuzzy"
 
     def _create_action(self, command: Union[str, List[str]]):
         """Create an action function for the given command."""
@@ -170,6 +170,7 @@ class TmuxPlugin(PluginBase):
             action=lambda: self._attach_to_session(session_name),
             relevance=0.9,
             data={"type": "attach", "session": session_name},
+            frecency_key=f"tmux:{session_name}",
         )
 
     def _create_new_session_result(self, session_name: str = "") -> Result:
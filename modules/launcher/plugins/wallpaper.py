@@ -1,21 +1,28 @@
 import colorsys
-import hashlib
 import json
 import os
 import random
 import re
-import threading
+import shutil
 import time
-from typing import Dict, List, Optional
+from typing import Callable, List, Optional
 from loguru import logger
 
-from gi.repository import GdkPixbuf
-from PIL import Image
+from gi.repository import GdkPixbuf, GLib
 
 import config.data as data
 from fabric.utils.helpers import exec_shell_command_async
+from modules.launcher.icon_cache import IconCache, IconRef
 from modules.launcher.plugin_base import PluginBase
 from modules.launcher.result import Result
+from utils.image_index import ImageIndex, parse_aspect_ratio, parse_hex_color
+from utils.palettes import PaletteCache, templates_use_image
+from utils.thumbnails import Thumbnailer
+
+# Size of the thumbnails shown in result rows
+WALLPAPER_ICON_SIZE = 32
+# Dominant colors, luminance and dimensions of every wallpaper
+WALLPAPER_INDEX_FILE = os.path.join(data.CACHE_DIR, "wallpaper_index.json")
 
 
 class WallpaperPlugin(PluginBase):
@@ -28,8 +35,14 @@ class WallpaperPlugin(PluginBase):
         self.display_name = "Wallpaper"
         self.wallpapers = []
         self.cache_dir = f"{data.CACHE_DIR}/thumbs"
-        self.thumbnail_cache: Dict[str, Optional[GdkPixbuf.Pixbuf]] = {}
-        self.thumbnail_loading = set()  # Track which thumbnails are being loaded
+        # Renders every thumbnail size on a process pool, keyed by file version
+        self.thumbnailer = Thumbnailer(self.cache_dir, index_path=WALLPAPER_INDEX_FILE)
+        self._wallpaper_index: Optional[ImageIndex] = None
+        self._index_generation = -1
+        self.icon_cache = IconCache()
+        self._thumbnails_started = 0.0
+        # matugen source colors of the wallpapers, so applying one is instant
+        self.palettes = PaletteCache()
         self.schemes = {
             "scheme-tonal-spot": "Tonal Spot",
             "scheme-content": "Content",
@@ -45,13 +58,16 @@ class WallpaperPlugin(PluginBase):
         """Initialize the wallpaper plugin."""
         self.set_triggers(["wall"])
         self._load_wallpapers()
-        os.makedirs(self.cache_dir, exist_ok=True)
         # Start background thumbnail creation
         self._start_background_thumbnail_creation()
+        if self._get_matugen_state():
+            self._start_palette_precomputation()
 
     def cleanup(self):
         """Cleanup the wallpaper plugin."""
-        pass
+        self.thumbnailer.cleanup()
+        self.palettes.cleanup()
+        self.icon_cache.lru.clear()
 
     def _load_wallpapers(self):
         """Load available wallpapers from the wallpapers directory."""
@@ -101,6 +117,8 @@ class WallpaperPlugin(PluginBase):
 
             # Update matugen state
             config["matugen_enabled"] = enabled
+            if enabled:
+                self._start_palette_precomputation()
 
             # Write back to config file
             with open(data.CONFIG_FILE, "w") as f:
@@ -122,157 +140,134 @@ class WallpaperPlugin(PluginBase):
 
     def _clear_launcher_query(self):
         """Clear the launcher search query and reset to trigger."""
-        try:
-            # Try to access the launcher through the fabric Application
-            from gi.repository import GLib
-
-            from fabric import Application
-
-            app = Application.get_default()
-
-            if app and hasattr(app, "launcher"):
-                launcher = app.launcher
-                if launcher and hasattr(launcher, "search_entry"):
-
-                    def clear_and_refresh():
-                        # Clear the search entry to just the trigger
-                        launcher.search_entry.set_text("wall ")
-                        # Position cursor at the end
-                        launcher.search_entry.set_position(-1)
-                        # Trigger the search to show default wallpaper view
-                        if hasattr(launcher, "_perform_search"):
-                            launcher._perform_search("wall ")
-                        return False
-
-                    # Use a small delay to ensure the action completes first
-                    GLib.timeout_add(50, clear_and_refresh)
-                    return
-
-            # Fallback: try to find launcher instance through other means
-            import gc
-
-            for obj in gc.get_objects():
-                if hasattr(obj, "__class__") and obj.__class__.__name__ == "Launcher":
-                    if hasattr(obj, "search_entry") and hasattr(obj, "_perform_search"):
-
-                        def clear_and_refresh():
-                            obj.search_entry.set_text("wall ")
-                            obj.search_entry.set_position(-1)
-                            obj._perform_search("wall ")
-                            return False
-
-                        GLib.timeout_add(50, clear_and_refresh)
-                        return
+        if self.host:
+            self.host.set_query("wall ")
 
-        except Exception as e:
-            logger.error(f"Could not clear launcher query: {e}")
-
-    def _get_cache_path(self, filename: str) -> str:
-        """Get cache path for wallpaper thumbnail."""
-        file_hash = hashlib.md5(filename.encode("utf-8")).hexdigest()
-        return os.path.join(self.cache_dir, f"{file_hash}.png")
-
-    def _create_thumbnail(self, filename: str) -> str:
-        """Create thumbnail for wallpaper if it doesn't exist."""
-        full_path = os.path.join(data.WALLPAPERS_DIR, filename)
-        cache_path = self._get_cache_path(filename)
+    def _get_wallpaper_path(self, filename: str) -> str:
+        return os.path.join(data.WALLPAPERS_DIR, filename)
 
-        if not os.path.exists(cache_path):
-            try:
-                with Image.open(full_path) as img:
-                    # Use faster thumbnail creation with smaller size for better performance
-                    img.thumbnail((32, 32), Image.Resampling.LANCZOS)
-                    img.save(cache_path, "PNG", optimize=True)
-            except Exception as e:
-                logger.error(f"Error creating thumbnail for {filename}: {e}")
-                return None
+    def _get_wallpaper_index(self) -> ImageIndex:
+        """Get the color index of the wallpapers, rebuilt when metadata changed."""
+        generation = self.thumbnailer.metadata_generation
+        if self._wallpaper_index is None or self._index_generation != generation:
+            images = {}
+            for wallpaper in self.wallpapers:
+                metadata = self.thumbnailer.get_metadata(
+                    self._get_wallpaper_path(wallpaper)
+                )
+                if metadata:
+                    images[wallpaper] = metadata
+            self._wallpaper_index = ImageIndex(images)
+            self._index_generation = generation
+        return self._wallpaper_index
+
+    def _parse_index_filters(self, query: str) -> List[tuple]:
+        """
+        Parse a query made only of index filters, e.g. "#2e3440", "dark" or
+        "dark 21:9". Returns [] for any other query.
+        """
+        filters = []
+        for term in query.split():
+            rgb = parse_hex_color(term)
+            ratio = parse_aspect_ratio(term)
+            if rgb:
+                filters.append(("color", rgb))
+            elif term in ("dark", "light"):
+                filters.append(("luminance", term == "dark"))
+            elif ratio:
+                filters.append(("aspect", ratio))
+            else:
+                return []
+        # Rank by color when there is one
+        return sorted(filters, key=lambda item: item[0] != "color")
+
+    def _search_index(self, filters: List[tuple]) -> List[str]:
+        """Get wallpapers matching all filters, ranked by the first one."""
+        index = self._get_wallpaper_index()
+        ranked = None
+        for kind, value in filters:
+            if kind == "color":
+                matches = index.search_color(value)
+            elif kind == "luminance":
+                matches = index.search_luminance(dark=value)
+            else:
+                matches = index.search_aspect(value)
 
-        return cache_path
+            if ranked is None:
+                ranked = [name for name, _ in matches]
+            else:
+                names = {name for name, _ in matches}
+                ranked = [name for name in ranked if name in names]
+        return ranked or []
 
     def _start_background_thumbnail_creation(self):
-        """Start background thread to create thumbnails for all wallpapers."""
+        """Render missing thumbnails of all wallpapers on the process pool."""
+        self._thumbnails_started = time.monotonic()
+        self.thumbnailer.ensure(
+            [self._get_wallpaper_path(wallpaper) for wallpaper in self.wallpapers],
+            on_progress=self._on_thumbnail_progress,
+        )
+        # Nothing to render; drop thumbnails of removed wallpapers right away
+        self.thumbnailer.prune()
 
-        def create_thumbnails():
-            for wallpaper in self.wallpapers:
-                if wallpaper not in self.thumbnail_loading:
-                    self.thumbnail_loading.add(wallpaper)
-                    try:
-                        cache_path = self._create_thumbnail(wallpaper)
-                        if cache_path and os.path.exists(cache_path):
-                            # Load thumbnail into memory cache
-                            try:
-                                pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(
-                                    cache_path, 32, 32, True
-                                )
-                                self.thumbnail_cache[wallpaper] = pixbuf
-                            except Exception as e:
-                                logger.error(
-                                    f"Error loading thumbnail for {wallpaper}: {e}"
-                                )
-                                self.thumbnail_cache[wallpaper] = None
-                        else:
-                            self.thumbnail_cache[wallpaper] = None
-                    except Exception as e:
-                        logger.error(f"Error processing thumbnail for {wallpaper}: {e}")
-                        self.thumbnail_cache[wallpaper] = None
-                    finally:
-                        self.thumbnail_loading.discard(wallpaper)
-
-                    # Small delay to prevent overwhelming the system
-                    time.sleep(0.01)
-
-        # Start background thread
-        thread = threading.Thread(target=create_thumbnails, daemon=True)
-        thread.start()
-
-    def _get_thumbnail_fast(self, filename: str) -> Optional[GdkPixbuf.Pixbuf]:
-        """Get thumbnail quickly from cache or return None if not ready."""
-        # Return cached thumbnail if available
-        if filename in self.thumbnail_cache:
-            return self.thumbnail_cache[filename]
-
-        # Check if thumbnail file exists and load it immediately
-        cache_path = self._get_cache_path(filename)
-        if os.path.exists(cache_path):
-            try:
-                pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(
-                    cache_path, 32, 32, True
-                )
-                self.thumbnail_cache[filename] = pixbuf
-                return pixbuf
-            except Exception as e:
-                logger.error(f"Error loading thumbnail for {filename}: {e}")
-                self.thumbnail_cache[filename] = None
-                return None
-
-        # If not in cache and file doesn't exist, trigger background creation
-        if filename not in self.thumbnail_loading:
-            self.thumbnail_loading.add(filename)
-
-            def create_async():
-                try:
-                    cache_path = self._create_thumbnail(filename)
-                    if cache_path and os.path.exists(cache_path):
-                        try:
-                            pixbuf = GdkPixbuf.Pixbuf.new_from_file_at_scale(
-                                cache_path, 32, 32, True
-                            )
-                            self.thumbnail_cache[filename] = pixbuf
-                        except Exception as e:
-                            print(f"Error loading thumbnail for {filename}: {e}")
-                            self.thumbnail_cache[filename] = None
-                    else:
-                        self.thumbnail_cache[filename] = None
-                except Exception as e:
-                    print(f"Error creating thumbnail for {filename}: {e}")
-                    self.thumbnail_cache[filename] = None
-                finally:
-                    self.thumbnail_loading.discard(filename)
+    def _start_palette_precomputation(self):
+        """Extract matugen source colors of all wallpapers in the background."""
+        # Cached colors are unused while a template needs the image itself
+        if not shutil.which("matugen") or templates_use_image():
+            return
+        paths = [self._get_wallpaper_path(wallpaper) for wallpaper in self.wallpapers]
+        self.palettes.prune(paths)
+        self.palettes.precompute(paths)
+
+    def _on_thumbnail_progress(self, done: int, total: int):
+        """Called from a pool thread after each rendered wallpaper."""
+        if done == total:
+            elapsed = time.monotonic() - self._thumbnails_started
+            logger.info(f"Created {total} wallpaper thumbnails in {elapsed:.1f}s")
+            self.thumbnailer.prune()
+            # Drop the indexing row and let color searches see every wallpaper
+            if self.host:
+                self.host.request_refresh()
+
+    def _get_thumbnail_ref(self, filename: str) -> IconRef:
+        """Get a reference to a wallpaper's thumbnail, loaded when its row shows."""
+        path = self._get_wallpaper_path(filename)
+        # Keyed by file version, so replaced wallpapers aren't shown stale
+        key = self.thumbnailer.get_key(path) or path
+        return IconRef(
+            key=key,
+            size=WALLPAPER_ICON_SIZE,
+            loader=lambda: self._load_thumbnail(path),
+            cache=self.icon_cache,
+            load_async=lambda callback: self._request_thumbnail(path, key, callback),
+            placeholder_icon_name="image-x-generic-symbolic",
+        )
 
-            thread = threading.Thread(target=create_async, daemon=True)
-            thread.start()
+    def _load_thumbnail(self, path: str) -> Optional[GdkPixbuf.Pixbuf]:
+        thumbnail_path = self.thumbnailer.get_path(path, WALLPAPER_ICON_SIZE)
+        if thumbnail_path is None:
+            return None
+        return GdkPixbuf.Pixbuf.new_from_file(thumbnail_path)
+
+    def _request_thumbnail(
+        self,
+        path: str,
+        key: str,
+        callback: Callable[[Optional[GdkPixbuf.Pixbuf]], None],
+    ):
+        """Pass a thumbnail to callback on the main loop once it is rendered."""
+
+        def deliver(_path: str):
+            pixbuf = self.icon_cache.get(
+                key, WALLPAPER_ICON_SIZE, lambda: self._load_thumbnail(path)
+            )
+            callback(pixbuf)
+            return False  # Don't repeat
 
-        return None
+        if not self.thumbnailer.add_done_callback(
+            path, lambda _path: GLib.idle_add(deliver, _path)
+        ):
+            deliver(path)
 
     def _set_wallpaper(self, filename: str, scheme: str = None):
         """Set wallpaper and apply matugen color scheme if enabled."""
@@ -297,7 +292,7 @@ class WallpaperPlugin(PluginBase):
         # If Matugen is enabled, also apply the color scheme
         matugen_enabled = self._get_matugen_state()
         if matugen_enabled:
-            exec_shell_command_async(f'matugen image "{full_path}" -t {scheme}')
+            exec_shell_command_async(self.palettes.get_apply_command(full_path, scheme))
 
     def _set_random_wallpaper(self):
         """Set a random wallpaper."""
@@ -374,7 +369,7 @@ class WallpaperPlugin(PluginBase):
                 if os.path.exists(wallpaper_path):
                     # Apply the new scheme to current wallpaper
                     exec_shell_command_async(
-                        f'matugen image "{wallpaper_path}" -t {scheme}'
+                        self.palettes.get_apply_command(wallpaper_path, scheme)
                     )
 
                     # Send notification
@@ -500,8 +495,15 @@ class WallpaperPlugin(PluginBase):
                 )
             )
 
+        # Color, brightness or aspect ratio filters search the index instead
+        index_filters = self._parse_index_filters(query)
+
         # Hex color commands
-        if "color" in query or "hex" in query or query.startswith("#"):
+        if (
+            "color" in query
+            or "hex" in query
+            or (query.startswith("#") and not index_filters)
+        ):
             # Check for scheme specification in the query
             scheme = self._get_current_scheme()
             for scheme_id, scheme_name in self.schemes.items():
@@ -894,10 +896,12 @@ class WallpaperPlugin(PluginBase):
 
         # Status command
         if query == "status" or query == "info":
+            done, total = self.thumbnailer.get_progress()
+            thumbnail_text = f" • Thumbnails: {done}/{total}" if done < total else ""
             results.append(
                 Result(
                     title=f"Wallpaper System Status{indicator_text}",
-                    subtitle=status_text,
+                    subtitle=f"{status_text}{thumbnail_text}",
                     icon_name="color-management-symbolic",
                     action=lambda: None,
                     relevance=1.0,
@@ -935,30 +939,46 @@ class WallpaperPlugin(PluginBase):
             and "hex" not in query
         ):
             matching_wallpapers = []
-            for wallpaper in self.wallpapers:
-                if not query or query in wallpaper.lower():
-                    # Calculate relevance
-                    relevance = 1.0 if query == wallpaper.lower() else 0.7
-                    if query and query in wallpaper.lower():
-                        relevance = 0.8
-                    matching_wallpapers.append((wallpaper, relevance))
+            if index_filters:
+                # Color, brightness or aspect ratio, answered from the index
+                matching_wallpapers = [
+                    (wallpaper, 0.8) for wallpaper in self._search_index(index_filters)
+                ]
+                done, total = self.thumbnailer.get_progress()
+                if done < total:
+                    results.append(
+                        Result(
+                            title="Indexing wallpapers…",
+                            subtitle=f"{done}/{total} wallpapers analysed",
+                            icon_name="image-x-generic-symbolic",
+                            action=lambda: None,
+                            relevance=0.9,
+                            plugin_name=self.display_name,
+                            data={"action": "indexing", "bypass_max_results": True},
+                        )
+                    )
+            else:
+                for wallpaper in self.wallpapers:
+                    if not query or query in wallpaper.lower():
+                        # Calculate relevance
+                        relevance = 1.0 if query == wallpaper.lower() else 0.7
+                        if query and query in wallpaper.lower():
+                            relevance = 0.8
+                        matching_wallpapers.append((wallpaper, relevance))
 
             # Sort by relevance and show ALL wallpapers (like example_wallpapers.py)
+            # (stable, so index matches keep their ranking)
             matching_wallpapers.sort(key=lambda x: x[1], reverse=True)
 
             # Show ALL wallpapers instead of limiting (following example_wallpapers.py pattern)
             for wallpaper, relevance in matching_wallpapers:
-                # Use fast thumbnail loading
-                icon = self._get_thumbnail_fast(wallpaper)
-
                 results.append(
                     Result(
                         title=f"{wallpaper}{indicator_text if not query else ''}",
                         subtitle=f"Set as wallpaper{
                             ' • ' + status_text if not query else ''
                         }",
-                        icon=icon,
-                        icon_name="image-x-generic-symbolic" if not icon else None,
+                        icon_ref=self._get_thumbnail_ref(wallpaper),
                         action=lambda w=wallpaper: self._set_wallpaper(w),
                         relevance=relevance,
                         plugin_name=self.display_name,
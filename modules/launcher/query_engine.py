@@ -0,0 +1,137 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Set, Tuple
+
+from gi.repository import GLib
+
+from modules.launcher.result import Result
+
+
+class QueryEngine:
+    """
+    Runs plugin queries off the GTK main loop.
+
+    Every submission gets a new generation number. Work belonging to an older
+    generation is skipped before it starts and its results are dropped when
+    they come back, so only the latest keystroke ever reaches the UI.
+
+    Jobs sharing a key (their plugin) run one at a time, so plugin caches
+    aren't raced. While one runs, only the newest job for its key waits;
+    older waiting jobs are dropped.
+    """
+
+    def __init__(self, max_workers: int = 4):
+        self.executor = ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="launcher-query"
+        )
+        self._generation = 0
+        self._lock = threading.Lock()
+        # Keys with a job in a worker, and the newest job waiting on each
+        self._running: Set[Any] = set()
+        self._queued: Dict[Any, tuple] = {}
+
+    @property
+    def generation(self) -> int:
+        """The generation of the most recent submission."""
+        return self._generation
+
+    def is_current(self, generation: int) -> bool:
+        """Check whether a generation is still the latest one."""
+        return generation == self._generation
+
+    def cancel(self) -> int:
+        """Invalidate all pending work and return the new generation."""
+        with self._lock:
+            self._generation += 1
+            return self._generation
+
+    def submit(
+        self,
+        jobs: List[Tuple[Any, Callable[[], List[Result]]]],
+        on_done: Callable[[List[Result]], Any],
+    ) -> int:
+        """
+        Run query jobs in the worker pool and deliver their merged results.
+
+        Args:
+            jobs: (key, callable) pairs; the callables return lists of results
+                and run in parallel, except that jobs sharing a key never
+                run at the same time
+            on_done: Called on the main loop with the merged results, only
+                if no newer submission has been made in the meantime
+
+        Returns:
+            The generation number of this submission
+        """
+        generation = self.cancel()
+
+        if not jobs:
+            GLib.idle_add(self._deliver, generation, [], on_done)
+            return generation
+
+        pending = [len(jobs)]
+        collected: List[Result] = []
+        collected_lock = threading.Lock()
+
+        def finish(results):
+            with collected_lock:
+                collected.extend(results)
+                pending[0] -= 1
+                finished = pending[0] == 0
+
+            if finished and self.is_current(generation):
+                GLib.idle_add(self._deliver, generation, collected, on_done)
+
+        for key, job in jobs:
+            self._schedule(key, generation, job, finish)
+
+        return generation
+
+    def _schedule(self, key, generation: int, job, finish):
+        """Run a job now, or queue it behind the running job with its key."""
+        replaced = None
+        with self._lock:
+            start = key not in self._running
+            if start:
+                self._running.add(key)
+            else:
+                replaced = self._queued.get(key)
+                self._queued[key] = (generation, job, finish)
+
+        if replaced is not None:
+            # Superseded before it started
+            replaced[2]([])
+        if start:
+            self.executor.submit(self._run_serial, key, generation, job, finish)
+
+    def _run_serial(self, key, generation: int, job, finish):
+        """Run a job, then whatever job is queued behind it for the same key."""
+        while True:
+            results = []
+            if self.is_current(generation):
+                try:
+                    results = job() or []
+                except Exception as e:
+                    print(f"Error running launcher query: {e}")
+            finish(results)
+
+            with self._lock:
+                queued = self._queued.pop(key, None)
+                if queued is None:
+                    self._running.discard(key)
+                    return
+            generation, job, finish = queued
+
+    def _deliver(self, generation: int, results: List[Result], on_done) -> bool:
+        """Hand results to the UI if they still belong to the latest query."""
+        if self.is_current(generation):
+            try:
+                on_done(results)
+            except Exception as e:
+                print(f"Error delivering launcher results: {e}")
+        return False  # Don't repeat
+
+    def shutdown(self):
+        """Stop accepting work and drop anything in flight."""
+        self.cancel()
+        self.executor.shutdown(wait=False)
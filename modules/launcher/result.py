@@ -1,8 +1,10 @@
-from dataclasses import dataclass
-from typing import Any, Callable, Optional
+from dataclasses import dataclass, field
+from typing import Any, Callable, Optional, Sequence
 
 from gi.repository import GdkPixbuf, Gtk
 
+from modules.launcher.icon_cache import IconRef
+
 
 @dataclass
 class Result:
@@ -16,8 +18,12 @@ class Result:
     subtitle_markup: Optional[str] = None  # Pango markup for subtitle
     description: str = ""
     icon: Optional[GdkPixbuf.Pixbuf] = None
+    # Icon decoded only when a result row is realised
+    icon_ref: Optional[IconRef] = None
     icon_name: Optional[str] = None
     icon_markup: Optional[str] = None
+    # Character positions in title matched by the query, for highlighting
+    match_positions: Optional[Sequence[int]] = None
     # Behavior
     action: Optional[Callable[[], Any]] = None
     relevance: float = 0.0
@@ -28,6 +34,14 @@ class Result:
     # Metadata
     plugin_name: str = ""
     data: Optional[dict] = None
+    # Namespaced key under which activations are recorded for frecency ranking
+    frecency_key: Optional[str] = None
+    # Called with the row showing this result whenever one is bound to it, so
+    # plugins can update it in place (see ResultItem.refresh_text)
+    on_bind: Optional[Callable[[Any], None]] = None
+    # Display name of the plugin that produced this result, set by the
+    # launcher so row render time can be attributed; never shown
+    source_plugin: str = field(default="", init=False, compare=False)
 
     def activate(self):
         """Activate this result (execute its action)."""
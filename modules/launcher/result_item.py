@@ -4,14 +4,21 @@ from fabric.widgets.box import Box
 from fabric.widgets.eventbox import EventBox
 from fabric.widgets.image import Image
 from fabric.widgets.label import Label
+from gi.repository import GLib, Gtk
 from modules.launcher.result import Result
 
 gi.require_version("Gtk", "3.0")
 
+ICON_SIZE = 48
+DEFAULT_ICON_NAME = "application-default-icon"
+
 
 class ResultItem(EventBox):
     """
     Widget for displaying a single search result.
+
+    The widget tree is built once and can be rebound to another result with
+    bind(), so the launcher can recycle rows instead of rebuilding them.
     """
 
     # Signals
@@ -26,13 +33,18 @@ class ResultItem(EventBox):
         pass
 
     def __init__(
-        self, result: Result, selected: bool = False, index: int = 0, **kwargs
+        self,
+        result: Result = None,
+        selected: bool = False,
+        index: int = 0,
+        **kwargs,
     ):
         super().__init__(name="launcher-result-item", **kwargs)
 
-        self.result = result
-        self._selected = selected
+        self.result = None
+        self._selected = False
         self.index = index
+        self._pending_icon_ref = None
 
         # Setup UI
         self._setup_ui()
@@ -42,8 +54,11 @@ class ResultItem(EventBox):
         self.connect("enter-notify-event", self._on_enter)
         self.connect("leave-notify-event", self._on_leave)
 
-        # Set initial selection state
-        self.set_selected(selected)
+        if result is not None:
+            self.bind(result, index, selected)
+        else:
+            # Set initial selection state
+            self.set_selected(selected)
 
     def _setup_ui(self):
         """Setup the result item UI."""
@@ -57,26 +72,12 @@ class ResultItem(EventBox):
         )
         self.add(main_box)
 
-        # Icon
-        if self.result.icon:
-            icon_widget = Image(pixbuf=self.result.icon, name="result-item-icon")
-        elif self.result.icon_name:
-            icon_widget = Image(
-                icon_name=self.result.icon_name, icon_size=48, name="result-item-icon"
-            )
-        elif self.result.icon_markup:
-            icon_widget = Label(
-                markup=self.result.icon_markup, name="launcher-icon-label"
-            )
-        else:
-            # Default icon
-            icon_widget = Image(
-                icon_name="application-default-icon",
-                icon_size=48,
-                name="result-item-icon",
-            )
-
-        main_box.add(icon_widget)
+        # Icon, either an image or a markup label (e.g. emoji)
+        self.icon_image = Image(name="result-item-icon")
+        self.icon_image.connect("realize", self._on_icon_realize)
+        self.icon_label = Label(name="launcher-icon-label")
+        main_box.add(self.icon_image)
+        main_box.add(self.icon_label)
 
         # Text container
         text_box = Box(
@@ -89,47 +90,146 @@ class ResultItem(EventBox):
         main_box.add(text_box)
 
         # Title
-        title_label = Label(
-            label=self.result.title,
+        self.title_label = Label(
             name="result-item-title",
             h_align="start",
             v_align="center",
             ellipsize="end",
         )
-        text_box.add(title_label)
+        text_box.add(self.title_label)
 
         # Subtitle (if present)
-        if self.result.subtitle or self.result.subtitle_markup:
-            if self.result.subtitle_markup:
-                # Use markup for subtitle (supports Pango markup)
-                subtitle_label = Label(
-                    markup=self.result.subtitle_markup,
-                    name="result-item-subtitle",
-                    h_align="start",
-                    v_align="center",
-                    ellipsize="end",
-                )
-            else:
-                # Use plain text for subtitle
-                subtitle_label = Label(
-                    label=self.result.subtitle,
-                    name="result-item-subtitle",
-                    h_align="start",
-                    v_align="center",
-                    ellipsize="end",
-                )
-            text_box.add(subtitle_label)
+        self.subtitle_label = Label(
+            name="result-item-subtitle",
+            h_align="start",
+            v_align="center",
+            ellipsize="end",
+        )
+        text_box.add(self.subtitle_label)
 
         # Plugin name (small text)
-        if self.result.plugin_name:
-            plugin_label = Label(
-                label=f"via {self.result.plugin_name}",
-                name="result-item-plugin",
-                h_align="start",
-                v_align="center",
-                ellipsize="end",
+        self.plugin_label = Label(
+            name="result-item-plugin",
+            h_align="start",
+            v_align="center",
+            ellipsize="end",
+        )
+        text_box.add(self.plugin_label)
+
+        # Visibility of these depends on the bound result, keep show_all() off them
+        for widget in (
+            self.icon_image,
+            self.icon_label,
+            self.subtitle_label,
+            self.plugin_label,
+        ):
+            widget.set_no_show_all(True)
+
+    def bind(self, result: Result, index: int, selected: bool = False):
+        """Show another result in this row."""
+        self.result = result
+        self.index = index
+
+        self._bind_icon(result)
+        self.refresh_text()
+
+        if result.plugin_name:
+            self.plugin_label.set_label(f"via {result.plugin_name}")
+        self.plugin_label.set_visible(bool(result.plugin_name))
+
+        self.set_selected(selected)
+
+        if result.on_bind:
+            result.on_bind(self)
+
+    def refresh_text(self):
+        """Show the current title and subtitle of the bound result."""
+        result = self.result
+
+        # Title, with the characters matched by the query highlighted
+        if result.match_positions:
+            self.title_label.set_markup(
+                self._highlight_title(result.title, result.match_positions)
             )
-            text_box.add(plugin_label)
+        else:
+            self.title_label.set_label(result.title)
+
+        if result.subtitle_markup:
+            # Use markup for subtitle (supports Pango markup)
+            self.subtitle_label.set_markup(result.subtitle_markup)
+        else:
+            # Use plain text for subtitle
+            self.subtitle_label.set_label(result.subtitle)
+        self.subtitle_label.set_visible(bool(result.subtitle or result.subtitle_markup))
+
+    def _bind_icon(self, result: Result):
+        """Show the icon of a result."""
+        self._pending_icon_ref = None
+        self.icon_image.set_size_request(-1, -1)
+        use_label = bool(
+            result.icon_markup
+            and not (result.icon or result.icon_ref or result.icon_name)
+        )
+        self.icon_label.set_visible(use_label)
+        self.icon_image.set_visible(not use_label)
+
+        if use_label:
+            self.icon_label.set_markup(result.icon_markup)
+        elif result.icon:
+            self.icon_image.set_from_pixbuf(result.icon)
+        elif result.icon_ref:
+            # Decode the icon only once the row is actually realised
+            size = result.icon_ref.size
+            self.icon_image.set_size_request(size, size)
+            if self.icon_image.get_realized():
+                self._load_icon_ref(result.icon_ref)
+            else:
+                self.icon_image.clear()
+                self._pending_icon_ref = result.icon_ref
+        else:
+            self._set_icon_name(result.icon_name or DEFAULT_ICON_NAME)
+
+    def _set_icon_name(self, icon_name: str):
+        self.icon_image.set_from_icon_name(icon_name, Gtk.IconSize.DIALOG)
+        self.icon_image.set_pixel_size(ICON_SIZE)
+
+    def _load_icon_ref(self, icon_ref):
+        """Materialise a lazily referenced icon."""
+        if icon_ref.load_async:
+            pixbuf = icon_ref.peek()
+            if pixbuf is None:
+                # Show a placeholder until the icon has been decoded
+                self._set_icon_name(icon_ref.placeholder_icon_name or DEFAULT_ICON_NAME)
+                icon_ref.load_async(
+                    lambda pixbuf: self._on_icon_loaded(icon_ref, pixbuf)
+                )
+                return
+        else:
+            pixbuf = icon_ref.load()
+
+        if pixbuf:
+            self.icon_image.set_from_pixbuf(pixbuf)
+        else:
+            self._set_icon_name(DEFAULT_ICON_NAME)
+
+    def _on_icon_loaded(self, icon_ref, pixbuf):
+        # The row may have been recycled for another result meanwhile
+        if pixbuf and self.result is not None and self.result.icon_ref is icon_ref:
+            self.icon_image.set_from_pixbuf(pixbuf)
+
+    def _on_icon_realize(self, _icon_widget):
+        if self._pending_icon_ref:
+            icon_ref, self._pending_icon_ref = self._pending_icon_ref, None
+            self._load_icon_ref(icon_ref)
+
+    def _highlight_title(self, title: str, positions) -> str:
+        """Build Pango markup for the title with matched characters in bold."""
+        matched = set(positions)
+        parts = []
+        for i, char in enumerate(title):
+            escaped = GLib.markup_escape_text(char)
+            parts.append(f"<b>{escaped}</b>" if i in matched else escaped)
+        return "".join(parts)
 
     def set_selected(self, selected: bool):
         """Set the selection state of this result item."""
@@ -0,0 +1,127 @@
+from typing import Dict, List, Optional, Tuple
+
+from modules.launcher.plugin_base import PluginBase
+
+
+class _TriggerNode:
+    __slots__ = ("children", "owners")
+
+    def __init__(self):
+        self.children: Dict[str, "_TriggerNode"] = {}
+        # (plugin, trigger as registered, registration order), first one wins
+        self.owners: List[Tuple[PluginBase, str, int]] = []
+
+
+class TriggerRouter:
+    """
+    Trie of every active plugin's trigger keywords.
+
+    Built once by the PluginManager whenever the set of active plugins
+    changes, so resolving the trigger of a query is a single walk over its
+    characters instead of a scan over every plugin's triggers per keystroke.
+    """
+
+    def __init__(self):
+        self._root = _TriggerNode()
+        self._count = 0
+
+    def build(self, plugins: List[PluginBase]):
+        """Rebuild the trie from the triggers of the given plugins, in order."""
+        self._root = _TriggerNode()
+        self._count = 0
+        for plugin in plugins:
+            for trigger in plugin.get_triggers():
+                self._insert(plugin, trigger)
+
+    def _insert(self, plugin: PluginBase, trigger: str):
+        word = trigger.strip().lower()
+        if not word:
+            return
+
+        node = self._root
+        for char in word:
+            node = node.children.setdefault(char, _TriggerNode())
+        node.owners.append((plugin, trigger, self._count))
+        self._count += 1
+
+    def _first_enabled(self, node: _TriggerNode) -> Optional[Tuple[PluginBase, str]]:
+        for plugin, trigger, _ in node.owners:
+            if plugin.enabled:
+                return plugin, trigger
+        return None
+
+    def resolve(self, query: str) -> Tuple[Optional[PluginBase], str]:
+        """
+        Find the longest trigger the query starts with.
+
+        Args:
+            query: The search query
+
+        Returns:
+            Tuple of (plugin, trigger) if triggered, (None, "") otherwise
+        """
+        query_lower = query.lower().lstrip()
+        node = self._root
+        best = None
+
+        for index, char in enumerate(query_lower):
+            node = node.children.get(char)
+            if node is None:
+                break
+            if node.owners:
+                owner = self._first_enabled(node)
+                # Triggers registered with a trailing space only match whole words
+                if owner and (
+                    not owner[1].endswith(" ")
+                    or index + 1 == len(query_lower)
+                    or query_lower[index + 1] == " "
+                ):
+                    best = owner
+
+        return best if best else (None, "")
+
+    def lookup(self, word: str) -> Tuple[Optional[PluginBase], str]:
+        """Get the owner of a trigger that exactly equals the given word."""
+        node = self._find(word.strip().lower())
+        owner = self._first_enabled(node) if node else None
+        return owner if owner else (None, "")
+
+    def suggest(self, prefix: str) -> List[Tuple[str, PluginBase, str]]:
+        """
+        Get every trigger starting with a prefix, in registration order.
+
+        Args:
+            prefix: Typed prefix, an empty one matches all triggers
+
+        Returns:
+            List of (trigger word, plugin, trigger as registered)
+        """
+        node = self._find(prefix.strip().lower())
+        if node is None:
+            return []
+
+        found = []
+        stack = [node]
+        while stack:
+            current = stack.pop()
+            for plugin, trigger, order in current.owners:
+                if plugin.enabled:
+                    found.append((order, trigger.strip(), plugin, trigger))
+            stack.extend(current.children.values())
+
+        found.sort(key=lambda item: item[0])
+        suggestions = []
+        seen = set()
+        for _, word, plugin, trigger in found:
+            if word not in seen:
+                seen.add(word)
+                suggestions.append((word, plugin, trigger))
+        return suggestions
+
+    def _find(self, word: str) -> Optional[_TriggerNode]:
+        node = self._root
+        for char in word:
+            node = node.children.get(char)
+            if node is None:
+                return None
+        return node
@@ -166,24 +166,31 @@ def CodeOTP(uri):
 
 
 # TOTP/OTP utility functions
-def generate_totp(secret: str) -> str:
-    """Generate TOTP code from secret."""
+def generate_totp(
+    secret: str, digits: int = 6, period: int = 30, for_time: float = None
+) -> str:
+    """Generate TOTP code from secret, for now or for a given time."""
     try:
-        return pyotp.TOTP(secret).now()
+        totp = pyotp.TOTP(secret, digits=digits, interval=period)
+        return totp.now() if for_time is None else totp.at(for_time)
     except Exception as e:
         print(f"Error generating TOTP: {e}")
         return None
 
 
-def get_time_remaining() -> int:
+def get_time_remaining(period: int = 30, now: float = None) -> int:
     """Get seconds remaining until next token refresh."""
-    return 30 - (int(time.time()) % 30)
+    if now is None:
+        now = time.time()
+    return period - (int(now) % period)
 
 
-def get_time_remaining_with_blink() -> str:
+def get_time_remaining_with_blink(period: int = 30, now: float = None) -> str:
     """Get time remaining with blinking effect."""
-    time_remaining = get_time_remaining()
-    current_second = int(time.time())
+    if now is None:
+        now = time.time()
+    time_remaining = get_time_remaining(period, now)
+    current_second = int(now)
     should_blink = current_second % 2 == 0
 
     if should_blink:
@@ -255,6 +262,8 @@ def parse_otpauth_uri(uri: str, account_name: str = "") -> dict:
 
         if not secret:
             return {"success": False, "error": "No secret found in URI"}
+        if period <= 0:
+            return {"success": False, "error": f"Invalid period: {period}"}
 
         return {
             "success": True,
@@ -0,0 +1,523 @@
+import marshal
+import os
+import subprocess
+import threading
+from collections import deque
+from typing import Deque, Dict, List, NamedTuple, Optional, Set, Tuple
+
+from gi.repository import GLib
+
+import config.data as data
+from fabric.core.service import Service, Signal
+from fabric.utils import monitor_file
+
+# Entries kept in memory, newest first
+CLIPBOARD_HISTORY_LIMIT = 20000
+# Wait for bursts of database writes to settle before re-reading
+CLIPBOARD_RELOAD_DELAY_MS = 150
+
+CLIPBOARD_INDEX_FILE = os.path.join(data.CACHE_DIR, "clipboard_index.bin")
+CLIPBOARD_INDEX_VERSION = 1
+# Most recent text entries covered by the full-text index
+CLIPBOARD_INDEX_LIMIT = 1000
+# Characters of each entry that are indexed
+CLIPBOARD_INDEX_MAX_CHARS = 16384
+CLIPBOARD_INDEX_SAVE_DELAY_MS = 2000
+# cliphist truncates list previews to this many characters, shorter ones
+# are the full text and need no decode
+CLIPHIST_PREVIEW_WIDTH = 100
+# Share of the score given to recency, the rest is match quality
+CLIPBOARD_RECENCY_WEIGHT = 0.3
+
+
+def get_cliphist_db_path() -> str:
+    """Path of cliphist's database, honouring CLIPHIST_DB_PATH."""
+    return os.environ.get("CLIPHIST_DB_PATH") or os.path.join(
+        GLib.get_user_cache_dir(), "cliphist", "db"
+    )
+
+
+def is_binary_entry(content: str) -> bool:
+    """Whether a cliphist preview stands for binary data, e.g. an image."""
+    return content.startswith("[[ binary data")
+
+
+def _trigrams(text: str) -> Set[str]:
+    return {text[i : i + 3] for i in range(len(text) - 2)}
+
+
+class ClipboardEntry(NamedTuple):
+    """One cliphist entry with its preview pre-lowercased for filtering."""
+
+    id: str
+    content: str
+    content_lower: str
+
+
+def parse_cliphist_list(output: str) -> List[ClipboardEntry]:
+    """Parse ``cliphist list`` output (newest first) into entries."""
+    entries = []
+    for line in output.splitlines():
+        if not line or "<meta http-equiv" in line:
+            continue
+        item_id, sep, content = line.partition("\t")
+        if not sep:
+            continue
+        entries.append(ClipboardEntry(item_id, content, content.lower()))
+    return entries
+
+
+class ClipboardHistory(Service):
+    """
+    In-memory clipboard history backed by cliphist.
+
+    Seeded with one ``cliphist list`` and then kept current by watching
+    cliphist's database file: every store, delete or wipe rewrites it, so a
+    change triggers one re-list off the main loop whose delta is applied to a
+    bounded ring buffer. Readers get an immutable snapshot, so searching the
+    history never spawns a process and is safe from worker threads.
+    """
+
+    instance = None
+
+    @staticmethod
+    def get_initial():
+        if ClipboardHistory.instance is None:
+            ClipboardHistory.instance = ClipboardHistory()
+
+        return ClipboardHistory.instance
+
+    @Signal
+    def changed(self) -> None:
+        """Emitted on the main loop after the history has been updated."""
+
+    def __init__(self, limit: int = CLIPBOARD_HISTORY_LIMIT, **kwargs):
+        super().__init__(**kwargs)
+        self.db_path = get_cliphist_db_path()
+        self._entries: Deque[ClipboardEntry] = deque(maxlen=limit)
+        self._snapshot: Tuple[ClipboardEntry, ...] = ()
+        self._lock = threading.Lock()
+        self._reload_source_id = None
+        self._reloading = False
+        self._reload_again = False
+        self._monitor = None
+        self._started = False
+        # Whether a listing has been read since start()
+        self._loaded = False
+
+    def start(self):
+        """Seed the history in the background and start watching for changes."""
+        if self._started:
+            return
+        self._started = True
+
+        # The first listing is read off the main loop like any later one;
+        # changed is emitted once it's in
+        self._start_reload()
+
+        try:
+            self._monitor = monitor_file(self.db_path)
+            self._monitor.connect("changed", self._on_db_changed)
+        except Exception as e:
+            print(f"Failed to watch cliphist database {self.db_path}: {e}")
+
+    def stop(self):
+        """Stop watching and drop the history."""
+        if self._monitor:
+            self._monitor.cancel()
+            self._monitor = None
+        if self._reload_source_id:
+            GLib.source_remove(self._reload_source_id)
+            self._reload_source_id = None
+        with self._lock:
+            self._entries.clear()
+            self._snapshot = ()
+        self._started = False
+        self._loaded = False
+
+    def is_loaded(self) -> bool:
+        """Whether the history has been read yet; it is empty until then."""
+        return self._loaded
+
+    def get_entries(self) -> Tuple[ClipboardEntry, ...]:
+        """Get the current history, newest first."""
+        return self._snapshot
+
+    def refresh(self):
+        """Re-read the history in the background, e.g. after an external change."""
+        self._queue_reload()
+
+    def _on_db_changed(self, *_args):
+        self._queue_reload()
+
+    def _queue_reload(self):
+        if not self._reload_source_id:
+            self._reload_source_id = GLib.timeout_add(
+                CLIPBOARD_RELOAD_DELAY_MS, self._start_reload
+            )
+
+    def _start_reload(self) -> bool:
+        self._reload_source_id = None
+        if self._reloading:
+            # Pick up changes made while the current read is running
+            self._reload_again = True
+            return False
+
+        self._reloading = True
+        threading.Thread(target=self._reload_worker, daemon=True).start()
+        return False  # Don't repeat
+
+    def _reload_worker(self):
+        entries = self._read_history()
+        GLib.idle_add(self._finish_reload, entries)
+
+    def _finish_reload(self, entries: Optional[List[ClipboardEntry]]) -> bool:
+        self._reloading = False
+        if entries is not None:
+            first_load = not self._loaded
+            self._loaded = True
+            # Listeners wait for the first listing even if it's empty
+            if self._apply(entries) or first_load:
+                self.changed.emit()
+        if self._reload_again:
+            self._reload_again = False
+            self._queue_reload()
+        return False  # Don't repeat
+
+    def _read_history(self) -> Optional[List[ClipboardEntry]]:
+        try:
+            result = subprocess.run(
+                ["cliphist", "list"], capture_output=True, check=True, timeout=5
+            )
+        except (subprocess.SubprocessError, OSError) as e:
+            print(f"Error loading clipboard history: {e}")
+            return None
+        return parse_cliphist_list(result.stdout.decode("utf-8", errors="replace"))
+
+    def _apply(self, entries: Optional[List[ClipboardEntry]]) -> bool:
+        """
+        Merge a fresh listing into the ring buffer.
+
+        New entries are pushed onto the front and deleted ones dropped, so
+        unchanged entries keep their objects.
+
+        Returns:
+            Whether anything changed
+        """
+        if entries is None:
+            return False
+
+        with self._lock:
+            current = self._entries
+            listed_ids = {entry.id for entry in entries}
+            known_ids = {entry.id for entry in current}
+
+            removed = known_ids - listed_ids
+            added = [entry for entry in entries if entry.id not in known_ids]
+            if not removed and not added:
+                return False
+
+            if removed:
+                kept = [entry for entry in current if entry.id not in removed]
+                current.clear()
+                current.extend(kept)
+
+            if added and current and not self._is_newer(added[-1], current[0]):
+                # Not a plain prepend (e.g. an old entry was re-copied and
+                # moved to the front), so take the listing's order as is
+                current.clear()
+                current.extend(entries[: current.maxlen])
+            else:
+                # cliphist lists newest first, push oldest first
+                for entry in reversed(added):
+                    current.appendleft(entry)
+
+            self._snapshot = tuple(current)
+        return True
+
+    def _is_newer(self, entry: ClipboardEntry, other: ClipboardEntry) -> bool:
+        try:
+            return int(entry.id) > int(other.id)
+        except ValueError:
+            return False
+
+
+def remove_text_index(
+    path: str = CLIPBOARD_INDEX_FILE, lock: Optional[threading.Lock] = None
+):
+    """Delete the cached texts of the full-text index, e.g. once it's disabled."""
+    with lock or threading.Lock():
+        for stale_path in (path, f"{path}.tmp"):
+            try:
+                os.remove(stale_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Error removing clipboard index: {e}")
+
+
+class ClipboardTextIndex:
+    """
+    Full-text index over the decoded text of recent clipboard entries.
+
+    cliphist's list only carries truncated previews, so entries whose
+    preview may be cut off are decoded once, in the background, and their
+    text is kept in a trigram inverted index. The decoded texts are cached
+    in a binary file, so later sessions only decode entries copied since.
+    The index follows the history's changed signal: new entries are added
+    and deleted ones dropped incrementally.
+
+    Searches may run from worker threads.
+    """
+
+    def __init__(self, history: ClipboardHistory, path: str = CLIPBOARD_INDEX_FILE):
+        self.history = history
+        self.path = path
+        # Entry id -> (listed preview, text, lowercased text)
+        self._docs: Dict[str, Tuple[str, str, str]] = {}
+        self._postings: Dict[str, Set[str]] = {}
+        # Entry id -> position in the history, 0 being the newest
+        self._ranks: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._syncing = False
+        self._sync_again = False
+        self._save_source_id = None
+        self._changed_handler = None
+        # Serialises writing and deleting the cache file; bumped by a wipe so
+        # writes of older texts are dropped
+        self._file_lock = threading.Lock()
+        self._generation = 0
+
+    def start(self):
+        """Load the cached index and bring it up to date in the background."""
+        if self._changed_handler is None:
+            self._changed_handler = self.history.connect(
+                "changed", lambda *_: self._queue_sync()
+            )
+        self._queue_sync(load=True)
+
+    def stop(self):
+        if self._changed_handler is not None:
+            self.history.disconnect(self._changed_handler)
+            self._changed_handler = None
+        if self._save_source_id:
+            GLib.source_remove(self._save_source_id)
+            self._save()
+
+    def search(self, query: str, limit: int) -> List[Tuple[str, float, int]]:
+        """
+        Find entries whose text contains the query.
+
+        Returns:
+            (entry id, score, match position) tuples, best first
+        """
+        needle = query.lower()
+        if not needle:
+            return []
+
+        with self._lock:
+            if len(needle) >= 3:
+                # Entries containing every trigram of the query
+                postings = sorted(
+                    (self._postings.get(gram, set()) for gram in _trigrams(needle)),
+                    key=len,
+                )
+                candidates = set(postings[0]).intersection(*postings[1:])
+            else:
+                candidates = self._docs.keys()
+
+            total = max(len(self._ranks), 1)
+            matches = []
+            for entry_id in candidates:
+                text = self._docs[entry_id][2]
+                position = text.find(needle)
+                if position < 0:
+                    continue
+                recency = 1.0 - self._ranks.get(entry_id, total) / total
+                score = (1.0 - CLIPBOARD_RECENCY_WEIGHT) * self._match_quality(
+                    text, needle, position
+                ) + CLIPBOARD_RECENCY_WEIGHT * max(recency, 0.0)
+                matches.append((entry_id, score, position))
+
+        matches.sort(key=lambda match: match[1], reverse=True)
+        return matches[:limit]
+
+    def get_text(self, entry_id: str) -> Optional[str]:
+        """Get the indexed text of an entry."""
+        doc = self._docs.get(entry_id)
+        return doc[1] if doc else None
+
+    def _match_quality(self, text: str, needle: str, position: int) -> float:
+        if position == 0:
+            return 1.0
+        # Matches starting a word beat ones inside a word
+        quality = 0.85 if not text[position - 1].isalnum() else 0.7
+        return quality - 0.1 * position / len(text)
+
+    def _queue_sync(self, load: bool = False):
+        if self._syncing:
+            # Pick up changes made while the current sync is running
+            self._sync_again = True
+            return
+
+        self._syncing = True
+        threading.Thread(target=self._sync_worker, args=(load,), daemon=True).start()
+
+    def _sync_worker(self, load: bool):
+        changed = False
+        try:
+            if load:
+                self._load()
+            # An empty history until loaded; synced on its first changed signal
+            if self.history.is_loaded():
+                changed = self._sync(self.history.get_entries())
+        except Exception as e:
+            print(f"Error updating clipboard index: {e}")
+        # Always, or _syncing would stay set and block later syncs
+        GLib.idle_add(self._finish_sync, changed)
+
+    def _finish_sync(self, changed: bool) -> bool:
+        self._syncing = False
+        if changed and not self._docs:
+            # History wiped, don't keep its texts around
+            if self._save_source_id:
+                GLib.source_remove(self._save_source_id)
+                self._save_source_id = None
+            self._generation += 1
+            remove_text_index(self.path, self._file_lock)
+        elif changed and not self._save_source_id:
+            self._save_source_id = GLib.timeout_add(
+                CLIPBOARD_INDEX_SAVE_DELAY_MS, self._save
+            )
+        if self._sync_again:
+            self._sync_again = False
+            self._queue_sync()
+        return False  # Don't repeat
+
+    def _sync(self, entries: Tuple[ClipboardEntry, ...]) -> bool:
+        """Index new text entries and drop ones no longer in the window."""
+        window = []
+        for entry in entries:
+            if not is_binary_entry(entry.content):
+                window.append(entry)
+                if len(window) >= CLIPBOARD_INDEX_LIMIT:
+                    break
+
+        wanted = {entry.id: entry.content for entry in window}
+        with self._lock:
+            self._ranks = {entry.id: rank for rank, entry in enumerate(window)}
+            stale = [
+                entry_id
+                for entry_id, (preview, _, _) in self._docs.items()
+                if wanted.get(entry_id) != preview
+            ]
+            for entry_id in stale:
+                self._remove(entry_id)
+            missing = [entry for entry in window if entry.id not in self._docs]
+
+        for entry in missing:
+            text = self._read_text(entry)
+            if text is None:
+                continue
+            with self._lock:
+                if entry.id not in self._docs:
+                    self._add(entry.id, entry.content, text)
+
+        return bool(stale or missing)
+
+    def _read_text(self, entry: ClipboardEntry) -> Optional[str]:
+        if len(entry.content) < CLIPHIST_PREVIEW_WIDTH:
+            text = entry.content
+        else:
+            try:
+                result = subprocess.run(
+                    ["cliphist", "decode", entry.id],
+                    capture_output=True,
+                    check=True,
+                    timeout=3,
+                )
+            except (subprocess.SubprocessError, OSError) as e:
+                print(f"Error decoding clipboard entry {entry.id}: {e}")
+                return None
+            text = result.stdout.decode("utf-8", errors="replace")
+        return text[:CLIPBOARD_INDEX_MAX_CHARS]
+
+    def _add(self, entry_id: str, preview: str, text: str):
+        text_lower = text.lower()
+        self._docs[entry_id] = (preview, text, text_lower)
+        for gram in _trigrams(text_lower):
+            self._postings.setdefault(gram, set()).add(entry_id)
+
+    def _remove(self, entry_id: str):
+        _, _, text_lower = self._docs.pop(entry_id)
+        for gram in _trigrams(text_lower):
+            posting = self._postings.get(gram)
+            if posting is not None:
+                posting.discard(entry_id)
+                if not posting:
+                    del self._postings[gram]
+
+    def _load(self):
+        try:
+            with open(self.path, "rb") as f:
+                cached = marshal.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, EOFError, ValueError, TypeError) as e:
+            print(f"Error loading clipboard index: {e}")
+            return
+
+        if not isinstance(cached, dict) or cached.get("version") != (
+            CLIPBOARD_INDEX_VERSION,
+            CLIPBOARD_INDEX_MAX_CHARS,
+        ):
+            return
+        docs = cached.get("docs")
+        if not isinstance(docs, dict):
+            return
+        with self._lock:
+            for entry_id, doc in docs.items():
+                if (
+                    isinstance(doc, tuple)
+                    and len(doc) == 2
+                    and all(isinstance(field, str) for field in doc)
+                ):
+                    self._add(entry_id, *doc)
+
+    def _save(self) -> bool:
+        """Write the decoded texts to the cache file in a background thread."""
+        self._save_source_id = None
+        with self._lock:
+            docs = {
+                entry_id: (preview, text)
+                for entry_id, (preview, text, _) in self._docs.items()
+            }
+        threading.Thread(
+            target=self._write, args=(docs, self._generation), daemon=True
+        ).start()
+        return False  # Don't repeat
+
+    def _write(self, docs: Dict[str, Tuple[str, str]], generation: int):
+        with self._file_lock:
+            if generation != self._generation:
+                return
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                # Clipboard contents, readable by the user only
+                fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+                os.fchmod(fd, 0o600)
+                with os.fdopen(fd, "wb") as f:
+                    marshal.dump(
+                        {
+                            "version": (
+                                CLIPBOARD_INDEX_VERSION,
+                                CLIPBOARD_INDEX_MAX_CHARS,
+                            ),
+                            "docs": docs,
+                        },
+                        f,
+                    )
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"Error saving clipboard index: {e}")
@@ -0,0 +1,286 @@
+import heapq
+import json
+import os
+import subprocess
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from gi.repository import GLib
+
+import config.data as data
+from fabric.core.service import Service, Signal
+
+REMINDERS_FILE = os.path.join(data.CACHE_DIR, "reminders.json")
+REMINDERS_VERSION = 1
+# Longest the timer sleeps before looking at the clock again. GLib timers
+# run on the monotonic clock, which stands still during suspend, so without
+# this a reminder due while suspended would fire late by the suspend time.
+MAX_TIMER_INTERVAL_MS = 60 * 1000
+# Reminders noticed this long after they were due are announced as missed
+MISSED_REMINDER_GRACE_S = 2 * 60
+# Reminders due at once that get a notification each; more are summarised
+MAX_NOTIFICATIONS_PER_BATCH = 5
+
+
+def send_notification(title: str, message: str):
+    """Send a desktop notification using notify-send, without waiting for it."""
+    try:
+        subprocess.Popen(
+            ["notify-send", "-a", "Reminders", "-i", "alarm-clock", title, message],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+    except Exception as e:
+        print(f"Failed to send notification: {e}")
+
+
+class Reminder:
+    """
+    Represents a single reminder and its metadata.
+    """
+
+    def __init__(
+        self,
+        reminder_id: int,
+        message: str,
+        due: float,
+        created: Optional[float] = None,
+    ):
+        self.id = reminder_id
+        self.message = message
+        # Wall-clock time, in seconds since the epoch
+        self.due = due
+        self.created = created if created is not None else time.time()
+
+    @property
+    def target_time(self) -> datetime:
+        return datetime.fromtimestamp(self.due)
+
+    def get_time_remaining(self) -> str:
+        """Get formatted time remaining until reminder."""
+        total_seconds = int(self.due - time.time())
+        if total_seconds <= 0:
+            return "Overdue"
+
+        if total_seconds < 60:
+            return f"{total_seconds}s"
+        elif total_seconds < 3600:
+            minutes = total_seconds // 60
+            seconds = total_seconds % 60
+            return f"{minutes}m {seconds}s" if seconds > 0 else f"{minutes}m"
+        else:
+            hours = total_seconds // 3600
+            minutes = (total_seconds % 3600) // 60
+            return f"{hours}h {minutes}m" if minutes > 0 else f"{hours}h"
+
+    def get_target_time_str(self) -> str:
+        """Get formatted target time."""
+        return self.target_time.strftime("%H:%M")
+
+    def to_dict(self) -> dict:
+        return {
+            "id": self.id,
+            "message": self.message,
+            "due": self.due,
+            "created": self.created,
+        }
+
+
+class ReminderScheduler(Service):
+    """
+    Pending reminders, persisted to the cache directory.
+
+    Reminders are kept in a min-heap of (due time, id) driven by a single
+    GLib timeout, re-armed for whichever reminder is due next, so any number
+    of them costs one timer and no threads. Cancelled reminders are only
+    dropped from the heap once they reach its top.
+
+    Due times are wall-clock times. Reminders that came due while the shell
+    wasn't running, or the machine was suspended, fire as soon as it is
+    noticed.
+    """
+
+    instance = None
+
+    @staticmethod
+    def get_initial():
+        if ReminderScheduler.instance is None:
+            ReminderScheduler.instance = ReminderScheduler()
+
+        return ReminderScheduler.instance
+
+    @Signal
+    def changed(self) -> None:
+        """Emitted on the main loop after reminders fired."""
+
+    def __init__(self, path: str = REMINDERS_FILE, **kwargs):
+        super().__init__(**kwargs)
+        self.path = path
+        self._reminders: Dict[int, Reminder] = {}
+        self._heap: List[Tuple[float, int]] = []
+        self._next_id = 1
+        self._lock = threading.Lock()
+        self._timer_id = None
+        self._started = False
+
+    def start(self):
+        """Load stored reminders, fire missed ones and arm the timer."""
+        if self._started:
+            return
+        self._started = True
+        self._load()
+        self._on_timer()
+
+    def stop(self):
+        """Stop the timer; stored reminders fire on the next start."""
+        with self._lock:
+            if self._timer_id is not None:
+                GLib.source_remove(self._timer_id)
+                self._timer_id = None
+        self._started = False
+
+    def __len__(self):
+        return len(self._reminders)
+
+    def get_reminders(self) -> List[Reminder]:
+        """Get pending reminders, soonest first."""
+        with self._lock:
+            return sorted(self._reminders.values(), key=lambda r: (r.due, r.id))
+
+    def add(self, message: str, target_time: datetime) -> Reminder:
+        """Schedule a reminder."""
+        with self._lock:
+            reminder = Reminder(self._next_id, message, target_time.timestamp())
+            self._next_id += 1
+            self._reminders[reminder.id] = reminder
+            heapq.heappush(self._heap, (reminder.due, reminder.id))
+            self._rearm()
+        self._save()
+        return reminder
+
+    def cancel(self, reminder_id: Optional[int] = None) -> int:
+        """
+        Cancel a reminder, or all of them.
+
+        Returns:
+            Number of cancelled reminders
+        """
+        with self._lock:
+            if reminder_id is None:
+                count = len(self._reminders)
+                self._reminders.clear()
+                self._heap.clear()
+            else:
+                count = 1 if self._reminders.pop(reminder_id, None) else 0
+            if count:
+                self._rearm()
+        if count:
+            self._save()
+        return count
+
+    def _rearm(self):
+        """Arm the timer for the next due reminder; called with the lock held."""
+        heap = self._heap
+        while heap and heap[0][1] not in self._reminders:
+            heapq.heappop(heap)
+
+        if self._timer_id is not None:
+            GLib.source_remove(self._timer_id)
+            self._timer_id = None
+        if not heap or not self._started:
+            return
+
+        delay_ms = max(0, int((heap[0][0] - time.time()) * 1000))
+        self._timer_id = GLib.timeout_add(
+            min(delay_ms, MAX_TIMER_INTERVAL_MS), self._on_timer
+        )
+
+    def _on_timer(self) -> bool:
+        now = time.time()
+        fired = []
+        with self._lock:
+            self._timer_id = None
+            heap = self._heap
+            while heap and heap[0][0] <= now:
+                _, reminder_id = heapq.heappop(heap)
+                reminder = self._reminders.pop(reminder_id, None)
+                if reminder:
+                    fired.append(reminder)
+            self._rearm()
+
+        if fired:
+            self._save()
+            self._notify(fired, now)
+            self.changed.emit()
+        return False  # Re-armed above
+
+    def _notify(self, reminders: List[Reminder], now: float):
+        shown = reminders
+        if len(reminders) > MAX_NOTIFICATIONS_PER_BATCH:
+            shown = reminders[: MAX_NOTIFICATIONS_PER_BATCH - 1]
+        for reminder in shown:
+            title = "⏰ Reminder"
+            # Noticed a while after it was due, e.g. after a restart
+            if now - reminder.due > MISSED_REMINDER_GRACE_S:
+                title = f"⏰ Missed Reminder ({reminder.get_target_time_str()})"
+            send_notification(title, reminder.message)
+
+        remaining = len(reminders) - len(shown)
+        if remaining:
+            send_notification(
+                "⏰ Missed Reminders",
+                f"{remaining} more reminders came due while away",
+            )
+
+    def _load(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Error loading reminders: {e}")
+            return
+
+        if not isinstance(stored, dict):
+            return
+        if stored.get("version") != REMINDERS_VERSION:
+            return
+        with self._lock:
+            for item in stored.get("reminders", []):
+                try:
+                    reminder = Reminder(
+                        int(item["id"]),
+                        str(item["message"]),
+                        float(item["due"]),
+                        float(item.get("created", time.time())),
+                    )
+                except (KeyError, TypeError, ValueError):
+                    continue
+                self._reminders[reminder.id] = reminder
+            self._heap = [(r.due, r.id) for r in self._reminders.values()]
+            heapq.heapify(self._heap)
+            # Never reuse the id of a reminder that is still stored
+            self._next_id = max(
+                [int(stored.get("next_id", 1))]
+                + [r.id + 1 for r in self._reminders.values()]
+            )
+
+    def _save(self):
+        """Write the reminders atomically; may be called from worker threads."""
+        with self._lock:
+            stored = {
+                "version": REMINDERS_VERSION,
+                "next_id": self._next_id,
+                "reminders": [r.to_dict() for r in self._reminders.values()],
+            }
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(stored, f, ensure_ascii=False, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"Error saving reminders: {e}")
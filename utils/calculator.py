@@ -0,0 +1,392 @@
+import ast
+import decimal
+import math
+import operator
+import time
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from functools import lru_cache
+from typing import Any, Callable, Dict, Tuple
+
+# Evaluation modes: floats, exact big integers, or fixed precision decimals
+MODE_FLOAT = "float"
+MODE_INT = "int"
+MODE_DECIMAL = "decimal"
+
+MAX_EXPRESSION_LENGTH = 512
+MAX_NODES = 256
+# Largest integer an operation may produce; bigger results are refused before
+# they are computed. Also keeps results printable in full (4300 digit limit).
+MAX_INT_BITS = 10000
+# Largest exponent and modulus of a modular pow(); it is a single C call that
+# the time budget can't interrupt, so its size is what bounds it
+MAX_MODULAR_POW_BITS = 2048
+MAX_ROUND_DIGITS = 100
+# Integers longer than this don't fit in a float
+FLOAT_MAX_INT_BITS = 1023
+DECIMAL_PRECISION = 50
+# Wall-clock budget of one evaluation
+EVAL_TIME_BUDGET_S = 0.25
+COMPILED_CACHE_SIZE = 256
+
+_DECIMAL_CONTEXT = decimal.Context(
+    prec=DECIMAL_PRECISION,
+    Emax=999999,
+    Emin=-999999,
+    traps=[decimal.InvalidOperation, decimal.DivisionByZero, decimal.Overflow],
+)
+_DECIMAL_PI = decimal.Decimal("3.14159265358979323846264338327950288419716939937510")
+
+
+class CalculatorError(ValueError):
+    """An expression that can't be evaluated, with a message for the user."""
+
+
+class ExpressionTooLarge(CalculatorError):
+    pass
+
+
+class EvaluationTimeout(CalculatorError):
+    pass
+
+
+class _Budget:
+    """Deadline checked between operations of one evaluation."""
+
+    __slots__ = ("deadline",)
+
+    def __init__(self, seconds: float):
+        self.deadline = time.monotonic() + seconds
+
+    def check(self):
+        if time.monotonic() > self.deadline:
+            raise EvaluationTimeout("Calculation took too long")
+
+
+def _number(value):
+    if isinstance(value, bool) or not isinstance(value, (int, float, decimal.Decimal)):
+        raise CalculatorError("Operands must be numbers")
+    return value
+
+
+def _check_int(value):
+    if isinstance(value, int) and value.bit_length() > MAX_INT_BITS:
+        raise ExpressionTooLarge("Result is too large")
+    return value
+
+
+def _pow(base, exponent, modulus=None):
+    base, exponent = _number(base), _number(exponent)
+    if modulus is not None:
+        if not all(isinstance(v, int) for v in (base, exponent, modulus)):
+            raise CalculatorError("pow() with a modulus needs integers")
+        if exponent < 0:
+            raise CalculatorError("pow() with a modulus needs a positive exponent")
+        if (
+            exponent.bit_length() > MAX_MODULAR_POW_BITS
+            or abs(modulus).bit_length() > MAX_MODULAR_POW_BITS
+        ):
+            raise ExpressionTooLarge("pow() arguments are too large")
+        return pow(base, exponent, modulus)
+
+    if isinstance(base, int) and isinstance(exponent, int) and exponent > 0:
+        # Size of the result, estimated before computing it
+        if abs(base) > 1 and (abs(base).bit_length() - 1) * exponent > MAX_INT_BITS:
+            raise ExpressionTooLarge("Result is too large")
+    return _check_int(base**exponent)
+
+
+def _int_pow(base, exponent, modulus=None):
+    """Power in integer mode, which must not give a fraction."""
+    if modulus is None and isinstance(exponent, int) and exponent < 0:
+        raise CalculatorError("Integer mode needs a non-negative exponent")
+    return _pow(base, exponent, modulus)
+
+
+def _mul(left, right):
+    left, right = _number(left), _number(right)
+    if isinstance(left, int) and isinstance(right, int):
+        if left.bit_length() + right.bit_length() > MAX_INT_BITS + 1:
+            raise ExpressionTooLarge("Result is too large")
+    return _check_int(left * right)
+
+
+def _int_div(left, right):
+    """True division in integer mode, which must not leave a remainder."""
+    quotient, remainder = divmod(_number(left), _number(right))
+    if remainder:
+        raise CalculatorError("Result is not an integer")
+    return quotient
+
+
+def _arithmetic(op: Callable) -> Callable:
+    return lambda left, right: _check_int(op(_number(left), _number(right)))
+
+
+def _values(args: tuple) -> tuple:
+    """Arguments of min/max/sum: several numbers or one sequence of them."""
+    if len(args) == 1 and isinstance(args[0], tuple):
+        args = args[0]
+    if not args:
+        raise CalculatorError("Expected at least one value")
+    return tuple(_number(value) for value in args)
+
+
+def _round(value, digits=None):
+    if digits is not None and (
+        not isinstance(digits, int) or abs(digits) > MAX_ROUND_DIGITS
+    ):
+        raise CalculatorError("Invalid number of digits")
+    return round(_number(value), digits)
+
+
+def _decimal_round(value, digits=None):
+    # Literals are Decimals in this mode, digits included
+    if isinstance(digits, decimal.Decimal) and digits == digits.to_integral_value():
+        digits = int(digits)
+    # round() without digits gives an int, even for a Decimal
+    return decimal.Decimal(_round(value, digits))
+
+
+def _sum(*args):
+    total = 0
+    for value in _values(args):
+        total = _check_int(total + value)
+    return total
+
+
+def _unary_math(func: Callable) -> Callable:
+    return lambda value: func(_number(value))
+
+
+_COMMON_FUNCTIONS: Dict[str, Callable] = {
+    "abs": lambda value: abs(_number(value)),
+    "min": lambda *args: min(_values(args)),
+    "max": lambda *args: max(_values(args)),
+    "sum": _sum,
+    "pow": _pow,
+}
+
+FUNCTIONS: Dict[str, Dict[str, Callable]] = {
+    MODE_FLOAT: {
+        **_COMMON_FUNCTIONS,
+        "round": _round,
+        "sqrt": _unary_math(math.sqrt),
+        "sin": _unary_math(math.sin),
+        "cos": _unary_math(math.cos),
+        "tan": _unary_math(math.tan),
+        "asin": _unary_math(math.asin),
+        "acos": _unary_math(math.acos),
+        "atan": _unary_math(math.atan),
+        "log": lambda value, base=math.e: math.log(_number(value), _number(base)),
+        "log10": _unary_math(math.log10),
+        "exp": _unary_math(math.exp),
+    },
+    MODE_INT: {
+        **_COMMON_FUNCTIONS,
+        "pow": _int_pow,
+        "gcd": lambda *args: math.gcd(*(_number(value) for value in args)),
+        "isqrt": _unary_math(math.isqrt),
+    },
+    MODE_DECIMAL: {
+        **_COMMON_FUNCTIONS,
+        "round": _decimal_round,
+        "sqrt": lambda value: decimal.Decimal(_number(value)).sqrt(),
+        "exp": lambda value: decimal.Decimal(_number(value)).exp(),
+        "log": lambda value: decimal.Decimal(_number(value)).ln(),
+        "log10": lambda value: decimal.Decimal(_number(value)).log10(),
+    },
+}
+
+CONSTANTS: Dict[str, Dict[str, Any]] = {
+    MODE_FLOAT: {"pi": math.pi, "e": math.e},
+    MODE_INT: {},
+    MODE_DECIMAL: {
+        "pi": _DECIMAL_CONTEXT.plus(_DECIMAL_PI),
+        "e": _DECIMAL_CONTEXT.exp(decimal.Decimal(1)),
+    },
+}
+
+_BINARY_OPERATORS: Dict[type, Callable] = {
+    ast.Add: _arithmetic(operator.add),
+    ast.Sub: _arithmetic(operator.sub),
+    ast.Mult: _mul,
+    ast.Div: _arithmetic(operator.truediv),
+    ast.FloorDiv: _arithmetic(operator.floordiv),
+    ast.Mod: _arithmetic(operator.mod),
+    ast.Pow: _pow,
+}
+
+# Operators that must give whole numbers in integer mode
+_INT_BINARY_OPERATORS: Dict[type, Callable] = {
+    ast.Div: _int_div,
+    ast.Pow: _int_pow,
+}
+
+_UNARY_OPERATORS: Dict[type, Callable] = {
+    ast.UAdd: lambda value: +_number(value),
+    ast.USub: lambda value: -_number(value),
+}
+
+
+class CompiledExpression:
+    """A validated expression compiled to a tree of closures."""
+
+    def __init__(self, expression: str, mode: str, evaluate: Callable):
+        self.expression = expression
+        self.mode = mode
+        self._evaluate = evaluate
+
+    def run(self, budget: _Budget):
+        if self.mode == MODE_DECIMAL:
+            with decimal.localcontext(_DECIMAL_CONTEXT):
+                value = self._evaluate(budget)
+        else:
+            value = self._evaluate(budget)
+        return _number(value)
+
+
+def _coerce_literal(value, mode: str):
+    if isinstance(value, bool) or not isinstance(value, (int, float)):
+        raise CalculatorError("Only numbers are supported")
+    if mode == MODE_INT and not isinstance(value, int):
+        raise CalculatorError("Integer mode only works with whole numbers")
+    if mode == MODE_DECIMAL:
+        return decimal.Decimal(str(value))
+    return _check_int(value)
+
+
+def _compile_node(node: ast.AST, mode: str) -> Callable[[_Budget], Any]:
+    """Compile a whitelisted AST node into a closure evaluating it."""
+    if isinstance(node, ast.Constant):
+        value = _coerce_literal(node.value, mode)
+        return lambda budget: value
+
+    if isinstance(node, ast.Name):
+        if node.id not in CONSTANTS[mode]:
+            raise CalculatorError(f"Unknown name: {node.id}")
+        value = CONSTANTS[mode][node.id]
+        return lambda budget: value
+
+    if isinstance(node, ast.BinOp):
+        op = _BINARY_OPERATORS.get(type(node.op))
+        if mode == MODE_INT:
+            op = _INT_BINARY_OPERATORS.get(type(node.op), op)
+        if op is None:
+            raise CalculatorError(f"Unsupported operator: {type(node.op).__name__}")
+        left, right = _compile_node(node.left, mode), _compile_node(node.right, mode)
+
+        def evaluate_binary(budget):
+            budget.check()
+            return op(left(budget), right(budget))
+
+        return evaluate_binary
+
+    if isinstance(node, ast.UnaryOp):
+        op = _UNARY_OPERATORS.get(type(node.op))
+        if op is None:
+            raise CalculatorError(f"Unsupported operator: {type(node.op).__name__}")
+        operand = _compile_node(node.operand, mode)
+        return lambda budget: op(operand(budget))
+
+    if isinstance(node, ast.Call):
+        if not isinstance(node.func, ast.Name) or node.keywords:
+            raise CalculatorError("Unsupported function call")
+        func = FUNCTIONS[mode].get(node.func.id)
+        if func is None:
+            raise CalculatorError(f"Unknown function: {node.func.id}")
+        args = [_compile_node(arg, mode) for arg in node.args]
+
+        def evaluate_call(budget):
+            budget.check()
+            return func(*(arg(budget) for arg in args))
+
+        return evaluate_call
+
+    if isinstance(node, (ast.Tuple, ast.List)):
+        items = [_compile_node(item, mode) for item in node.elts]
+        return lambda budget: tuple(item(budget) for item in items)
+
+    raise CalculatorError(f"Unsupported syntax: {type(node).__name__}")
+
+
+@lru_cache(maxsize=COMPILED_CACHE_SIZE)
+def compile_expression(expression: str, mode: str = MODE_FLOAT) -> CompiledExpression:
+    """
+    Parse and compile an expression, refusing anything but plain arithmetic.
+
+    The source is parsed, never compiled by Python, so nothing is
+    constant-folded at compile time. ``^`` means power, as on a calculator.
+
+    Raises:
+        SyntaxError: If the input isn't an expression
+        CalculatorError: If it uses anything outside the whitelist
+    """
+    if mode not in FUNCTIONS:
+        raise CalculatorError(f"Unknown mode: {mode}")
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ExpressionTooLarge("Expression is too long")
+
+    tree = ast.parse(expression.replace("^", "**"), mode="eval")
+    if sum(1 for _ in ast.walk(tree)) > MAX_NODES:
+        raise ExpressionTooLarge("Expression is too long")
+    return CompiledExpression(expression, mode, _compile_node(tree.body, mode))
+
+
+class Calculator:
+    """
+    Evaluates compiled expressions on a worker thread under a time budget.
+
+    Operations whose result would exceed the size limits are refused before
+    they run, so every step is short, and the deadline is checked between
+    steps; the caller stops waiting once the budget is spent either way.
+    """
+
+    def __init__(self, time_budget: float = EVAL_TIME_BUDGET_S):
+        self.time_budget = time_budget
+        self._executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="calculator"
+        )
+
+    def evaluate(self, expression: str, mode: str = MODE_FLOAT):
+        """
+        Evaluate an expression.
+
+        Raises:
+            SyntaxError: If the input isn't an expression
+            CalculatorError: If it can't be evaluated within the limits
+            ArithmeticError: On e.g. division by zero
+        """
+        compiled = compile_expression(expression.strip(), mode)
+        future = self._executor.submit(compiled.run, _Budget(self.time_budget))
+        try:
+            return future.result(timeout=self.time_budget)
+        except FutureTimeoutError:
+            future.cancel()
+            raise EvaluationTimeout("Calculation took too long")
+
+    def cleanup(self):
+        self._executor.shutdown(wait=False)
+
+
+def format_number(value, mode: str = MODE_FLOAT) -> str:
+    """Format a result for display in the given mode."""
+    if mode == MODE_INT:
+        return str(value)
+    if mode == MODE_DECIMAL:
+        value = value.normalize(_DECIMAL_CONTEXT)
+        # Plain notation unless the exponent is far off
+        return f"{value:f}" if abs(value.adjusted()) < DECIMAL_PRECISION else str(value)
+    if isinstance(value, int) and value.bit_length() > FLOAT_MAX_INT_BITS:
+        # Exact integer results may be too large to convert to a float
+        return f"{decimal.Decimal(value):.6g}"
+    return f"{value:.6g}"
+
+
+def split_mode(query: str, prefixes: Dict[str, str]) -> Tuple[str, str]:
+    """Split a leading mode keyword (e.g. ``int``) off a query."""
+    keyword, _, rest = query.strip().partition(" ")
+    mode = prefixes.get(keyword.lower())
+    if mode and rest.strip():
+        return mode, rest.strip()
+    return MODE_FLOAT, query
@@ -1,29 +1,69 @@
+import json
+import os
 import threading
 import time
 from concurrent.futures import ThreadPoolExecutor
-from typing import Dict, Optional, Tuple
+from typing import Callable, Dict, List, NamedTuple, Optional, Set, Tuple
 
 import requests
 
+import config.data as data
 
-class CurrencyCache:
-    """Thread-safe currency exchange rate cache with background updates."""
+CURRENCY_CACHE_FILE = os.path.join(data.CACHE_DIR, "currency_rates.json")
+CURRENCY_CACHE_VERSION = 1
 
-    def __init__(self):
-        # {base_currency: {rates_data, timestamp}}
+
+class CurrencyRatesPending(LookupError):
+    """No rates are known yet for a currency; they are being fetched."""
+
+
+class CurrencyCache:
+    """
+    Thread-safe currency exchange rate cache with background updates.
+
+    Rates are persisted with their fetch time, so they survive restarts.
+    Any known rate is returned immediately, however old; once older than the
+    TTL a single background refresh per base currency is started, and the
+    next lookup gets the new rates (stale-while-revalidate). Lookups never
+    wait for the network. A base whose fetch failed isn't retried for a
+    while, so typing offline or an unknown code doesn't refetch per keystroke.
+    """
+
+    def __init__(
+        self,
+        base_url: str = data.CURRENCY_RATES_URL,
+        path: str = CURRENCY_CACHE_FILE,
+    ):
+        # URL template of a base currency's rates, with a {base} placeholder
+        self.base_url = base_url
+        self.path = path
+        # {base_currency: {"rates": {code: rate}, "timestamp": fetch time}}
         self._cache: Dict[str, Dict] = {}
         self._cache_lock = threading.Lock()
         self._cache_ttl = 3600  # 1 hour in seconds
-        self._request_timeout = 2  # 2 seconds for faster response
+        self._request_timeout = 5
+        self._retry_delay = 60  # After a failed fetch, in seconds
         self._executor = ThreadPoolExecutor(
             max_workers=2, thread_name_prefix="currency"
         )
-        self._pending_requests: Dict[str, threading.Event] = {}
+        self._pending_requests: Set[str] = set()
+        # {base_currency: time of its last failed fetch}
+        self._failed_at: Dict[str, float] = {}
+        self._listeners: List[Callable[[str], None]] = []
+        self._load()
+
+    def add_listener(self, callback: Callable[[str], None]):
+        """Call back (from a worker thread) with the base currency after a refresh."""
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback: Callable[[str], None]):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
 
     def get_rate(self, from_code: str, to_code: str) -> Optional[Tuple[float, float]]:
         """
-        Get exchange rate from cache or fetch if needed.
-        Returns (rate, cache_age_seconds) or None if unavailable.
+        Get exchange rate from cache, refreshing it in the background if needed.
+        Returns (rate, cache_age_seconds) or None if no rate is known yet.
         """
         from_lower = from_code.lower()
         to_lower = to_code.lower()
@@ -31,81 +71,128 @@ class CurrencyCache:
         if from_lower == to_lower:
             return 1.0, 0.0
 
-        current_time = time.time()
-
-        with self._cache_lock:
-            # Check if we have fresh cached data
-            if from_lower in self._cache:
-                cache_entry = self._cache[from_lower]
-                cache_age = current_time - cache_entry["timestamp"]
-
-                if cache_age < self._cache_ttl and to_lower in cache_entry["rates"]:
-                    rate = cache_entry["rates"][to_lower]["rate"]
-                    return rate, cache_age
-
-            # Check if we're already fetching this currency
-            if from_lower in self._pending_requests:
-                # Don't wait, return cached data if available (even if stale)
-                if (
-                    from_lower in self._cache
-                    and to_lower in self._cache[from_lower]["rates"]
-                ):
-                    cache_entry = self._cache[from_lower]
-                    cache_age = current_time - cache_entry["timestamp"]
-                    rate = cache_entry["rates"][to_lower]["rate"]
-                    return rate, cache_age
-                return None
-
-            # Start background fetch
-            self._pending_requests[from_lower] = threading.Event()
-
-        # Submit background task to fetch rates
-        self._executor.submit(self._fetch_rates_background, from_lower)
-
-        # Return stale cached data if available
         with self._cache_lock:
+            cache_entry = self._cache.get(from_lower)
+            cache_age = time.time() - cache_entry["timestamp"] if cache_entry else None
+            rate = cache_entry["rates"].get(to_lower) if cache_entry else None
+
+            # Refresh missing or stale rates, once per base currency
+            needs_refresh = cache_entry is None or cache_age >= self._cache_ttl
+            failed_at = self._failed_at.get(from_lower)
+            backing_off = (
+                failed_at is not None and time.time() - failed_at < self._retry_delay
+            )
             if (
-                from_lower in self._cache
-                and to_lower in self._cache[from_lower]["rates"]
+                needs_refresh
+                and not backing_off
+                and from_lower not in self._pending_requests
             ):
-                cache_entry = self._cache[from_lower]
-                cache_age = current_time - cache_entry["timestamp"]
-                rate = cache_entry["rates"][to_lower]["rate"]
-                return rate, cache_age
+                self._pending_requests.add(from_lower)
+                self._executor.submit(self._fetch_rates_background, from_lower)
 
-        return None
+        if rate is None:
+            return None
+        return rate, cache_age
+
+    def is_pending(self, from_code: str) -> bool:
+        """Whether rates of a base currency are being fetched."""
+        return from_code.lower() in self._pending_requests
 
     def _fetch_rates_background(self, from_code: str):
         """Fetch exchange rates in background thread."""
+        updated = False
         try:
-            url = f"https://www.floatrates.com/daily/{from_code}.json"
+            url = self.base_url.format(base=from_code)
             response = requests.get(url, timeout=self._request_timeout)
 
             if response.status_code == 200:
-                rates_data = response.json()
-                current_time = time.time()
-
+                rates = {
+                    code: float(info["rate"])
+                    for code, info in response.json().items()
+                    if isinstance(info, dict) and "rate" in info
+                }
                 with self._cache_lock:
                     self._cache[from_code] = {
-                        "rates": rates_data,
-                        "timestamp": current_time,
+                        "rates": rates,
+                        "timestamp": time.time(),
                     }
+                updated = True
+            else:
+                print(
+                    f"Currency fetch for {from_code} failed: HTTP {response.status_code}"
+                )
 
         except Exception as e:
             print(f"Background currency fetch failed for {from_code}: {e}")
         finally:
             # Mark request as complete
             with self._cache_lock:
-                if from_code in self._pending_requests:
-                    self._pending_requests[from_code].set()
-                    del self._pending_requests[from_code]
+                self._pending_requests.discard(from_code)
+                if updated:
+                    self._failed_at.pop(from_code, None)
+                else:
+                    self._failed_at[from_code] = time.time()
+
+        if updated:
+            self._save()
+            for callback in list(self._listeners):
+                try:
+                    callback(from_code)
+                except Exception as e:
+                    print(f"Currency listener failed: {e}")
+
+    def _load(self):
+        """Load persisted rates, if they came from the same source."""
+        try:
+            with open(self.path, "r") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Error loading currency rates: {e}")
+            return
+
+        if not isinstance(stored, dict):
+            return
+        if (
+            stored.get("version") != CURRENCY_CACHE_VERSION
+            or stored.get("base_url") != self.base_url
+        ):
+            return
+        bases = stored.get("bases")
+        if not isinstance(bases, dict):
+            return
+        self._cache = {
+            base: entry
+            for base, entry in bases.items()
+            if isinstance(entry, dict)
+            and isinstance(entry.get("rates"), dict)
+            and isinstance(entry.get("timestamp"), (int, float))
+        }
+
+    def _save(self):
+        """Persist all rates atomically; called from worker threads."""
+        with self._cache_lock:
+            stored = {
+                "version": CURRENCY_CACHE_VERSION,
+                "base_url": self.base_url,
+                "bases": dict(self._cache),
+            }
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(stored, f, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"Error saving currency rates: {e}")
 
     def cleanup(self):
         """Cleanup resources."""
         self._executor.shutdown(wait=False)
         with self._cache_lock:
-            self._cache.clear()
             self._pending_requests.clear()
+        self._listeners.clear()
 
 
 # Global currency cache instance
@@ -205,21 +292,16 @@ class Units:
             "EB": 9223372036854775808,
         }
 
-        self.TEMPERATURE_CHART = {
-            "celsius": (lambda v: v + 273.15, lambda v: v - 273.15),
-            "c": (lambda v: v + 273.15, lambda v: v - 273.15),
-            "fahrenheit": (
-                lambda v: (v - 32) * 5 / 9 + 273.15,
-                lambda v: (v - 273.15) * 9 / 5 + 32,
-            ),
-            "f": (
-                lambda v: (v - 32) * 5 / 9 + 273.15,
-                lambda v: (v - 273.15) * 9 / 5 + 32,
-            ),
-            "kelvin": (lambda v: v, lambda v: v),
-            "k": (lambda v: v, lambda v: v),
-            "rankine": (lambda v: v * 5 / 9, lambda v: v * 9 / 5),
-            "reaumur": (lambda v: v * 5 / 4 + 273.15, lambda v: (v - 273.15) * 4 / 5),
+        # Affine (factor, offset): kelvin = value * factor + offset
+        self.TEMPERATURE_CHART: dict[str, tuple[float, float]] = {
+            "celsius": (1, 273.15),
+            "c": (1, 273.15),
+            "fahrenheit": (5 / 9, 273.15 - 32 * 5 / 9),
+            "f": (5 / 9, 273.15 - 32 * 5 / 9),
+            "kelvin": (1, 0),
+            "k": (1, 0),
+            "rankine": (5 / 9, 0),
+            "reaumur": (5 / 4, 273.15),
         }
 
         self.TIME_CHART: dict[str, float] = {
@@ -419,82 +501,221 @@ class Units:
 
         # We no longer use currency_converter here.
 
+        # Charts in lookup order: a unit name found in several charts (e.g.
+        # "m", "oz") resolves to the first one the other unit is also in
+        self.CHARTS: dict[str, dict] = {
+            "weight": self.WEIGHT_CHART,
+            "length": self.LENGTH_CHART,
+            "temperature": self.TEMPERATURE_CHART,
+            "time": self.TIME_CHART,
+            "liquid-volume": self.LIQUID_VOLUME_CHART,
+            "storage": self.STORAGE_TYPE_CHART,
+            "angle": self.ANGLE_CHART,
+            "energy": self.ENERGY_CHART,
+            "speed": self.SPEED_CHART,
+            "pressure": self.PRESSURE_CHART,
+            "force": self.FORCE_CHART,
+            "power": self.POWER_CHART,
+            "voltage": self.VOLTAGE_CHART,
+            "current": self.CURRENT_CHART,
+            "resistance": self.RESISTANCE_CHART,
+            "capacitance": self.CAPACITANCE_CHART,
+            "inductance": self.INDUCTANCE_CHART,
+            "frequency": self.FREQUENCY_CHART,
+            "luminance": self.LUMINANCE_CHART,
+            "area": self.AREA_CHART,
+        }
+
+
+# Prefixes accepted in front of the base units below, e.g. "kHz", "GiB".
+# Bases are (alias, dimension), so "km" is a length but never a time.
+SI_PREFIXES: Dict[str, float] = {
+    "T": 1e12,
+    "G": 1e9,
+    "M": 1e6,
+    "k": 1e3,
+    "m": 1e-3,
+    "u": 1e-6,
+    "μ": 1e-6,
+    "n": 1e-9,
+}
+BINARY_PREFIXES: Dict[str, int] = {"Ki": 2**10, "Mi": 2**20, "Gi": 2**30, "Ti": 2**40}
+SI_PREFIXABLE_UNITS = {
+    ("m", "length"),
+    ("g", "weight"),
+    ("s", "time"),
+    ("l", "liquid-volume"),
+    ("B", "storage"),
+    ("bit", "storage"),
+    ("Hz", "frequency"),
+    ("W", "power"),
+    ("V", "voltage"),
+    ("A", "current"),
+    ("Ω", "resistance"),
+    ("F", "capacitance"),
+    ("H", "inductance"),
+    ("Pa", "pressure"),
+    ("N", "force"),
+}
+BINARY_PREFIXABLE_UNITS = {("B", "storage"), ("bit", "storage")}
+
+
+class UnitDefinition(NamedTuple):
+    """A unit as an affine map to its dimension's base unit."""
+
+    name: str
+    dimension: str
+    factor: float
+    offset: float = 0.0
+
+
+class UnitRegistry:
+    """
+    Every unit alias mapped to (dimension, factor, offset), built once.
+
+    Converting is a dict lookup per unit plus arithmetic, however many
+    charts there are. Aliases with the same factor in a chart are one unit,
+    named after its first alias. Prefixed forms of base units (e.g. "kHz",
+    "MiB") are parsed on first use and remembered.
+    """
+
+    def __init__(self, units: Units):
+        self._aliases: Dict[str, Tuple[UnitDefinition, ...]] = {}
+        self._dimensions: Dict[str, List[UnitDefinition]] = {}
+
+        for dimension, chart in units.CHARTS.items():
+            by_value: Dict[tuple, UnitDefinition] = {}
+            for alias, value in chart.items():
+                if dimension == "temperature":
+                    factor, offset = value
+                elif isinstance(value, tuple):
+                    # Weights are (to kg, from kg)
+                    factor, offset = value[0], 0.0
+                else:
+                    factor, offset = value, 0.0
+
+                unit = by_value.get((factor, offset))
+                if unit is None:
+                    unit = UnitDefinition(alias, dimension, factor, offset)
+                    by_value[(factor, offset)] = unit
+                    self._dimensions.setdefault(dimension, []).append(unit)
+                self._aliases[alias] = self._aliases.get(alias, ()) + (unit,)
+
+    def lookup(self, alias: str) -> Tuple[UnitDefinition, ...]:
+        """Get the units an alias may refer to, in chart order."""
+        units = self._aliases.get(alias)
+        if units is None:
+            units = self._parse_prefixed(alias)
+            if units:
+                self._aliases[alias] = units
+        return units or ()
+
+    def _parse_prefixed(self, alias: str) -> Tuple[UnitDefinition, ...]:
+        for prefixes, bases in (
+            (BINARY_PREFIXES, BINARY_PREFIXABLE_UNITS),
+            (SI_PREFIXES, SI_PREFIXABLE_UNITS),
+        ):
+            for prefix, multiplier in prefixes.items():
+                if not alias.startswith(prefix):
+                    continue
+                base = alias[len(prefix) :]
+                units = tuple(
+                    UnitDefinition(
+                        alias, unit.dimension, unit.factor * multiplier, unit.offset
+                    )
+                    for unit in self._aliases.get(base, ())
+                    if (base, unit.dimension) in bases
+                )
+                if units:
+                    return units
+        return ()
+
+    def resolve(
+        self, from_type: str, to_type: str
+    ) -> Optional[Tuple[UnitDefinition, UnitDefinition]]:
+        """Find units of the same dimension the two aliases refer to."""
+        to_units = self.lookup(to_type)
+        for from_unit in self.lookup(from_type):
+            for to_unit in to_units:
+                if from_unit.dimension == to_unit.dimension:
+                    return from_unit, to_unit
+        return None
+
+    def units_of(self, dimension: str) -> List[UnitDefinition]:
+        return self._dimensions.get(dimension, [])
+
+    @staticmethod
+    def convert(value: float, from_unit: UnitDefinition, to_unit: UnitDefinition):
+        if from_unit == to_unit:
+            return value
+        base = value * from_unit.factor + from_unit.offset
+        return (base - to_unit.offset) / to_unit.factor
+
+
+# Global unit registry, built once
+_unit_registry = UnitRegistry(Units())
+
 
 class Conversion:
     def __init__(self):
         self.units = Units()
+        self.registry = _unit_registry
         self.currency_cache = _currency_cache
 
     def convert(self, value: float, from_type: str, to_type: str):
         """
         Generalized conversion function that works with all categories,
         including currency via floatrates.com.
-        """
-        # Collection of all non-currency charts
-        charts = {
-            "WEIGHT_CHART": self.units.WEIGHT_CHART,
-            "LENGTH_CHART": self.units.LENGTH_CHART,
-            "TEMPERATURE_CHART": self.units.TEMPERATURE_CHART,
-            "TIME_CHART": self.units.TIME_CHART,
-            "LIQUID_VOLUME_CHART": self.units.LIQUID_VOLUME_CHART,
-            "STORAGE_TYPE_CHART": self.units.STORAGE_TYPE_CHART,
-            "ANGLE_CHART": self.units.ANGLE_CHART,
-            "ENERGY_CHART": self.units.ENERGY_CHART,
-            "SPEED_CHART": self.units.SPEED_CHART,
-            "PRESSURE_CHART": self.units.PRESSURE_CHART,
-            "FORCE_CHART": self.units.FORCE_CHART,
-            "POWER_CHART": self.units.POWER_CHART,
-            "VOLTAGE_CHART": self.units.VOLTAGE_CHART,
-            "CURRENT_CHART": self.units.CURRENT_CHART,
-            "RESISTANCE_CHART": self.units.RESISTANCE_CHART,
-            "CAPACITANCE_CHART": self.units.CAPACITANCE_CHART,
-            "INDUCTANCE_CHART": self.units.INDUCTANCE_CHART,
-            "FREQUENCY_CHART": self.units.FREQUENCY_CHART,
-            "LUMINANCE_CHART": self.units.LUMINANCE_CHART,
-            "AREA_CHART": self.units.AREA_CHART,
-        }
 
-        # 1) Check if it's in any of the charts (non-currency)
-        for chart_name, chart in charts.items():
-            if from_type in chart and to_type in chart:
-                # Temperatures use lambdas
-                if chart_name == "TEMPERATURE_CHART":
-                    if from_type == to_type:
-                        return value
-                    to_kelvin = chart[from_type][0]
-                    from_kelvin = chart[to_type][1]
-                    return from_kelvin(to_kelvin(value))
-
-                # Handle WEIGHT_CHART separately (tuple values)
-                if chart_name == "WEIGHT_CHART":
-                    if from_type == to_type:
-                        return value
-                    to_kg = chart[from_type][0]
-                    from_kg = chart[to_type][1]
-                    return value * to_kg * from_kg
-
-                # Any other numeric chart
-                if from_type == to_type:
-                    return value
-                return value * (chart[from_type] / chart[to_type])
+        Raises:
+            CurrencyRatesPending: If the currency's rates are still being fetched
+            ValueError: If the units can't be converted
+        """
+        # 1) Check if it's a known unit (non-currency)
+        units = self.registry.resolve(from_type, to_type)
+        if units is not None:
+            return self.registry.convert(value, *units)
 
         # 2) If both are currency codes (e.g. “USD”, “ARS”)
-        #    we assume they are uppercase and have 3 letters.
-        if (
-            len(from_type) == 3
-            and len(to_type) == 3
-            and from_type.isalpha()
-            and to_type.isalpha()
-        ):
+        if self.is_currency_pair(from_type, to_type):
             result = self._convert_currency_fast(value, from_type, to_type)
             if result is not None:
                 return result
-            # Fallback to slow method if fast method fails
-            return self._convert_currency_via_floatrates(value, from_type, to_type)
+            if self.currency_cache.is_pending(from_type):
+                raise CurrencyRatesPending(f"Fetching {from_type.upper()} rates")
+            raise ValueError(f"No exchange rate for {from_type} to {to_type}")
 
         # 3) If it doesn't fall into any case, error.
         raise ValueError(f"Unsupported conversion: {from_type} to {to_type}")
 
+    def is_currency_pair(self, from_type: str, to_type: str) -> bool:
+        """Whether both units look like currency codes, i.e. have 3 letters."""
+        return (
+            len(from_type) == 3
+            and len(to_type) == 3
+            and from_type.isalpha()
+            and to_type.isalpha()
+            and self.registry.resolve(from_type, to_type) is None
+        )
+
+    def convert_all(self, value: float, from_type: str) -> List[Tuple[str, float]]:
+        """
+        Convert a value to every other unit of its dimension.
+
+        Returns:
+            (unit name, converted value) pairs in chart order
+        """
+        units = self.registry.lookup(from_type)
+        if not units:
+            raise ValueError(f"Unknown unit: {from_type}")
+
+        from_unit = units[0]
+        return [
+            (unit.name, self.registry.convert(value, from_unit, unit))
+            for unit in self.registry.units_of(from_unit.dimension)
+            if (unit.factor, unit.offset) != (from_unit.factor, from_unit.offset)
+        ]
+
     def _convert_currency_fast(
         self, value: float, from_code: str, to_code: str
     ) -> Optional[float]:
@@ -508,36 +729,6 @@ class Conversion:
             return value * rate
         return None
 
-    def _convert_currency_via_floatrates(
-        self, value: float, from_code: str, to_code: str
-    ) -> float:
-        """
-        Converts using the JSON from floatrates.com:
-        - Makes GET to https://www.floatrates.com/daily/{from_lower}.json
-        - Takes the rate from the to_lower key and multiplies.
-        """
-        from_lower = from_code.lower()
-        to_lower = to_code.lower()
-
-        if from_lower == to_lower:
-            return value
-
-        url = f"https://www.floatrates.com/daily/{from_lower}.json"
-        resp = requests.get(url, timeout=5)
-        if resp.status_code != 200:
-            raise ValueError(f"Error getting data from floatrates for {from_code}")
-
-        data = resp.json()
-        if to_lower not in data:
-            raise ValueError(
-                f"Target currency '{to_code}' not found in floatrates response for '{
-                    from_code
-                }'"
-            )
-
-        rate = data[to_lower]["rate"]
-        return value * rate
-
     def parse_input_and_convert(self, input: str):
         parts = input.split()
         addition = "s" if parts[-1].endswith("s") else ""
@@ -0,0 +1,159 @@
+import math
+import re
+from array import array
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# Images at or below / above this average luminance count as dark / light
+DARK_LUMINANCE = 0.35
+LIGHT_LUMINANCE = 0.6
+# Largest color difference (CIE76 delta E) still counted as a match
+MAX_COLOR_DISTANCE = 30.0
+# Relative difference allowed between an image's and a wanted aspect ratio
+ASPECT_RATIO_TOLERANCE = 0.03
+
+HEX_COLOR_PATTERN = re.compile(r"^#([0-9A-Fa-f]{6})$")
+ASPECT_RATIO_PATTERN = re.compile(r"^(\d{1,3}):(\d{1,3})$")
+
+
+def _linearize(channel: float) -> float:
+    channel /= 255
+    if channel <= 0.04045:
+        return channel / 12.92
+    return ((channel + 0.055) / 1.055) ** 2.4
+
+
+def _lab_f(t: float) -> float:
+    return t ** (1 / 3) if t > 216 / 24389 else (24389 / 27 * t + 16) / 116
+
+
+def rgb_to_lab(r: float, g: float, b: float) -> Tuple[float, float, float]:
+    """Convert an sRGB color (0-255 channels) to CIE L*a*b* (D65)."""
+    r, g, b = _linearize(r), _linearize(g), _linearize(b)
+    x = (0.4124 * r + 0.3576 * g + 0.1805 * b) / 0.95047
+    y = 0.2126 * r + 0.7152 * g + 0.0722 * b
+    z = (0.0193 * r + 0.1192 * g + 0.9505 * b) / 1.08883
+    fx, fy, fz = _lab_f(x), _lab_f(y), _lab_f(z)
+    return 116 * fy - 16, 500 * (fx - fy), 200 * (fy - fz)
+
+
+def parse_hex_color(text: str) -> Optional[Tuple[int, int, int]]:
+    """Parse a ``#rrggbb`` color."""
+    match = HEX_COLOR_PATTERN.match(text)
+    if not match:
+        return None
+    value = int(match.group(1), 16)
+    return value >> 16, (value >> 8) & 0xFF, value & 0xFF
+
+
+def parse_aspect_ratio(text: str) -> Optional[float]:
+    """Parse an aspect ratio such as ``21:9``."""
+    match = ASPECT_RATIO_PATTERN.match(text)
+    if not match or not int(match.group(2)):
+        return None
+    return int(match.group(1)) / int(match.group(2))
+
+
+class ImageIndex:
+    """
+    Search images by color, brightness and shape without opening them.
+
+    Built from the metadata the thumbnailer records (see
+    utils.thumbnails.get_image_metadata). Dominant colors are converted to
+    L*a*b* once and stored in flat arrays, one entry per (image, color), so a
+    nearest-color search is a single pass over contiguous floats.
+    """
+
+    def __init__(self, images: Dict[str, dict]):
+        # Image names, and per image its luminance and aspect ratio
+        self.names: List[str] = []
+        self.luminance = array("d")
+        self.aspect = array("d")
+        # One entry per dominant color: owning image, L*a*b* and pixel share
+        self.owners = array("I")
+        self.lab = array("d")
+        self.shares = array("d")
+
+        for name, metadata in images.items():
+            index = len(self.names)
+            self.names.append(name)
+            self.luminance.append(metadata["luminance"])
+            self.aspect.append(metadata["width"] / max(metadata["height"], 1))
+            for r, g, b, share in metadata["colors"]:
+                self.owners.append(index)
+                self.lab.extend(rgb_to_lab(r, g, b))
+                self.shares.append(share)
+
+    def __len__(self):
+        return len(self.names)
+
+    def search_color(
+        self, rgb: Sequence[int], max_distance: float = MAX_COLOR_DISTANCE
+    ) -> List[Tuple[str, float]]:
+        """
+        Find images with a dominant color close to rgb.
+
+        A color covering less of the image counts as further away, up to
+        twice its distance.
+
+        Returns:
+            (name, score) pairs, best match first
+        """
+        target_l, target_a, target_b = rgb_to_lab(*rgb)
+        lab, shares, owners = self.lab, self.shares, self.owners
+        best: Dict[int, float] = {}
+
+        for entry in range(len(owners)):
+            offset = entry * 3
+            distance = math.sqrt(
+                (lab[offset] - target_l) ** 2
+                + (lab[offset + 1] - target_a) ** 2
+                + (lab[offset + 2] - target_b) ** 2
+            )
+            if distance > max_distance:
+                continue
+            score = distance * (2 - shares[entry])
+            owner = owners[entry]
+            if score < best.get(owner, math.inf):
+                best[owner] = score
+
+        return sorted(
+            ((self.names[owner], score) for owner, score in best.items()),
+            key=lambda item: item[1],
+        )
+
+    def search_luminance(self, dark: bool) -> List[Tuple[str, float]]:
+        """
+        Find dark or light images.
+
+        Returns:
+            (name, luminance) pairs, darkest or lightest first
+        """
+        if dark:
+            matches = [
+                (name, value)
+                for name, value in zip(self.names, self.luminance)
+                if value <= DARK_LUMINANCE
+            ]
+        else:
+            matches = [
+                (name, value)
+                for name, value in zip(self.names, self.luminance)
+                if value >= LIGHT_LUMINANCE
+            ]
+        return sorted(matches, key=lambda item: item[1], reverse=not dark)
+
+    def search_aspect(
+        self, ratio: float, tolerance: float = ASPECT_RATIO_TOLERANCE
+    ) -> List[Tuple[str, float]]:
+        """
+        Find images of an aspect ratio.
+
+        Returns:
+            (name, relative difference) pairs, closest first
+        """
+        matches = []
+        for name, aspect in zip(self.names, self.aspect):
+            difference = abs(aspect - ratio) / ratio
+            if difference <= tolerance:
+                matches.append((name, difference))
+        return sorted(matches, key=lambda item: item[1])
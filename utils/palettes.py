@@ -0,0 +1,295 @@
+import hashlib
+import json
+import os
+import re
+import subprocess
+import threading
+import tomllib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterable, List, Optional
+
+import config.data as data
+
+PALETTE_CACHE_FILE = os.path.join(data.CACHE_DIR, "matugen_palettes.json")
+PALETTE_CACHE_VERSION = 1
+# Concurrent matugen runs while precomputing; matugen is multi-threaded itself
+PALETTE_WORKERS = 2
+PALETTE_SAVE_INTERVAL = 16
+MATUGEN_TIMEOUT = 60
+
+MATUGEN_CONFIG_FILE = os.path.expanduser("~/.config/matugen/config.toml")
+# Templates shipped with the shell, checked when matugen's config can't be read
+MATUGEN_TEMPLATES_DIR = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "config",
+    "matugen",
+    "templates",
+)
+
+HEX_COLOR_PATTERN = re.compile(r"^#[0-9A-Fa-f]{6}$")
+# Template keyword only ``matugen image`` can fill in
+IMAGE_KEYWORD_PATTERN = re.compile(r"\{\{\s*image\s*\}\}")
+
+
+def hash_file(path: str) -> str:
+    """SHA-1 of a file's content."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def parse_source_color(output: str) -> Optional[str]:
+    """
+    Get the source color from ``matugen --json hex`` output.
+
+    Handles both the colors.<mode>.<name> and colors.<name>.<mode> layouts
+    of different matugen versions.
+    """
+    colors = json.loads(output).get("colors", {})
+    candidates = [colors.get("source_color")]
+    candidates += [
+        variant.get("source_color")
+        for variant in colors.values()
+        if isinstance(variant, dict)
+    ]
+    for candidate in candidates:
+        if isinstance(candidate, dict):
+            candidate = candidate.get("default") or candidate.get("dark")
+        if isinstance(candidate, str) and HEX_COLOR_PATTERN.match(candidate):
+            return candidate
+    return None
+
+
+def get_template_paths(config_path: str = MATUGEN_CONFIG_FILE) -> List[str]:
+    """
+    Get the input files of the templates matugen renders.
+
+    Falls back to the templates shipped in MATUGEN_TEMPLATES_DIR if the
+    config can't be read.
+    """
+    try:
+        with open(config_path, "rb") as f:
+            config = tomllib.load(f)
+    except (OSError, tomllib.TOMLDecodeError):
+        try:
+            return [
+                os.path.join(MATUGEN_TEMPLATES_DIR, name)
+                for name in sorted(os.listdir(MATUGEN_TEMPLATES_DIR))
+            ]
+        except OSError:
+            return []
+
+    config_dir = os.path.dirname(config_path)
+    paths = []
+    for template in config.get("templates", {}).values():
+        input_path = isinstance(template, dict) and template.get("input_path")
+        if isinstance(input_path, str):
+            input_path = os.path.expanduser(input_path)
+            paths.append(os.path.join(config_dir, input_path))
+    return paths
+
+
+def _get_mtime(path: str) -> Optional[int]:
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+# {config path: (config and templates dir mtimes, template mtimes, result)}
+_templates_use_image_cache: Dict[str, tuple] = {}
+
+
+def templates_use_image(config_path: str = MATUGEN_CONFIG_FILE) -> bool:
+    """
+    Whether any template matugen renders uses the ``{{image}}`` keyword.
+
+    ``matugen color`` has no image to fill it in with, so such templates
+    need ``matugen image``; the shipped ones point at ~/.current.wall
+    instead. A template that can't be read counts as using it. The result
+    is cached until the config or one of its templates changes.
+    """
+    dir_mtimes = (_get_mtime(config_path), _get_mtime(MATUGEN_TEMPLATES_DIR))
+    cached = _templates_use_image_cache.get(config_path)
+    if (
+        cached
+        and cached[0] == dir_mtimes
+        and all(_get_mtime(path) == mtime for path, mtime in cached[1])
+    ):
+        return cached[2]
+
+    template_mtimes = []
+    result = False
+    for path in get_template_paths(config_path):
+        template_mtimes.append((path, _get_mtime(path)))
+        if result:
+            continue
+        try:
+            with open(path, "r", encoding="utf-8", errors="replace") as f:
+                result = bool(IMAGE_KEYWORD_PATTERN.search(f.read()))
+        except OSError:
+            result = True
+
+    _templates_use_image_cache[config_path] = (dir_mtimes, template_mtimes, result)
+    return result
+
+
+class PaletteCache:
+    """
+    Precomputed matugen source colors of wallpapers.
+
+    Extracting the source color is the slow part of ``matugen image``; every
+    scheme is derived from that one color. Sources are cached by file
+    content, with each file's (mtime, size) remembered so unchanged files
+    aren't hashed again, and are precomputed in the background, so applying
+    a wallpaper only has to run ``matugen color`` to render the templates.
+
+    Templates using ``{{image}}`` can only be rendered by ``matugen image``;
+    while any does, the cache is not used (see templates_use_image).
+    """
+
+    def __init__(self, path: str = PALETTE_CACHE_FILE):
+        self.path = path
+        # {file path: [mtime_ns, size, content digest]}
+        self._files: Dict[str, list] = {}
+        # {content digest: source color}
+        self._sources: Dict[str, str] = {}
+        self._lock = threading.Lock()
+        self._executor = ThreadPoolExecutor(
+            max_workers=PALETTE_WORKERS, thread_name_prefix="palettes"
+        )
+        self._pending = set()
+        self._unsaved = 0
+        self._load()
+
+    def get_source_color(self, path: str) -> Optional[str]:
+        """Get the cached source color of an image, if it is still current."""
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return None
+        with self._lock:
+            info = self._files.get(path)
+            if not info or info[:2] != [stat.st_mtime_ns, stat.st_size]:
+                return None
+            return self._sources.get(info[2])
+
+    def get_apply_command(self, path: str, scheme: str) -> str:
+        """
+        Get the matugen command theming from an image, rendering from its
+        cached source color when there is one and no template needs the image.
+        """
+        source = self.get_source_color(path)
+        if source is None or templates_use_image():
+            return f'matugen image "{path}" -t {scheme}'
+        return f'matugen color hex "{source}" -t {scheme}'
+
+    def precompute(self, paths: Iterable[str]):
+        """Extract the source colors of images that aren't cached, in the background."""
+        for path in paths:
+            with self._lock:
+                if path in self._pending:
+                    continue
+                self._pending.add(path)
+            try:
+                self._executor.submit(self._compute, path)
+            except RuntimeError:
+                # Shut down with its owner
+                return
+
+    def _compute(self, path: str):
+        try:
+            stat = os.stat(path)
+            signature = [stat.st_mtime_ns, stat.st_size]
+            with self._lock:
+                info = self._files.get(path)
+                if info and info[:2] == signature and info[2] in self._sources:
+                    return
+
+            digest = hash_file(path)
+            with self._lock:
+                self._files[path] = signature + [digest]
+                known = digest in self._sources
+
+            if not known:
+                result = subprocess.run(
+                    ["matugen", "image", path, "--dry-run", "--json", "hex"],
+                    capture_output=True,
+                    text=True,
+                    check=True,
+                    timeout=MATUGEN_TIMEOUT,
+                )
+                source = parse_source_color(result.stdout)
+                if source is None:
+                    print(f"No source color in matugen output for {path}")
+                    return
+                with self._lock:
+                    self._sources[digest] = source
+
+            with self._lock:
+                self._unsaved += 1
+        except (OSError, subprocess.SubprocessError, ValueError) as e:
+            print(f"Error precomputing palette for {path}: {e}")
+        finally:
+            with self._lock:
+                self._pending.discard(path)
+                finished = not self._pending
+                unsaved = self._unsaved
+            if unsaved and (finished or unsaved >= PALETTE_SAVE_INTERVAL):
+                self._save()
+
+    def prune(self, paths: Iterable[str]):
+        """Forget files that are no longer listed, and their colors."""
+        wanted = set(paths)
+        with self._lock:
+            self._files = {
+                path: info for path, info in self._files.items() if path in wanted
+            }
+            digests = {info[2] for info in self._files.values()}
+            self._sources = {
+                digest: source
+                for digest, source in self._sources.items()
+                if digest in digests
+            }
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Error loading palette cache: {e}")
+            return
+
+        if not isinstance(stored, dict):
+            return
+        if stored.get("version") != PALETTE_CACHE_VERSION:
+            return
+        self._files = stored.get("files", {})
+        self._sources = stored.get("sources", {})
+
+    def _save(self):
+        """Write the cache atomically; called from worker threads."""
+        with self._lock:
+            self._unsaved = 0
+            stored = {
+                "version": PALETTE_CACHE_VERSION,
+                "files": dict(self._files),
+                "sources": dict(self._sources),
+            }
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, "w") as f:
+                    json.dump(stored, f, separators=(",", ":"))
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"Error saving palette cache: {e}")
+
+    def cleanup(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        with self._lock:
+            self._pending.clear()
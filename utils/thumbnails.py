@@ -0,0 +1,339 @@
+import hashlib
+import json
+import multiprocessing
+import os
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from PIL import Image, ImageStat
+
+# Small list icon and a larger grid preview, made from a single decode
+THUMBNAIL_SIZES = (32, 256)
+# zlib level of thumbnail PNGs; higher levels are much slower to encode and
+# barely smaller at these sizes
+THUMBNAIL_PNG_COMPRESSION = 1
+# Colors kept per image, and the size of the copy they are picked from
+DOMINANT_COLORS = 5
+DOMINANT_COLOR_SAMPLE_SIZE = 64
+METADATA_VERSION = 1
+
+
+def get_thumbnail_key(path: str, stat: os.stat_result) -> str:
+    """
+    Cache key of a file's thumbnails.
+
+    Derived from the path, modification time and size, so a file replaced
+    under the same name gets new thumbnails instead of stale ones.
+    """
+    source = f"{path}\0{stat.st_mtime_ns}\0{stat.st_size}"
+    return hashlib.sha1(source.encode("utf-8", "surrogateescape")).hexdigest()
+
+
+def get_thumbnail_path(cache_dir: str, key: str, size: int) -> str:
+    return os.path.join(cache_dir, f"{key}_{size}.png")
+
+
+def get_image_metadata(img: Image.Image, width: int, height: int) -> dict:
+    """
+    Describe an image: its dimensions, average luminance (0-1) and dominant
+    colors as [r, g, b, share of pixels], most common first.
+    """
+    sample = img.convert("RGB")
+    sample.thumbnail((DOMINANT_COLOR_SAMPLE_SIZE, DOMINANT_COLOR_SAMPLE_SIZE))
+    quantized = sample.quantize(DOMINANT_COLORS, method=Image.Quantize.MEDIANCUT)
+    palette = quantized.getpalette()
+    counts = sorted(quantized.getcolors(), reverse=True)
+    total = sum(count for count, _ in counts)
+
+    return {
+        "width": width,
+        "height": height,
+        "luminance": round(ImageStat.Stat(sample.convert("L")).mean[0] / 255, 4),
+        "colors": [
+            palette[index * 3 : index * 3 + 3] + [round(count / total, 4)]
+            for count, index in counts
+        ],
+    }
+
+
+def render_thumbnails(
+    path: str, cache_dir: str, key: str, sizes: Tuple[int, ...] = THUMBNAIL_SIZES
+) -> dict:
+    """
+    Decode an image once, write a thumbnail per size and describe it.
+
+    Runs in worker processes. JPEGs are decoded at a reduced scale when the
+    largest size allows it, and each smaller thumbnail is resized from the
+    previous one rather than from the full image.
+
+    Returns:
+        Metadata of the image, see get_image_metadata
+    """
+    metadata = None
+    with Image.open(path) as img:
+        width, height = img.size
+        largest = max(sizes)
+        img.draft("RGB", (largest, largest))
+        has_alpha = "A" in img.getbands() or "transparency" in img.info
+        img = img.convert("RGBA" if has_alpha else "RGB")
+
+        for size in sorted(sizes, reverse=True):
+            img.thumbnail((size, size), Image.Resampling.BILINEAR, reducing_gap=2.0)
+            thumbnail_path = get_thumbnail_path(cache_dir, key, size)
+            tmp_path = f"{thumbnail_path}.{os.getpid()}.tmp"
+            img.save(tmp_path, "PNG", compress_level=THUMBNAIL_PNG_COMPRESSION)
+            os.replace(tmp_path, thumbnail_path)
+            if metadata is None:
+                metadata = get_image_metadata(img, width, height)
+    return metadata
+
+
+class Thumbnailer:
+    """
+    Thumbnails of image files, rendered on a process pool.
+
+    Each file is decoded once into every size in THUMBNAIL_SIZES. Thumbnails
+    are stored on disk under a key of (path, mtime, size), so existing ones
+    are reused across sessions and replaced files are picked up. Missing
+    thumbnails are rendered in parallel on all cores.
+
+    The same decode describes each image (see get_image_metadata); with an
+    index_path, these descriptions are kept in a JSON index by key.
+    """
+
+    def __init__(
+        self,
+        cache_dir: str,
+        sizes: Tuple[int, ...] = THUMBNAIL_SIZES,
+        max_workers: Optional[int] = None,
+        index_path: Optional[str] = None,
+    ):
+        self.cache_dir = cache_dir
+        self.sizes = sizes
+        self.index_path = index_path
+        # {key: image metadata}
+        self.metadata: Dict[str, dict] = {}
+        # Bumped whenever metadata changes
+        self.metadata_generation = 0
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self._executor: Optional[ProcessPoolExecutor] = None
+        # {path: key} of every file thumbnailed so far
+        self._keys: Dict[str, str] = {}
+        self._pending: Dict[str, Future] = {}
+        self._done = 0
+        self._total = 0
+        self._lock = threading.Lock()
+        self._load_index()
+
+    def _get_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # Forking from the threaded shell could deadlock on a lock held by
+            # another thread; workers fork from a server that only imported
+            # this module instead
+            context = multiprocessing.get_context("forkserver")
+            context.set_forkserver_preload([__name__])
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.max_workers, mp_context=context
+            )
+        return self._executor
+
+    def get_progress(self) -> Tuple[int, int]:
+        """(rendered, total) of the files queued since the last run finished."""
+        with self._lock:
+            return self._done, self._total
+
+    def is_pending(self, path: str) -> bool:
+        return path in self._pending
+
+    def get_key(self, path: str) -> Optional[str]:
+        """Get the key of a file's thumbnails, once it has been queued."""
+        return self._keys.get(path)
+
+    def get_metadata(self, path: str) -> Optional[dict]:
+        """Get the metadata of a file, once it has been rendered."""
+        key = self._keys.get(path)
+        return self.metadata.get(key) if key else None
+
+    def get_path(self, path: str, size: int) -> Optional[str]:
+        """Get the thumbnail of a file if it has been rendered."""
+        key = self._keys.get(path)
+        if key is None or path in self._pending:
+            return None
+        thumbnail_path = get_thumbnail_path(self.cache_dir, key, size)
+        return thumbnail_path if os.path.exists(thumbnail_path) else None
+
+    def ensure(
+        self,
+        paths: Iterable[str],
+        on_progress: Optional[Callable[[int, int], None]] = None,
+    ):
+        """
+        Render missing thumbnails of some files in the background.
+
+        Args:
+            paths: Image files
+            on_progress: Called with (rendered, total) after each file, from
+                a pool thread
+        """
+        os.makedirs(self.cache_dir, exist_ok=True)
+        missing = []
+        for path in paths:
+            try:
+                key = get_thumbnail_key(path, os.stat(path))
+            except OSError:
+                continue
+            self._keys[path] = key
+            if path in self._pending:
+                continue
+            if (self.index_path and key not in self.metadata) or not all(
+                os.path.exists(get_thumbnail_path(self.cache_dir, key, size))
+                for size in self.sizes
+            ):
+                missing.append((path, key))
+
+        if not missing:
+            return
+
+        with self._lock:
+            if not self._pending:
+                self._done = self._total = 0
+            self._total += len(missing)
+
+        for path, key in missing:
+            try:
+                future = self._submit(path, key)
+            except RuntimeError:
+                # Shut down with its owner
+                return
+            self._pending[path] = future
+            future.add_done_callback(
+                lambda future, path=path: self._on_rendered(path, future, on_progress)
+            )
+
+    def _submit(self, path: str, key: str) -> Future:
+        try:
+            return self._get_executor().submit(
+                render_thumbnails, path, self.cache_dir, key, self.sizes
+            )
+        except BrokenProcessPool as e:
+            # A worker died (e.g. out of memory); start a new pool
+            print(f"Thumbnail worker pool broke, restarting it: {e}")
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+            return self._get_executor().submit(
+                render_thumbnails, path, self.cache_dir, key, self.sizes
+            )
+
+    def add_done_callback(self, path: str, callback: Callable[[str], None]) -> bool:
+        """
+        Call back with the path once a pending file has been rendered.
+
+        Returns:
+            False if the file isn't pending
+        """
+        future = self._pending.get(path)
+        if future is None:
+            return False
+        future.add_done_callback(lambda future: callback(path))
+        return True
+
+    def _on_rendered(
+        self,
+        path: str,
+        future: Future,
+        on_progress: Optional[Callable[[int, int], None]],
+    ):
+        if future.cancelled():
+            self._pending.pop(path, None)
+            return
+        error = future.exception()
+        if error is not None:
+            print(f"Error creating thumbnail for {path}: {error}")
+
+        with self._lock:
+            if error is None and path in self._keys:
+                self.metadata[self._keys[path]] = future.result()
+                self.metadata_generation += 1
+            self._pending.pop(path, None)
+            self._done += 1
+            progress = self._done, self._total
+            finished = not self._pending
+        if finished:
+            self._save_index()
+        if on_progress:
+            on_progress(*progress)
+
+    def prune(self):
+        """
+        Delete thumbnails and metadata of files that changed or are no longer
+        listed.
+
+        Does nothing while thumbnails are being rendered.
+        """
+        if self._pending:
+            return
+        keys = set(self._keys.values())
+        with self._lock:
+            stale = set(self.metadata) - keys
+            for key in stale:
+                del self.metadata[key]
+            if stale:
+                self.metadata_generation += 1
+        if stale:
+            self._save_index()
+
+        wanted = {
+            os.path.basename(get_thumbnail_path(self.cache_dir, key, size))
+            for key in self._keys.values()
+            for size in self.sizes
+        }
+        try:
+            names: List[str] = os.listdir(self.cache_dir)
+        except FileNotFoundError:
+            return
+        for name in names:
+            if name not in wanted:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
+
+    def _load_index(self):
+        if not self.index_path:
+            return
+        try:
+            with open(self.index_path, "r") as f:
+                stored = json.load(f)
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as e:
+            print(f"Error loading image index: {e}")
+            return
+
+        if not isinstance(stored, dict):
+            return
+        if stored.get("version") == METADATA_VERSION:
+            self.metadata = stored.get("images", {})
+            self.metadata_generation += 1
+
+    def _save_index(self):
+        if not self.index_path:
+            return
+        with self._lock:
+            stored = {"version": METADATA_VERSION, "images": dict(self.metadata)}
+        try:
+            os.makedirs(os.path.dirname(self.index_path), exist_ok=True)
+            tmp_path = f"{self.index_path}.tmp"
+            with open(tmp_path, "w") as f:
+                json.dump(stored, f, separators=(",", ":"))
+            os.replace(tmp_path, self.index_path)
+        except Exception as e:
+            print(f"Error saving image index: {e}")
+
+    def cleanup(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+        self._pending.clear()